@@ -26,6 +26,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'decisions.middleware.MembershipMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
 ]
 
@@ -103,13 +104,86 @@ CORS_ALLOW_ALL_ORIGINS = True
 # OpenAI API Key
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', 'sk-your-key-here')
 
-# Redis Cache
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
-        'LOCATION': 'redis://redis:6379/1',
+# Cache: Redis when REDIS_URL is set, otherwise per-process local memory
+# (only correct with a single worker process, see check decisions.W001)
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'decisionos',
+        }
     }
+
+# LLM provider (decisions.providers): OpenAIProvider, FakeProvider (offline,
+# deterministic) or ReplayProvider (recorded fixture), built with the options
+AI_PROVIDER = os.getenv('AI_PROVIDER', 'decisions.providers.OpenAIProvider')
+AI_PROVIDER_OPTIONS = {}
+
+# AI calls (async endpoints): per-call deadline, per-process concurrency,
+# and how long to wait for a free slot before answering heuristically
+AI_TIMEOUT = 20  # seconds
+AI_MAX_CONCURRENCY = 8
+AI_QUEUE_TIMEOUT = 0.5  # seconds
+# Per-method deadlines (seconds); methods not listed use AI_TIMEOUT
+AI_METHOD_TIMEOUTS = {
+    'analysis': 15,
+    'alternatives': 15,
+    'summary': 10,
+    'quality': 8,
 }
+# Circuit breaker: open after AI_BREAKER_FAILURES failures (errors, timeouts
+# or calls slower than AI_BREAKER_SLOW_CALL) that are at least
+# AI_BREAKER_FAILURE_RATE of the calls in the last AI_BREAKER_WINDOW seconds;
+# probe again after AI_BREAKER_RESET_TIMEOUT
+AI_BREAKER_FAILURES = 5
+AI_BREAKER_FAILURE_RATE = 0.5
+AI_BREAKER_WINDOW = 60  # seconds
+AI_BREAKER_RESET_TIMEOUT = 30  # seconds
+AI_BREAKER_SLOW_CALL = 10  # seconds
+# Completion cache (keyed by prompt hash): TTL and per-process LRU size
+AI_CACHE_TTL = 60 * 60 * 6  # seconds
+AI_CACHE_MAXSIZE = 512
+# Prompt material (description, options, template values, comments) per
+# call; longer material is condensed in AI_PROMPT_CHUNK_TOKENS pieces
+AI_PROMPT_TOKEN_BUDGET = 3000
+AI_PROMPT_CHUNK_TOKENS = 1500
+AI_PROMPT_MAX_COMMENTS = 20
+AI_PROMPT_MAP_WORKERS = 4
+# AI call ledger: rows are buffered and inserted in batches
+AI_LEDGER_BATCH_SIZE = 50
+AI_LEDGER_FLUSH_INTERVAL = 5  # seconds
+# Daily LLM token budget of teams without their own (None = unlimited)
+AI_TEAM_DAILY_TOKEN_BUDGET = None
+
+# Related decisions: hashed TF-IDF buckets per decision (see decisions.similarity);
+# changing it needs `manage.py rebuild_embeddings`
+SIMILARITY_DIMENSIONS = 512
+
+# Dashboard topics (decisions.topics): at most this many k-means clusters per
+# team; `manage.py recluster_topics` reclusters teams once this share of
+# their decisions was assigned incrementally since the last run
+TOPIC_MAX_CLUSTERS = 12
+TOPIC_RECLUSTER_DRIFT = 0.2
+
+# AI jobs: ThreadExecutor runs them inside the web process; with
+# DatabaseExecutor run `manage.py run_ai_worker` as a separate process.
+AI_JOB_EXECUTOR = os.getenv('AI_JOB_EXECUTOR', 'decisions.jobs.ThreadExecutor')
+AI_JOB_THREADS = 4
+
+# Live notifications (SSE): pub/sub backend shared by all workers
+DECISIONS_PUBSUB_BACKEND = (
+    'decisions.pubsub.RedisBroker' if REDIS_URL else 'decisions.pubsub.InProcessBroker'
+)
+NOTIFICATIONS_STREAM_HEARTBEAT = 20  # seconds
+NOTIFICATIONS_STREAM_MAX_AGE = 300  # seconds, then the browser reconnects
 
 # Celery Configuration (for async tasks)
 CELERY_BROKER_URL = 'redis://redis:6379/0'
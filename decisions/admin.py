@@ -1,10 +1,10 @@
 from django.contrib import admin
-from .models import Team, TeamMember, Decision, DecisionOption, DecisionReview, DecisionAudit, DecisionAttachment, Notification, DecisionComment
+from .models import Team, TeamMember, Decision, DecisionOption, DecisionReview, DecisionAudit, DecisionAttachment, Notification, DecisionComment, AIJob, QualityScoreRun, DecisionQualityScore, AICall
 
 
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
-    list_display = ['name', 'created_at']
+    list_display = ['name', 'ai_daily_token_budget', 'created_at']
     search_fields = ['name', 'description']
 
 
@@ -55,3 +55,26 @@ class DecisionCommentAdmin(admin.ModelAdmin):
     list_display = ['decision', 'user', 'parent', 'created_at']
     list_filter = ['decision']
     search_fields = ['text', 'user__username', 'decision__title']
+
+
+@admin.register(AIJob)
+class AIJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'decision', 'requested_by', 'status', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status']
+
+
+@admin.register(QualityScoreRun)
+class QualityScoreRunAdmin(admin.ModelAdmin):
+    list_display = ['id', 'team', 'status', 'processed', 'skipped', 'errors', 'started_at', 'finished_at']
+    list_filter = ['status']
+
+
+@admin.register(DecisionQualityScore)
+class DecisionQualityScoreAdmin(admin.ModelAdmin):
+    list_display = ['decision', 'score', 'scored_at', 'run']
+
+
+@admin.register(AICall)
+class AICallAdmin(admin.ModelAdmin):
+    list_display = ['method', 'team', 'decision', 'outcome', 'cache_hit', 'prompt_tokens', 'completion_tokens', 'latency_ms', 'created_at']
+    list_filter = ['method', 'outcome', 'cache_hit']
@@ -0,0 +1,141 @@
+"""Content-addressed cache for LLM completions.
+
+A completion is keyed by a hash of everything that determines it: model,
+messages (which embed the decision's title, description, priority, status,
+owner, due date, tags and option count), temperature and response format.
+An edited decision therefore gets a new key; nothing has to be invalidated.
+
+Two tiers: a per-process LRU with TTL answers repeated clicks without any
+I/O, the Django cache shares results between workers. Identical calls that
+miss both are coalesced so only one of them reaches the API: threads via
+``caching.get_or_compute``, coroutines by awaiting a shared task.
+Failed calls raise and are never cached.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import get_or_compute
+
+KEY_PREFIX = "ai:completion:"
+DEFAULT_TTL = 60 * 60 * 6
+DEFAULT_MAXSIZE = 512
+
+_MISSING = object()
+
+
+def completion_key(request: dict) -> str:
+    """Hash of a chat completion request (model, messages, parameters)."""
+    raw = json.dumps(request, sort_keys=True, default=str, ensure_ascii=False)
+    return KEY_PREFIX + hashlib.sha256(raw.encode()).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe LRU with a per-entry time to live."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CompletionCache:
+    def __init__(self, maxsize: int | None = None, ttl: int | None = None):
+        self.ttl = ttl or getattr(settings, "AI_CACHE_TTL", DEFAULT_TTL)
+        self.local = LRUCache(maxsize or getattr(settings, "AI_CACHE_MAXSIZE", DEFAULT_MAXSIZE), self.ttl)
+        # in-flight tasks per event loop (tasks are loop-bound)
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+
+    def get_or_call(self, key: str, call: Callable[[], Any]) -> Any:
+        value = self.local.get(key)
+        if value is _MISSING:
+            value = get_or_compute(key, call, self.ttl)
+            self.local.set(key, value)
+        return value
+
+    async def aget_or_call(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.local.get(key)
+        if value is not _MISSING:
+            return value
+
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.setdefault(loop, {})
+        task = inflight.get(key)
+        if task is None:
+            task = loop.create_task(self._fill(key, call))
+            inflight[key] = task
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+        # shield: a waiter that is cancelled (client went away) must not
+        # cancel the call the other waiters depend on
+        return await asyncio.shield(task)
+
+    async def aget(self, key: str) -> Any:
+        """Cached value or None; never calls anything (used by streams)."""
+        value = self.local.get(key)
+        if value is _MISSING:
+            try:
+                value = await cache.aget(key, _MISSING)
+            except Exception:
+                value = _MISSING
+            if value is _MISSING:
+                return None
+            self.local.set(key, value)
+        return value
+
+    async def aset(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        try:
+            await cache.aset(key, value, self.ttl)
+        except Exception:
+            pass
+
+    async def _fill(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await cache.aget(key, _MISSING)
+        except Exception:
+            value = _MISSING
+        if value is _MISSING:
+            value = await call()
+            try:
+                await cache.aset(key, value, self.ttl)
+            except Exception:
+                pass
+        self.local.set(key, value)
+        return value
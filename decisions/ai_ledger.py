@@ -0,0 +1,266 @@
+"""Ledger of LLM calls and per-team daily token budgets.
+
+Every call ``AIService`` makes (plus cache hits and budget short-circuits)
+is recorded as an ``AICall`` row. ``record()`` only appends to an in-memory
+buffer; a single writer thread inserts the buffer with one ``bulk_create``
+once it holds ``AI_LEDGER_BATCH_SIZE`` rows or is ``AI_LEDGER_FLUSH_INTERVAL``
+seconds old, so no request waits for the insert. A crash loses at most one
+unflushed buffer.
+
+Budgets are enforced from a per-team, per-day token counter in the cache,
+which ``record()`` increments right away (not at flush time). A team whose
+counter has reached its budget is short-circuited by ``AIService`` to the
+heuristic fallback without contacting the provider.
+"""
+from __future__ import annotations
+
+import atexit
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import AICall, Team
+from .sketches import QuantileSketch
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL = 5.0
+TOKENS_KEY = "ai:tokens:{}:{}"
+BUDGET_KEY = "ai:budget:{}"
+BUDGET_CACHE_TIMEOUT = 60 * 5
+# cached for "no budget": None is what the cache returns for a miss
+UNLIMITED = -1
+# outcomes where the provider was actually contacted
+PROVIDER_OUTCOMES = ("ok", "error", "timeout")
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai-ledger")
+
+
+# =========================
+# Budgets
+# =========================
+
+def _tokens_key(team_id: int) -> str:
+    return TOKENS_KEY.format(team_id, timezone.localdate().isoformat())
+
+
+def tokens_used_today(team_id: int) -> int:
+    try:
+        return cache.get(_tokens_key(team_id)) or 0
+    except Exception:
+        return 0
+
+
+def add_tokens(team_id: int, tokens: int) -> None:
+    key = _tokens_key(team_id)
+    try:
+        # the key outlives the day it counts; yesterday's simply expires
+        cache.add(key, 0, 60 * 60 * 48)
+        cache.incr(key, tokens)
+    except ValueError:
+        cache.set(key, tokens, 60 * 60 * 48)
+    except Exception:
+        pass
+
+
+def budget_for(team_id: int) -> Optional[int]:
+    """The team's daily token budget (None = unlimited, 0 = no calls), cached briefly."""
+    key = BUDGET_KEY.format(team_id)
+    try:
+        budget = cache.get(key)
+    except Exception:
+        budget = None
+    if budget is None:
+        budget = Team.objects.filter(pk=team_id).values_list("ai_daily_token_budget", flat=True).first()
+        if budget is None:
+            budget = getattr(settings, "AI_TEAM_DAILY_TOKEN_BUDGET", None)
+        if budget is None:
+            budget = UNLIMITED
+        try:
+            cache.set(key, budget, BUDGET_CACHE_TIMEOUT)
+        except Exception:
+            pass
+    return None if budget == UNLIMITED else budget
+
+
+def invalidate_budget(team_id: int) -> None:
+    try:
+        cache.delete(BUDGET_KEY.format(team_id))
+    except Exception:
+        pass
+
+
+def over_budget(team_id: Optional[int]) -> bool:
+    if team_id is None:
+        return False
+    budget = budget_for(team_id)
+    return budget is not None and tokens_used_today(team_id) >= budget
+
+
+# =========================
+# Buffered writes
+# =========================
+
+class Ledger:
+    def __init__(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.batch_size = batch_size or getattr(settings, "AI_LEDGER_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+        self.flush_interval = flush_interval or getattr(settings, "AI_LEDGER_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+        self._buffer: list[AICall] = []
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def record(
+        self,
+        method: str,
+        model: str,
+        team_id: Optional[int] = None,
+        decision_id: Optional[int] = None,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        latency: float = 0.0,
+        outcome: str = "ok",
+        cache_hit: bool = False,
+        error: str = "",
+    ) -> None:
+        """Buffer one call; never touches the database on the caller's thread."""
+        if team_id is not None and prompt_tokens + completion_tokens:
+            add_tokens(team_id, prompt_tokens + completion_tokens)
+        call = AICall(
+            team_id=team_id,
+            decision_id=decision_id,
+            method=method,
+            model=model,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            latency_ms=latency * 1000,
+            outcome=outcome,
+            cache_hit=cache_hit,
+            error=error[:1000],
+        )
+        with self._lock:
+            self._buffer.append(call)
+            full = len(self._buffer) >= self.batch_size
+            if full:
+                self._cancel_timer()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.schedule_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.schedule_flush()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def schedule_flush(self):
+        return _writer.submit(self._flush_in_thread)
+
+    def _flush_in_thread(self) -> None:
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+    def flush(self) -> int:
+        """Insert the buffered calls now; returns how many were written."""
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+            self._cancel_timer()
+        if not batch:
+            return 0
+        try:
+            AICall.objects.bulk_create(batch, batch_size=500)
+        except Exception as e:
+            print(f"AI ledger flush failed ({len(batch)} calls dropped): {e}")
+            return 0
+        return len(batch)
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+
+ledger = Ledger()
+atexit.register(ledger.flush)
+
+
+# =========================
+# Aggregates
+# =========================
+
+def team_usage(team_ids: Iterable[int], days: int = 7) -> dict[int, dict]:
+    """Per-team usage over the last ``days`` days.
+
+    Tokens and call counts per day plus totals come from one grouped query;
+    p95 latency streams the latencies of provider calls into one
+    ``QuantileSketch`` per team.
+    """
+    team_ids = list(team_ids)
+    since = timezone.now() - timedelta(days=days)
+    usage = {
+        team_id: {
+            "team_id": team_id,
+            "budget": budget_for(team_id),
+            "tokens_today": tokens_used_today(team_id),
+            "days": [],
+            "calls": 0,
+            "tokens": 0,
+            "errors": 0,
+            "cache_hits": 0,
+            "over_budget": 0,
+        }
+        for team_id in team_ids
+    }
+    if not team_ids:
+        return usage
+
+    calls = AICall.objects.filter(team_id__in=team_ids, created_at__gte=since)
+    per_day = (
+        calls.annotate(day=TruncDate("created_at"))
+        .order_by()
+        .values("team_id", "day")
+        .annotate(
+            calls=Count("pk"),
+            prompt=Sum("prompt_tokens"),
+            completion=Sum("completion_tokens"),
+            errors=Count("pk", filter=Q(outcome__in=("error", "timeout"))),
+            cache_hits=Count("pk", filter=Q(cache_hit=True)),
+            over_budget=Count("pk", filter=Q(outcome="over_budget")),
+        )
+        .order_by("team_id", "day")
+    )
+    for row in per_day:
+        out = usage[row["team_id"]]
+        tokens = (row["prompt"] or 0) + (row["completion"] or 0)
+        out["days"].append({"date": row["day"].isoformat(), "calls": row["calls"], "tokens": tokens})
+        out["calls"] += row["calls"]
+        out["tokens"] += tokens
+        out["errors"] += row["errors"]
+        out["cache_hits"] += row["cache_hits"]
+        out["over_budget"] += row["over_budget"]
+
+    sketches: dict[int, QuantileSketch] = defaultdict(QuantileSketch)
+    latencies = (
+        calls.filter(cache_hit=False, outcome__in=PROVIDER_OUTCOMES)
+        .order_by()
+        .values_list("team_id", "latency_ms")
+    )
+    for team_id, latency_ms in latencies.iterator(chunk_size=2000):
+        sketches[team_id].add(latency_ms)
+
+    for team_id, out in usage.items():
+        provider_calls = sketches[team_id].count
+        out["error_rate"] = round(out["errors"] / provider_calls, 4) if provider_calls else 0.0
+        out["cache_hit_rate"] = round(out["cache_hits"] / out["calls"], 4) if out["calls"] else 0.0
+        p95 = sketches[team_id].quantile(0.95)
+        out["p95_latency_ms"] = round(p95, 1) if p95 is not None else None
+    return usage
@@ -1,42 +1,371 @@
+import asyncio
 import os
 import json
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+
+from .ai_cache import CompletionCache, completion_key
+from .ai_ledger import ledger, over_budget
+from .alternatives import (
+    ALTERNATIVES_SCHEMA,
+    MAX_ALTERNATIVES,
+    PROS_CONS_SCHEMA,
+    validate_alternatives,
+    validate_pros_cons,
+)
+from .circuit import CircuitBreaker
+from .prompts import PromptBuilder, estimate_tokens, fit, load_sections, split_chunks
+from .providers import Completion, get_provider
+from .quality import evaluate, features_for
+
+
+class AIUnavailable(Exception):
+    """No completion within the budget (no client, no free slot, or timeout)."""
+
+    outcome = "error"
+
+    def __init__(self, message, outcome=None):
+        super().__init__(message)
+        if outcome:
+            self.outcome = outcome
+
+
+class AIBudgetExceeded(AIUnavailable):
+    """The decision's team has used up its daily token budget."""
+
+    outcome = "over_budget"
+
+
+# condense rounds before the merge; the result is truncated to the budget anyway
+MAX_REDUCE_ROUNDS = 2
+
+_map_pool = None
+
+
+def _map_in_pool(fn, items):
+    """``fn`` over ``items`` on the shared condense pool, in order."""
+    global _map_pool
+    if _map_pool is None:
+        _map_pool = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'AI_PROMPT_MAP_WORKERS', 4), thread_name_prefix="ai-condense"
+        )
+
+    def run(item):
+        try:
+            return fn(item)
+        finally:
+            connection.close()
+
+    return list(_map_pool.map(run, items))
+
+
+def _outcome(error):
+    """Ledger outcome for a failed call."""
+    if isinstance(error, AIUnavailable):
+        return error.outcome
+    return "timeout" if "Timeout" in type(error).__name__ else "error"
+
 
 class AIService:
     def __init__(self):
-        self._client = None
+        self._provider = None
         # Model is intentionally configurable to avoid hard-coding.
         # Set OPENAI_MODEL in your environment (e.g., .env) to override.
         self.model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
-    
+        # One semaphore per event loop (asyncio primitives are loop-bound).
+        self._semaphores = weakref.WeakKeyDictionary()
+        self.cache = CompletionCache()
+        # Shared by sync and async calls: a provider outage trips both.
+        self.breaker = CircuitBreaker(
+            failure_threshold=getattr(settings, 'AI_BREAKER_FAILURES', 5),
+            failure_rate=getattr(settings, 'AI_BREAKER_FAILURE_RATE', 0.5),
+            window=getattr(settings, 'AI_BREAKER_WINDOW', 60),
+            reset_timeout=getattr(settings, 'AI_BREAKER_RESET_TIMEOUT', 30),
+            slow_call_threshold=getattr(settings, 'AI_BREAKER_SLOW_CALL', 10),
+        )
+
+    @property
+    def provider(self):
+        """Lazy load the configured provider (``AI_PROVIDER``)"""
+        if self._provider is None:
+            self._provider = get_provider()
+        return self._provider
+
+    @provider.setter
+    def provider(self, provider):
+        self._provider = provider
+
     @property
     def client(self):
-        """Lazy load OpenAI client"""
-        if self._client is None:
+        """The provider if it can take sync calls, else None"""
+        return self.provider if self.provider.available else None
+
+    @property
+    def async_client(self):
+        """The provider if it can take async calls, else None"""
+        return self.provider if self.provider.async_available else None
+
+    # --- Budget ---
+
+    @property
+    def timeout(self):
+        """Seconds a single completion may take."""
+        return getattr(settings, 'AI_TIMEOUT', 20)
+
+    @property
+    def description_budget(self):
+        """Tokens of the description in prompts that do not use prompt_context."""
+        return getattr(settings, 'AI_PROMPT_TOKEN_BUDGET', 3000)
+
+    def deadline(self, method):
+        """Per-method deadline (``AI_METHOD_TIMEOUTS``), else ``timeout``."""
+        return getattr(settings, 'AI_METHOD_TIMEOUTS', {}).get(method, self.timeout)
+
+    @property
+    def queue_timeout(self):
+        """Seconds to wait for a free slot before falling back."""
+        return getattr(settings, 'AI_QUEUE_TIMEOUT', 0.5)
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(getattr(settings, 'AI_MAX_CONCURRENCY', 8))
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    # --- Completions ---
+
+    def _request(self, messages, temperature, json_mode):
+        kwargs = {"model": self.model, "messages": messages, "temperature": temperature}
+        if json_mode:
+            kwargs["response_format"] = {"type": "json_object"}
+        return kwargs
+
+    def _record(self, method, decision, started, trace, outcome="ok", error=""):
+        """Add the call to the ledger (buffered, see decisions.ai_ledger)."""
+        usage = trace.get("usage")
+        ledger.record(
+            method,
+            self.model,
+            team_id=getattr(decision, "team_id", None),
+            decision_id=getattr(decision, "pk", None),
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            latency=time.monotonic() - started,
+            outcome=outcome,
+            cache_hit=outcome == "ok" and not trace.get("called"),
+            error=error,
+        )
+
+    def _chat(self, messages, temperature=0.7, json_mode=False, *, method, decision=None):
+        """Completion, served from the content-addressed cache when possible.
+
+        Only a cache miss contacts the provider, and only while the
+        decision's team is within its daily token budget (AIBudgetExceeded)
+        and the circuit breaker is closed; the call is bounded by the
+        method's deadline. Timeouts and an open circuit raise AIUnavailable.
+        """
+        request = self._request(messages, temperature, json_mode)
+        trace = {}
+        started = time.monotonic()
+
+        def call():
+            if over_budget(getattr(decision, "team_id", None)):
+                raise AIBudgetExceeded("AI token budget exceeded")
+            if not self.breaker.allow():
+                raise AIUnavailable("AI circuit open", "circuit_open")
+            trace["called"] = True
+            call_started = time.monotonic()
             try:
-                from openai import OpenAI
-                api_key = os.getenv('OPENAI_API_KEY', 'dummy-key')
-                self._client = OpenAI(api_key=api_key)
+                completion = self.provider.complete(request, timeout=self.deadline(method))
             except Exception as e:
-                print(f"OpenAI client initialization failed: {e}")
-                self._client = None
-        return self._client
-    
-    def analyze_decision(self, decision):
-        """Analyze a decision and provide insights"""
-        if not self.client:
-            return {
-                "insights": ["AI service not available - check OpenAI API key"],
-                "risks": [],
-                "recommendations": []
-            }
-        
+                self.breaker.record_failure(time.monotonic() - call_started)
+                if _outcome(e) == "timeout":
+                    raise AIUnavailable("AI request timed out", "timeout") from e
+                raise
+            self.breaker.record_success(time.monotonic() - call_started)
+            trace["usage"] = completion
+            return completion.content
+
+        try:
+            content = self.cache.get_or_call(completion_key(request), call)
+        except Exception as e:
+            self._record(method, decision, started, trace, _outcome(e), str(e))
+            raise
+        self._record(method, decision, started, trace)
+        return content
+
+    async def _achat(self, messages, temperature=0.7, json_mode=False, *, method, decision=None):
+        """Completion under the global concurrency limit and per-call deadline.
+
+        Raises AIUnavailable instead of queueing or waiting past the budget,
+        so callers can answer with their heuristic baseline right away.
+        Cached, coalesced, budgeted and recorded like ``_chat``.
+        """
+        provider = self.async_client
+        if provider is None:
+            raise AIUnavailable("AI service not configured")
+
+        request = self._request(messages, temperature, json_mode)
+        trace = {}
+        started = time.monotonic()
+        team_id = getattr(decision, "team_id", None)
+        try:
+            content = await self.cache.aget_or_call(
+                completion_key(request), lambda: self._acall(provider, request, method, team_id, trace)
+            )
+        except Exception as e:
+            self._record(method, decision, started, trace, _outcome(e), str(e))
+            raise
+        self._record(method, decision, started, trace)
+        return content
+
+    async def _acall(self, provider, request, method, team_id, trace):
+        # the budget lookup may need the database on a cache miss
+        if await sync_to_async(over_budget)(team_id):
+            raise AIBudgetExceeded("AI token budget exceeded")
+        semaphore = self._semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise AIUnavailable("AI service busy", "busy")
+        # after the slot: a half-open probe must not be spent on queueing
+        if not self.breaker.allow():
+            semaphore.release()
+            raise AIUnavailable("AI circuit open", "circuit_open")
+        call_started = time.monotonic()
+        try:
+            trace["called"] = True
+            completion = await asyncio.wait_for(provider.acomplete(request), self.deadline(method))
+        except asyncio.TimeoutError:
+            self.breaker.record_failure(time.monotonic() - call_started)
+            raise AIUnavailable("AI request timed out", "timeout")
+        except Exception:
+            self.breaker.record_failure(time.monotonic() - call_started)
+            raise
+        finally:
+            semaphore.release()
+        self.breaker.record_success(time.monotonic() - call_started)
+        trace["usage"] = completion
+        return completion.content
+
+    # --- Prompt context ---
+
+    def _condense_messages(self, decision, text, part, parts, max_tokens):
+        return [
+            {"role": "system", "content": (
+                "You condense material about a business decision. Keep facts, numbers, names, "
+                "options, risks and open questions; drop repetition and pleasantries."
+            )},
+            {"role": "user", "content": (
+                f"Decision: {decision.title}\n"
+                f"Part {part} of {parts}. Condense it to at most {max_tokens * 3 // 4} words.\n\n{text}"
+            )},
+        ]
+
+    def _reduce_messages(self, decision, notes, max_tokens):
+        return [
+            {"role": "system", "content": "You merge notes about a business decision into one brief without losing facts."},
+            {"role": "user", "content": (
+                f"Decision: {decision.title}\n"
+                f"Merge these notes into one structured brief (description, options, open points, "
+                f"discussion) of at most {max_tokens * 3 // 4} words.\n\n{notes}"
+            )},
+        ]
+
+    def _map_targets(self, builder, chunks):
+        # partial notes together should leave room for the reduce step
+        return max(100, min(builder.chunk_tokens, builder.budget // len(chunks)))
+
+    def _condense(self, decision, builder, chunks):
+        """Map: condense ``chunks`` in parallel; a failed chunk is truncated instead."""
+        target = self._map_targets(builder, chunks)
+
+        def one(item):
+            i, chunk = item
+            try:
+                messages = self._condense_messages(decision, chunk, i + 1, len(chunks), target)
+                return fit(self._chat(messages, temperature=0.2, method="condense", decision=decision).strip(), target)
+            except Exception:
+                return fit(chunk, target)
+
+        return _map_in_pool(one, list(enumerate(chunks)))
+
+    async def _acondense(self, decision, builder, chunks):
+        target = self._map_targets(builder, chunks)
+
+        async def one(i, chunk):
+            try:
+                messages = self._condense_messages(decision, chunk, i + 1, len(chunks), target)
+                return fit((await self._achat(messages, temperature=0.2, method="condense", decision=decision)).strip(), target)
+            except Exception:
+                return fit(chunk, target)
+
+        return await asyncio.gather(*(one(i, chunk) for i, chunk in enumerate(chunks)))
+
+    def prompt_context(self, decision):
+        """Decision material (description, options, template values, recent
+        comments) within ``AI_PROMPT_TOKEN_BUDGET`` tokens.
+
+        Material that does not fit is condensed map-reduce style: chunks in
+        parallel, then one merge; partial notes that are themselves too long
+        for the merge are condensed again first.
+        """
+        builder = PromptBuilder()
+        packed = builder.pack(load_sections(decision))
+        if not packed.chunks:
+            return packed.text
+        notes = self._condense(decision, builder, packed.chunks)
+        for _ in range(MAX_REDUCE_ROUNDS):
+            joined = "\n\n".join(notes)
+            if estimate_tokens(joined) <= builder.chunk_tokens:
+                break
+            notes = self._condense(decision, builder, split_chunks(joined, builder.chunk_tokens))
+        notes = "\n\n".join(notes)
+        try:
+            messages = self._reduce_messages(decision, builder.fit(notes), builder.budget)
+            notes = self._chat(messages, temperature=0.2, method="condense", decision=decision).strip()
+        except Exception:
+            pass
+        return builder.fit(notes)
+
+    async def aprompt_context(self, decision):
+        """Async prompt_context (loads the material on a worker thread)."""
+        builder = PromptBuilder()
+        packed = builder.pack(await sync_to_async(load_sections)(decision))
+        if not packed.chunks:
+            return packed.text
+        notes = await self._acondense(decision, builder, packed.chunks)
+        for _ in range(MAX_REDUCE_ROUNDS):
+            joined = "\n\n".join(notes)
+            if estimate_tokens(joined) <= builder.chunk_tokens:
+                break
+            notes = await self._acondense(decision, builder, split_chunks(joined, builder.chunk_tokens))
+        notes = "\n\n".join(notes)
+        try:
+            messages = self._reduce_messages(decision, builder.fit(notes), builder.budget)
+            notes = (await self._achat(messages, temperature=0.2, method="condense", decision=decision)).strip()
+        except Exception:
+            pass
+        return builder.fit(notes)
+
+    # --- Analysis ---
+
+    def _analysis_messages(self, decision, context):
         prompt = f"""
 You are an expert business consultant helping to analyze decisions.
 
 Decision Title: {decision.title}
-Description: {decision.description}
 Priority: {decision.get_priority_display()}
 
+{context}
+
 Provide a structured analysis with:
 1. Key Insights (3-5 bullet points)
 2. Potential Risks (3 risks with severity: low/medium/high)
@@ -44,21 +373,25 @@ Provide a structured analysis with:
 
 Return ONLY valid JSON.
 """
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful business analyst."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                response_format={"type": "json_object"}
-            )
-            
-            result = json.loads(response.choices[0].message.content)
-            return result
-            
+        return [
+            {"role": "system", "content": "You are a helpful business analyst."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def analyze_decision(self, decision):
+        """Analyze a decision and provide insights"""
+        if not self.client:
+            return {
+                "insights": ["AI service not available - check OpenAI API key"],
+                "risks": [],
+                "recommendations": []
+            }
+
+        try:
+            messages = self._analysis_messages(decision, self.prompt_context(decision))
+            return json.loads(self._chat(messages, temperature=0.7, json_mode=True, method="analysis", decision=decision))
+        except AIUnavailable:
+            return self.heuristic_analysis(decision, self.count_options(decision))
         except Exception as e:
             print(f"AI Analysis Error: {e}")
             return {
@@ -66,137 +399,265 @@ Return ONLY valid JSON.
                 "risks": [],
                 "recommendations": []
             }
-    
+
+    def heuristic_analysis(self, decision, options_count):
+        """Offline analysis derived from the quality baseline."""
+        baseline = self.heuristic_quality(decision, options_count)
+        return {
+            "insights": [m["item"] for m in baseline["missing_information"]] or ["No obvious gaps found"],
+            "risks": baseline["risks"],
+            "recommendations": baseline["suggested_improvements"],
+        }
+
+    async def aanalyze_decision(self, decision, options_count=0):
+        """Async analyze_decision; falls back to heuristic_analysis."""
+        try:
+            messages = self._analysis_messages(decision, await self.aprompt_context(decision))
+            return json.loads(await self._achat(messages, temperature=0.7, json_mode=True, method="analysis", decision=decision))
+        except Exception as e:
+            print(f"AI Analysis Error: {e}")
+            return self.heuristic_analysis(decision, options_count)
+
+    # --- Alternatives / pros & cons ---
+
+    def _alternatives_messages(self, decision, context, count, existing):
+        return [
+            {"role": "system", "content": "You are a creative problem solver. Return ONLY valid JSON."},
+            {"role": "user", "content": (
+                f"Decision: {decision.title}\n\n{context}\n\n"
+                f"Existing options (do not repeat them): {', '.join(existing) or 'none'}\n"
+                f"Propose {count} further alternatives. For each give a short description, 2-4 pros, "
+                "2-4 cons, an estimated cost (a number, or null if unknown) and an estimated time "
+                "(e.g. '3 months').\n"
+                f"Return {ALTERNATIVES_SCHEMA}."
+            )}
+        ]
+
+    def _pros_cons_messages(self, decision, options):
+        listing = "\n".join(f"- id {o.pk}: {o.title}: {fit(o.description or '', 150)}" for o in options)
+        return [
+            {"role": "system", "content": "You are a pragmatic business analyst. Return ONLY valid JSON."},
+            {"role": "user", "content": (
+                f"Decision: {decision.title}\n"
+                f"Description: {fit(decision.description or '', self.description_budget // 2)}\n\n"
+                f"Options:\n{fit(listing, self.description_budget // 2)}\n\n"
+                "For every option list 2-4 pros and 2-4 cons in the context of this decision.\n"
+                f"Return {PROS_CONS_SCHEMA} with one entry per option id."
+            )}
+        ]
+
     def generate_alternatives(self, decision, count=3):
-        """Generate alternative options"""
+        """Generate ``count`` alternatives in one completion.
+
+        Returns validated dicts (title, description, pros, cons,
+        estimated_cost, estimated_time), see decisions.alternatives; empty
+        when the AI is unavailable.
+        """
         if not self.client:
             return []
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a creative problem solver."},
-                    {"role": "user", "content": f"Generate {count} alternatives for: {decision.title}"}
-                ],
-                temperature=0.8
-            )
+
+        count = max(1, min(count, MAX_ALTERNATIVES))
+        try:
+            existing = list(decision.options.values_list("title", flat=True))
+            messages = self._alternatives_messages(decision, self.prompt_context(decision), count, existing)
+            content = self._chat(messages, temperature=0.8, json_mode=True, method="alternatives", decision=decision)
+            return validate_alternatives(json.loads(content), count, existing)
+        except Exception as e:
+            print(f"AI Alternatives Error: {e}")
             return []
-        except:
+
+    async def agenerate_alternatives(self, decision, count=3):
+        """Async generate_alternatives (empty on fallback)."""
+        count = max(1, min(count, MAX_ALTERNATIVES))
+        try:
+            existing = await sync_to_async(lambda: list(decision.options.values_list("title", flat=True)))()
+            messages = self._alternatives_messages(decision, await self.aprompt_context(decision), count, existing)
+            content = await self._achat(messages, temperature=0.8, json_mode=True, method="alternatives", decision=decision)
+            return validate_alternatives(json.loads(content), count, existing)
+        except Exception as e:
+            print(f"AI Alternatives Error: {e}")
             return []
-    
+
+    def generate_pros_cons(self, decision, options):
+        """Pros/cons of all ``options`` in one completion: ``{option_id: {"pros", "cons"}}``."""
+        if not self.client or not options:
+            return {}
+        try:
+            content = self._chat(
+                self._pros_cons_messages(decision, options), temperature=0.4, json_mode=True, method="pros_cons", decision=decision
+            )
+            return validate_pros_cons(json.loads(content), [o.pk for o in options])
+        except Exception as e:
+            print(f"AI Pros/Cons Error: {e}")
+            return {}
+
+    async def agenerate_pros_cons(self, decision, options):
+        """Async generate_pros_cons (empty on fallback)."""
+        if not options:
+            return {}
+        try:
+            content = await self._achat(
+                self._pros_cons_messages(decision, options), temperature=0.4, json_mode=True, method="pros_cons", decision=decision
+            )
+            return validate_pros_cons(json.loads(content), [o.pk for o in options])
+        except Exception as e:
+            print(f"AI Pros/Cons Error: {e}")
+            return {}
+
+    # --- Summary ---
+
+    def _summary_messages(self, decision, context):
+        return [
+            {"role": "system", "content": "You are a professional writer."},
+            {"role": "user", "content": f"Summarize: {decision.title}\n\n{context}"}
+        ]
+
     def generate_summary(self, decision):
         """Generate executive summary"""
         if not self.client:
             return "AI summary not available - configure OpenAI API key"
-        
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a professional writer."},
-                    {"role": "user", "content": f"Summarize: {decision.title} - {decision.description}"}
-                ],
-                temperature=0.7
-            )
-            return response.choices[0].message.content.strip()
+
+        try:
+            messages = self._summary_messages(decision, self.prompt_context(decision))
+            return self._chat(messages, temperature=0.7, method="summary", decision=decision).strip()
+        except AIUnavailable:
+            return self.heuristic_summary(decision)
         except Exception as e:
             return f"Summary generation failed: {str(e)}"
 
-    def quality_check(self, decision):
-        """Decision Quality Check.
+    def heuristic_summary(self, decision):
+        """First ~400 characters of the description."""
+        text = (decision.description or "").strip()
+        if not text:
+            return "No description available to summarize."
+        summary = text.replace("\n", " ").strip()
+        if len(summary) > 400:
+            summary = summary[:400].rsplit(" ", 1)[0] + "..."
+        return summary
 
-        Returns a structured JSON-like dict:
-        {
-          "score": 0-100,
-          "missing_information": [{"item": str, "why": str}],
-          "questions": [str],
-          "risks": [str],
-          "suggested_improvements": [str]
-        }
+    async def agenerate_summary(self, decision):
+        """Async generate_summary; falls back to heuristic_summary."""
+        try:
+            messages = self._summary_messages(decision, await self.aprompt_context(decision))
+            return (await self._achat(messages, temperature=0.7, method="summary", decision=decision)).strip()
+        except Exception as e:
+            print(f"AI Summary Error: {e}")
+            return self.heuristic_summary(decision)
 
-        Works even without OpenAI: falls back to deterministic heuristics.
+    async def astream_summary(self, decision):
+        """Stream the executive summary as ``(source, text)`` chunks.
+
+        ``source`` is ``"cache"`` (one chunk), ``"ai"`` (tokens as the
+        provider sends them) or ``"heuristic"`` (one chunk). If the stream
+        breaks off, the heuristic follows; consumers restart their text when
+        the source changes. The finished AI text is stored under the same
+        cache key as ``generate_summary``, so either serves the other.
+        """
+        try:
+            context = await self.aprompt_context(decision)
+        except Exception as e:
+            print(f"AI Summary Error: {e}")
+            yield "heuristic", self.heuristic_summary(decision)
+            return
+
+        request = self._request(self._summary_messages(decision, context), 0.7, False)
+        key = completion_key(request)
+        trace = {}
+        started = time.monotonic()
+
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            self._record("summary", decision, started, trace)
+            yield "cache", cached.strip()
+            return
+
+        parts = []
+        try:
+            async for text in self._astream(request, "summary", decision, trace):
+                parts.append(text)
+                yield "ai", text
+        except Exception as e:
+            print(f"AI Summary Error: {e}")
+            self._record("summary", decision, started, trace, _outcome(e), str(e))
+            yield "heuristic", self.heuristic_summary(decision)
+            return
+
+        summary = "".join(parts)
+        # streamed completions report no usage: estimate it
+        trace["usage"] = Completion(
+            summary,
+            sum(estimate_tokens(m["content"]) for m in request["messages"]),
+            estimate_tokens(summary),
+        )
+        self._record("summary", decision, started, trace)
+        await self.cache.aset(key, summary)
+
+    async def _astream(self, request, method, decision, trace):
+        """Provider stream under the same guards as ``_acall``.
+
+        The deadline bounds the wait for each chunk, so a stalled stream
+        fails as fast as a stalled completion.
         """
+        provider = self.async_client
+        if provider is None:
+            raise AIUnavailable("AI service not configured")
+        if await sync_to_async(over_budget)(getattr(decision, "team_id", None)):
+            raise AIBudgetExceeded("AI token budget exceeded")
+        semaphore = self._semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise AIUnavailable("AI service busy", "busy")
+        if not self.breaker.allow():
+            semaphore.release()
+            raise AIUnavailable("AI circuit open", "circuit_open")
+
+        deadline = self.deadline(method)
+        call_started = time.monotonic()
+        chunks = provider.astream(request)
+        try:
+            trace["called"] = True
+            first = True
+            while True:
+                try:
+                    text = await asyncio.wait_for(chunks.__anext__(), deadline)
+                except StopAsyncIteration:
+                    break
+                if first:
+                    # time to first token is what the breaker judges
+                    self.breaker.record_success(time.monotonic() - call_started)
+                    first = False
+                if text:
+                    yield text
+            if first:
+                self.breaker.record_success(time.monotonic() - call_started)
+        except asyncio.TimeoutError:
+            self.breaker.record_failure(time.monotonic() - call_started)
+            raise AIUnavailable("AI request timed out", "timeout")
+        except Exception:
+            self.breaker.record_failure(time.monotonic() - call_started)
+            raise
+        finally:
+            semaphore.release()
+            try:
+                await chunks.aclose()
+            except Exception:
+                pass
 
-        # --- Heuristic baseline (works offline) ---
-        missing = []
-        questions = []
-        risks = []
-        improvements = []
+    # --- Quality check ---
 
-        desc = (decision.description or '').strip()
-        options_count = getattr(decision, 'options', None)
+    @staticmethod
+    def count_options(decision):
         try:
-            options_count = decision.options.count()
+            return decision.options.count()
         except Exception:
-            options_count = 0
-
-        # Basic completeness checks
-        if len(desc) < 80:
-            missing.append({
-                "item": "Insufficient context / detail",
-                "why": "The description is quite short; reviewers may not have enough context to assess impact and trade-offs."
-            })
-            questions.append("What is the concrete problem statement and desired outcome?")
-            improvements.append("Expand the description with context, constraints, and a clear success criterion.")
-
-        if options_count == 0:
-            missing.append({
-                "item": "Alternatives / options",
-                "why": "No options were listed. Decisions are stronger when alternatives and trade-offs are explicit."
-            })
-            questions.append("Which alternatives were considered (at least 2), and why were they rejected?")
-            improvements.append("Add 2–3 alternatives with pros/cons and a short rationale.")
-
-        if not getattr(decision, 'assigned_to', None):
-            missing.append({
-                "item": "Responsible owner",
-                "why": "There is no assignee/owner to drive the decision to completion."
-            })
-            questions.append("Who is responsible for implementing and tracking this decision?")
-            improvements.append("Assign an owner so follow-up tasks and accountability are clear.")
-
-        if not getattr(decision, 'due_date', None):
-            missing.append({
-                "item": "Deadline",
-                "why": "No due date is set. Without a deadline, reviews and implementation often stall."
-            })
-            questions.append("By when does this decision need to be approved/implemented?")
-            improvements.append("Set a realistic due date to prevent the decision from stalling.")
-
-        if not (getattr(decision, 'tags', '') or '').strip():
-            missing.append({
-                "item": "Tags / classification",
-                "why": "Tags help find decisions later (search, reporting, reuse)."
-            })
-            improvements.append("Add 1–3 tags to classify the decision (e.g., 'tech-stack', 'hiring', 'budget').")
-
-        # Risk prompt (basic)
-        if getattr(decision, 'priority', '') in ('high', 'critical'):
-            risks.append("High priority decision: validate risks, costs, and rollback plan before implementation.")
-            questions.append("What are the top 3 risks and a mitigation/rollback plan?")
-
-        # Score: start at 100, subtract for each missing bucket
-        score = 100
-        score -= 15 if len(desc) < 80 else 0
-        score -= 25 if options_count == 0 else 0
-        score -= 10 if not getattr(decision, 'assigned_to', None) else 0
-        score -= 5 if not getattr(decision, 'due_date', None) else 0
-        score -= 5 if not (getattr(decision, 'tags', '') or '').strip() else 0
-        score = max(0, min(100, score))
-
-        baseline = {
-            "score": score,
-            "missing_information": missing,
-            "questions": questions,
-            "risks": risks,
-            "suggested_improvements": improvements,
-        }
+            return 0
 
-        # --- If OpenAI is available, enrich the baseline ---
-        if not self.client:
-            return baseline
+    def heuristic_quality(self, decision, options_count):
+        """Deterministic quality baseline (works offline), see decisions.quality."""
+        return evaluate(features_for(decision, options_count))
 
+    def _quality_messages(self, decision, options_count):
         prompt = {
             "role": "user",
             "content": (
@@ -204,39 +665,83 @@ Return ONLY valid JSON.
                 "Return ONLY valid JSON with keys: score (0-100), missing_information (list of {item, why}), "
                 "questions (list), risks (list), suggested_improvements (list).\n\n"
                 f"Decision Title: {decision.title}\n"
-                f"Description: {decision.description}\n"
+                f"Description: {fit(decision.description or '', self.description_budget)}\n"
                 f"Priority: {getattr(decision, 'priority', '')}\n"
                 f"Status: {getattr(decision, 'status', '')}\n"
-                f"Has owner: {'yes' if getattr(decision, 'assigned_to', None) else 'no'}\n"
+                f"Has owner: {'yes' if getattr(decision, 'assigned_to_id', None) else 'no'}\n"
                 f"Due date: {getattr(decision, 'due_date', None) or 'none'}\n"
-                f"Tags: {(getattr(decision, 'tags', '') or '').strip() or 'none'}\n"
+                f"Tags: {', '.join(decision.tag_names) or 'none'}\n"
                 f"Options count: {options_count}\n\n"
                 "Be concrete and actionable. If information is missing, ask targeted questions."
             ),
         }
+        return [
+            {"role": "system", "content": "You are a strict JSON-only assistant."},
+            prompt,
+        ]
+
+    @staticmethod
+    def _merge_quality(baseline, enriched):
+        # Merge: keep baseline as fallback, but prefer LLM items when present
+        out = dict(baseline)
+        for k in ("missing_information", "questions", "risks", "suggested_improvements"):
+            if isinstance(enriched.get(k), list) and enriched.get(k):
+                out[k] = enriched[k]
+        if isinstance(enriched.get("score"), (int, float)):
+            out["score"] = max(0, min(100, int(enriched["score"])))
+        return out
+
+    def quality_input_hash(self, decision, options_count):
+        """Identifies everything a quality check depends on (incl. model)."""
+        request = self._request(self._quality_messages(decision, options_count), 0.2, True)
+        return completion_key(request).rsplit(":", 1)[-1]
+
+    def enrich_quality(self, baseline, decision, options_count):
+        """LLM-enriched quality check; raises on any AI failure."""
+        enriched = json.loads(self._chat(
+            self._quality_messages(decision, options_count), temperature=0.2, json_mode=True, method="quality", decision=decision
+        ))
+        return self._merge_quality(baseline, enriched)
+
+    def quality_check(self, decision, options_count=None):
+        """Decision Quality Check.
+
+        Returns a structured JSON-like dict:
+        {
+          "score": 0-100,
+          "missing_information": [{"item": str, "why": str}],
+          "questions": [str],
+          "risks": [str],
+          "suggested_improvements": [str]
+        }
+
+        Works even without OpenAI: falls back to deterministic heuristics.
+        """
+        if options_count is None:
+            options_count = self.count_options(decision)
+        baseline = self.heuristic_quality(decision, options_count)
+
+        # --- If OpenAI is available, enrich the baseline ---
+        if not self.client:
+            return baseline
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a strict JSON-only assistant."},
-                    prompt,
-                ],
-                temperature=0.2,
-                response_format={"type": "json_object"},
-            )
-            enriched = json.loads(response.choices[0].message.content)
-
-            # Merge: keep baseline as fallback, but prefer LLM items when present
-            out = dict(baseline)
-            for k in ("missing_information", "questions", "risks", "suggested_improvements"):
-                if isinstance(enriched.get(k), list) and enriched.get(k):
-                    out[k] = enriched[k]
-            if isinstance(enriched.get("score"), (int, float)):
-                out["score"] = max(0, min(100, int(enriched["score"])))
-            return out
+            return self.enrich_quality(baseline, decision, options_count)
+        except Exception as e:
+            print(f"AI Quality Check Error: {e}")
+            return baseline
+
+    async def aquality_check(self, decision, options_count):
+        """Async quality_check. ``options_count`` is passed in because it
+        needs the database, which async code must not touch directly."""
+        baseline = self.heuristic_quality(decision, options_count)
+        try:
+            enriched = json.loads(await self._achat(
+                self._quality_messages(decision, options_count), temperature=0.2, json_mode=True, method="quality", decision=decision
+            ))
+            return self._merge_quality(baseline, enriched)
         except Exception as e:
             print(f"AI Quality Check Error: {e}")
             return baseline
 
-ai_service = AIService()
\ No newline at end of file
+ai_service = AIService()
@@ -0,0 +1,175 @@
+"""AI-generated options: schema validation and batched persistence.
+
+``AIService`` asks for all alternatives (or the pros/cons of all options) of
+a decision in one structured completion. The JSON it returns is validated
+here item by item: invalid items are dropped, fields are coerced to what
+``DecisionOption`` can store. Valid results are written with one
+``bulk_create`` / ``bulk_update``.
+"""
+from __future__ import annotations
+
+from decimal import Decimal, InvalidOperation
+from typing import Any, Iterable, Optional
+
+from django.db import transaction
+
+from . import quality, search, similarity
+from .models import Decision, DecisionOption
+
+MAX_ALTERNATIVES = 10
+MAX_POINTS = 8
+MAX_POINT_LENGTH = 300
+MAX_COST = Decimal("9999999999.99")  # DecisionOption.estimated_cost: 12 digits, 2 decimals
+
+ALTERNATIVES_SCHEMA = (
+    '{"alternatives": [{"title": str, "description": str, "pros": [str], "cons": [str], '
+    '"estimated_cost": number|null, "estimated_time": str}]}'
+)
+PROS_CONS_SCHEMA = '{"options": [{"id": int, "pros": [str], "cons": [str]}]}'
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def _text(value: Any, field: str, max_length: Optional[int] = None, required: bool = False) -> str:
+    if value is None:
+        value = ""
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+        raise SchemaError(f"{field}: expected a string")
+    value = str(value).strip()
+    if required and not value:
+        raise SchemaError(f"{field}: required")
+    return value[:max_length] if max_length else value
+
+
+def _points(value: Any, field: str) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [line.lstrip("-• ").strip() for line in value.splitlines()]
+    if not isinstance(value, list):
+        raise SchemaError(f"{field}: expected a list of strings")
+    points = [_text(v, field, MAX_POINT_LENGTH) for v in value if isinstance(v, (str, int, float))]
+    return [p for p in points if p][:MAX_POINTS]
+
+
+def _cost(value: Any) -> Optional[Decimal]:
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.replace(",", "").replace("€", "").replace("$", "").strip()
+    try:
+        cost = Decimal(str(value)).quantize(Decimal("0.01"))
+    except (InvalidOperation, ValueError):
+        return None
+    return cost if 0 <= cost <= MAX_COST else None
+
+
+def validate_alternative(item: Any) -> dict:
+    if not isinstance(item, dict):
+        raise SchemaError("alternative: expected an object")
+    return {
+        "title": _text(item.get("title"), "title", DecisionOption._meta.get_field("title").max_length, required=True),
+        "description": _text(item.get("description"), "description"),
+        "pros": _points(item.get("pros"), "pros"),
+        "cons": _points(item.get("cons"), "cons"),
+        "estimated_cost": _cost(item.get("estimated_cost")),
+        "estimated_time": _text(item.get("estimated_time"), "estimated_time", DecisionOption._meta.get_field("estimated_time").max_length),
+    }
+
+
+def validate_alternatives(payload: Any, count: int, existing_titles: Iterable[str] = ()) -> list[dict]:
+    """Valid, de-duplicated alternatives from a completion (at most ``count``)."""
+    if not isinstance(payload, dict) or not isinstance(payload.get("alternatives"), list):
+        raise SchemaError('expected {"alternatives": [...]}')
+    seen = {t.strip().lower() for t in existing_titles}
+    valid = []
+    for item in payload["alternatives"]:
+        try:
+            alternative = validate_alternative(item)
+        except SchemaError:
+            continue
+        key = alternative["title"].lower()
+        if key not in seen:
+            seen.add(key)
+            valid.append(alternative)
+    return valid[:count]
+
+
+def validate_pros_cons(payload: Any, option_ids: Iterable[int]) -> dict[int, dict]:
+    """``{option_id: {"pros": [...], "cons": [...]}}`` for the requested options only."""
+    if not isinstance(payload, dict) or not isinstance(payload.get("options"), list):
+        raise SchemaError('expected {"options": [...]}')
+    wanted = set(option_ids)
+    results = {}
+    for item in payload["options"]:
+        if not isinstance(item, dict):
+            continue
+        try:
+            option_id = int(item.get("id"))
+            pros, cons = _points(item.get("pros"), "pros"), _points(item.get("cons"), "cons")
+        except (SchemaError, TypeError, ValueError):
+            continue
+        if option_id in wanted and (pros or cons):
+            results[option_id] = {"pros": pros, "cons": cons}
+    return results
+
+
+# =========================
+# Persistence
+# =========================
+
+def _join(points: list[str]) -> str:
+    return "\n".join(points)
+
+
+def create_alternatives(decision: Decision, alternatives: list[dict]) -> list[DecisionOption]:
+    """Save validated alternatives as options in one INSERT."""
+    options = [
+        DecisionOption(
+            decision=decision,
+            title=a["title"],
+            description=a["description"],
+            pros=_join(a["pros"]),
+            cons=_join(a["cons"]),
+            estimated_cost=a["estimated_cost"],
+            estimated_time=a["estimated_time"],
+        )
+        for a in alternatives
+    ]
+    if not options:
+        return []
+    with transaction.atomic():
+        created = DecisionOption.objects.bulk_create(options)
+        # bulk_create sends no post_save, so refresh the option-count-based score here
+        quality.recompute_scores(Decision.objects.filter(pk=decision.pk))
+        search.index_on_commit(decision.pk)
+        similarity.embed_on_commit(decision.pk)
+    return created
+
+
+def fill_pros_cons(options: list[DecisionOption], results: dict[int, dict]) -> list[DecisionOption]:
+    """Store generated pros/cons on ``options`` in one UPDATE batch."""
+    changed = []
+    for option in options:
+        result = results.get(option.pk)
+        if result:
+            option.pros, option.cons = _join(result["pros"]), _join(result["cons"])
+            changed.append(option)
+    if changed:
+        DecisionOption.objects.bulk_update(changed, ["pros", "cons"])
+        search.index_on_commit(changed[0].decision_id)
+    return changed
+
+
+def option_payload(option: DecisionOption) -> dict:
+    return {
+        "id": option.pk,
+        "title": option.title,
+        "description": option.description,
+        "pros": [p for p in option.pros.splitlines() if p.strip()],
+        "cons": [c for c in option.cons.splitlines() if c.strip()],
+        "estimated_cost": str(option.estimated_cost) if option.estimated_cost is not None else None,
+        "estimated_time": option.estimated_time,
+    }
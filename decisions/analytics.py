@@ -1,24 +1,54 @@
-from django.db import models
-from django.db.models import Count, Q, Avg
-from django.utils import timezone
-from datetime import timedelta
-from .models import Decision, DecisionAudit, Team, DecisionReview
+from django.core.cache import cache
+from django.db.models import Q, Sum
+from .caching import cached, get_versions
+from .cycle_time import CycleTimeStats, compute_cycle_time_stats, merge_stats
+from .models import Decision, DecisionReview, DecisionDailyRollup
+from .permissions import visible_team_ids
+from .topics import topic_stats
+
+# Results are cached under the versions of the teams/users they depend on;
+# decisions.signals bumps those versions on every relevant write.
+CACHE_TIMEOUT = 60 * 15
+CYCLE_CACHE_KEY = 'analytics:cycle:team:{}:v{}'
+
+
+def _team_ids(teams):
+    if hasattr(teams, 'values_list'):
+        return list(teams.values_list('pk', flat=True))
+    return [getattr(t, 'pk', t) for t in teams]
+
 
 class AnalyticsService:
     
     def get_dashboard_metrics(self, teams):
-        """Aggregate metrics for a set of teams."""
-        decisions = Decision.objects.filter(team__in=teams)
-        total = decisions.count()
-        by_status = dict(decisions.values('status').annotate(c=Count('id')).values_list('status','c'))
-        by_priority = dict(decisions.values('priority').annotate(c=Count('id')).values_list('priority','c'))
+        """Aggregate metrics for a set of teams (read from the daily rollups)."""
+        team_ids = sorted(_team_ids(teams))
+        return cached(
+            'analytics:dashboard', [('team', t) for t in team_ids],
+            lambda: self._aggregate(DecisionDailyRollup.objects.filter(team_id__in=team_ids)),
+            team_ids, timeout=CACHE_TIMEOUT,
+        )
+
+    def get_user_dashboard_metrics(self, user):
+        """Aggregate metrics over every team the user may see."""
+        return self.get_dashboard_metrics(visible_team_ids(user))
+
+    def _aggregate(self, rollups):
+        rows = rollups.values('status', 'priority').annotate(
+            n=Sum('count'), decided=Sum('decided_count'), cycle=Sum('cycle_seconds'),
+        )
+        total = decided = cycle_seconds = 0
+        by_status, by_priority = {}, {}
+        for row in rows:
+            if not row['n']:
+                continue
+            total += row['n']
+            decided += row['decided']
+            cycle_seconds += row['cycle']
+            by_status[row['status']] = by_status.get(row['status'], 0) + row['n']
+            by_priority[row['priority']] = by_priority.get(row['priority'], 0) + row['n']
         # Average cycle time (created -> decided) in days for decided decisions
-        decided = decisions.filter(decided_at__isnull=False)
-        avg_days = None
-        if decided.exists():
-            avg = decided.annotate(days=models.ExpressionWrapper((models.F('decided_at') - models.F('created_at')), output_field=models.DurationField())).aggregate(avg=Avg('days'))['avg']
-            if avg is not None:
-                avg_days = avg.total_seconds() / 86400.0
+        avg_days = cycle_seconds / decided / 86400.0 if decided else None
         return {
             'total': total,
             'by_status': by_status,
@@ -26,24 +56,60 @@ class AnalyticsService:
             'avg_cycle_days': avg_days,
         }
 
-
-    
     def get_team_kpis(self, team):
         """Get team KPIs"""
-        decisions = Decision.objects.filter(team=team)
-        
-        total = decisions.count()
-        completed = decisions.filter(decided_at__isnull=False).count()
-        pending = decisions.filter(status='draft').count()
-        
+        team_id = getattr(team, 'pk', team)
+        return cached('analytics:kpis', [('team', team_id)], lambda: self._team_kpis(team_id), timeout=CACHE_TIMEOUT)
+
+    def _team_kpis(self, team_id):
+        totals = DecisionDailyRollup.objects.filter(team_id=team_id).aggregate(
+            total=Sum('count'),
+            completed=Sum('decided_count'),
+            pending=Sum('count', filter=Q(status='draft')),
+        )
         return {
-            'total_decisions': total,
-            'completed': completed,
-            'pending': pending,
+            'total_decisions': totals['total'] or 0,
+            'completed': totals['completed'] or 0,
+            'pending': totals['pending'] or 0,
         }
     
+    def get_cycle_time_stats(self, teams):
+        """p50/p90/p99 cycle time (per priority) and status dwell, in days.
+
+        Per-team sketches are cached and merged, so only teams without a
+        cached entry are streamed from the database.
+        """
+        team_ids = _team_ids(teams)
+        versions = get_versions(('team', team_id) for team_id in team_ids)
+        keys = {team_id: CYCLE_CACHE_KEY.format(team_id, versions[('team', team_id)]) for team_id in team_ids}
+        try:
+            hits = cache.get_many(list(keys.values()))
+        except Exception:
+            hits = {}
+
+        parts = [CycleTimeStats.from_dict(hits[key]) for key in keys.values() if key in hits]
+        missing = [team_id for team_id, key in keys.items() if key not in hits]
+        if missing:
+            fresh = compute_cycle_time_stats(missing)
+            parts.extend(fresh.values())
+            try:
+                cache.set_many({keys[team_id]: stats.to_dict() for team_id, stats in fresh.items()}, CACHE_TIMEOUT)
+            except Exception:
+                pass
+        return merge_stats(parts).summary()
+
+    def get_user_cycle_time_stats(self, user):
+        return self.get_cycle_time_stats(visible_team_ids(user))
+
+    def get_user_topic_stats(self, user, limit=10):
+        """Largest topics of the user's teams (precomputed by decisions.topics)."""
+        return topic_stats(visible_team_ids(user), limit)
+
     def get_user_stats(self, user):
         """Get user statistics"""
+        return cached('analytics:user', [('user', user.pk)], lambda: self._user_stats(user), timeout=CACHE_TIMEOUT)
+
+    def _user_stats(self, user):
         decisions_created = Decision.objects.filter(created_by=user).count()
         
         reviews_done = DecisionReview.objects.filter(
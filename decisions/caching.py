@@ -0,0 +1,166 @@
+"""Versioned, stampede-safe caching on the default cache backend.
+
+Cached values are keyed by the *versions* of the scopes they depend on
+(a team, a user). Invalidating a scope bumps its version, which makes every
+derived key unreachable at once without enumerating or deleting them; the
+orphaned entries simply expire.
+
+Recomputes of a cold key are coalesced: threads in one process wait on a
+local lock, and processes coordinate through an ``add()``-based lock key so
+only one of them runs the computation while the others poll for the result.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+import weakref
+from typing import Any, Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "cachever:{}:{}"
+LOCK_SUFFIX = ":lock"
+DEFAULT_TIMEOUT = 60 * 15
+LOCK_TIMEOUT = 30
+WAIT_TIMEOUT = 10.0
+POLL_INTERVAL = 0.05
+
+# Backends whose entries only the current process sees
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+_MISSING = object()
+_local_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+_local_locks_guard = threading.Lock()
+
+
+def _fresh_version() -> int:
+    # Time-based so a version key that was evicted never comes back with a
+    # number that matches stale entries.
+    return time.time_ns() // 1000
+
+
+def is_shared() -> bool:
+    """Whether the default cache is one store for every worker process.
+
+    Version bumps, locks and counters only coordinate processes through a
+    shared backend; data that must not go stale across workers (such as
+    permissions) should bypass a process-local cache.
+    """
+    return settings.CACHES.get("default", {}).get("BACKEND") not in PROCESS_LOCAL_BACKENDS
+
+
+def get_versions(scopes: Iterable[tuple[str, Any]]) -> dict[tuple[str, Any], int]:
+    scopes = list(scopes)
+    keys = {VERSION_KEY.format(kind, ident): (kind, ident) for kind, ident in scopes}
+    try:
+        found = cache.get_many(list(keys))
+    except Exception:
+        found = {}
+
+    versions = {}
+    for key, scope in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = _fresh_version()
+            try:
+                if not cache.add(key, version, None):
+                    version = cache.get(key) or version
+            except Exception:
+                pass
+        versions[scope] = version
+    return versions
+
+
+def bump(kind: str, ident: Any) -> None:
+    """Invalidate everything cached under scope ``(kind, ident)``."""
+    key = VERSION_KEY.format(kind, ident)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), None)
+    except Exception:
+        pass
+
+
+def bump_on_commit(kind: str, ident: Any) -> None:
+    """Bump once the surrounding transaction commits.
+
+    Bumping earlier would let a concurrent reader recompute from the old,
+    still-visible rows and cache them under the new version.
+    """
+    if ident is None:
+        return
+    transaction.on_commit(lambda: bump(kind, ident))
+
+
+def make_key(name: str, scopes: Iterable[tuple[str, Any]], *parts: Any) -> str:
+    versions = get_versions(scopes)
+    raw = repr((sorted(versions.items(), key=repr), parts))
+    return f"{name}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def _local_lock(key: str) -> threading.Lock:
+    with _local_locks_guard:
+        lock = _local_locks.get(key)
+        if lock is None:
+            lock = threading.Lock()
+            _local_locks[key] = lock
+        return lock
+
+
+def _get(key: str) -> Any:
+    try:
+        return cache.get(key, _MISSING)
+    except Exception:
+        return _MISSING
+
+
+def get_or_compute(key: str, compute: Callable[[], Any], timeout: int = DEFAULT_TIMEOUT) -> Any:
+    """Return the cached value for ``key`` or compute it exactly once."""
+    value = _get(key)
+    if value is not _MISSING:
+        return value
+
+    with _local_lock(key):
+        value = _get(key)
+        if value is not _MISSING:
+            return value
+
+        lock_key = key + LOCK_SUFFIX
+        try:
+            owner = cache.add(lock_key, 1, LOCK_TIMEOUT)
+        except Exception:
+            owner = True
+
+        if not owner:
+            # Another process is computing; wait for its result.
+            deadline = time.monotonic() + WAIT_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                value = _get(key)
+                if value is not _MISSING:
+                    return value
+            return compute()
+
+        try:
+            value = compute()
+            try:
+                cache.set(key, value, timeout)
+            except Exception:
+                pass
+            return value
+        finally:
+            try:
+                cache.delete(lock_key)
+            except Exception:
+                pass
+
+
+def cached(name: str, scopes: Iterable[tuple[str, Any]], compute: Callable[[], Any], *parts: Any, timeout: int = DEFAULT_TIMEOUT) -> Any:
+    return get_or_compute(make_key(name, scopes, *parts), compute, timeout)
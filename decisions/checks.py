@@ -0,0 +1,19 @@
+from django.core.checks import Warning, register
+
+from .caching import is_shared
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    if is_shared():
+        return []
+    return [
+        Warning(
+            'The default cache is process-local.',
+            hint=(
+                'Cache invalidation, stampede locks and unread counters are not shared '
+                'between worker processes; set REDIS_URL when running more than one worker.'
+            ),
+            id='decisions.W001',
+        )
+    ]
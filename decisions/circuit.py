@@ -0,0 +1,126 @@
+"""Circuit breaker for calls to an unreliable dependency (the LLM provider).
+
+The breaker keeps a rolling window of recent calls (outcome and latency).
+A call counts as failed when it raised or took longer than
+``slow_call_threshold``. The breaker
+
+* **opens** once the window holds at least ``failure_threshold`` failures
+  that make up at least ``failure_rate`` of its calls; while open every call
+  is refused immediately, so callers answer with their fallback instead of
+  waiting for a provider that is down;
+* turns **half-open** ``reset_timeout`` seconds later and lets
+  ``half_open_probes`` calls through;
+* **closes** (and forgets the window) when a probe succeeds, or opens again
+  when one fails.
+
+Thread-safe; the lock is only held for bookkeeping, never during a call, so
+one instance can be shared by worker threads and event loops.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        failure_rate: float = 0.5,
+        window: float = 60.0,
+        reset_timeout: float = 30.0,
+        slow_call_threshold: float = 10.0,
+        half_open_probes: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+
+        self._calls: deque[tuple[float, bool, float]] = deque(maxlen=1000)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._state, self._probes = HALF_OPEN, 0
+        return self._state
+
+    def allow(self) -> bool:
+        """May a call go through now? In half-open state this reserves a probe."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            return False
+
+    def record_success(self, latency: float) -> None:
+        self._record(latency <= self.slow_call_threshold, latency)
+
+    def record_failure(self, latency: float) -> None:
+        self._record(False, latency)
+
+    def _record(self, ok: bool, latency: float) -> None:
+        with self._lock:
+            now = self.clock()
+            state = self._current_state()
+            if state == HALF_OPEN:
+                if ok:
+                    self._state = CLOSED
+                    self._calls.clear()
+                else:
+                    self._trip(now)
+                return
+
+            self._calls.append((now, ok, latency))
+            self._prune(now)
+            if state == CLOSED:
+                failures = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+                if failures >= self.failure_threshold and failures >= self.failure_rate * len(self._calls):
+                    self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        self._state, self._opened_at, self._probes = OPEN, now, 0
+
+    def _prune(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window:
+            self._calls.popleft()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state, self._probes = CLOSED, 0
+            self._calls.clear()
+
+    def stats(self) -> dict:
+        """Rolling-window stats, e.g. for a health endpoint."""
+        with self._lock:
+            self._prune(self.clock())
+            latencies = sorted(latency for _, _, latency in self._calls)
+            failures = sum(1 for _, ok, _ in self._calls if not ok)
+            return {
+                "state": self._current_state(),
+                "calls": len(latencies),
+                "failures": failures,
+                "error_rate": round(failures / len(latencies), 4) if latencies else 0.0,
+                "p95_latency": latencies[int(0.95 * (len(latencies) - 1))] if latencies else None,
+            }
@@ -1,10 +1,8 @@
-from django.db.models import Count
-from .models import Notification
+from .notifications import get_unread_count
 
 
 def notifications(request):
-    """Expose unread notification count to templates."""
+    """Expose unread notification count to templates (cached counter, no query on a hit)."""
     if not request.user.is_authenticated:
         return {"unread_notifications_count": 0}
-    count = Notification.objects.filter(user=request.user, is_read=False).count()
-    return {"unread_notifications_count": count}
+    return {"unread_notifications_count": get_unread_count(request.user)}
@@ -0,0 +1,121 @@
+"""Cycle-time percentiles and status dwell times.
+
+Both are computed in one streaming pass each (``iterator()``), feeding
+per-team ``QuantileSketch`` objects, so memory is bounded by the number of
+teams and not by the number of decisions or audit rows.
+
+* Cycle time is ``decided_at - created_at`` of decided decisions, per team
+  and per priority.
+* Dwell time is reconstructed from ``status_changed`` audit rows: the time
+  between two consecutive transitions of a decision (or between creation
+  and its first transition) is attributed to the status it left. The
+  current, still open status of a decision is not counted.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from .models import Decision, DecisionAudit
+from .sketches import QuantileSketch
+
+PERCENTILES = (0.5, 0.9, 0.99)
+SECONDS_PER_DAY = 86400.0
+
+
+class CycleTimeStats:
+    """Mergeable cycle-time and dwell sketches for one team (or several)."""
+
+    def __init__(self):
+        self.cycle = QuantileSketch()
+        self.by_priority: dict[str, QuantileSketch] = defaultdict(QuantileSketch)
+        self.dwell: dict[str, QuantileSketch] = defaultdict(QuantileSketch)
+
+    def add_cycle(self, priority: str, seconds: float) -> None:
+        self.cycle.add(seconds)
+        self.by_priority[priority].add(seconds)
+
+    def add_dwell(self, status: str, seconds: float) -> None:
+        self.dwell[status].add(seconds)
+
+    def merge(self, other: "CycleTimeStats") -> "CycleTimeStats":
+        self.cycle.merge(other.cycle)
+        for priority, sketch in other.by_priority.items():
+            self.by_priority[priority].merge(sketch)
+        for status, sketch in other.dwell.items():
+            self.dwell[status].merge(sketch)
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            "cycle": self.cycle.to_dict(),
+            "by_priority": {k: v.to_dict() for k, v in self.by_priority.items()},
+            "dwell": {k: v.to_dict() for k, v in self.dwell.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CycleTimeStats":
+        stats = cls()
+        stats.cycle = QuantileSketch.from_dict(data["cycle"])
+        for k, v in data["by_priority"].items():
+            stats.by_priority[k] = QuantileSketch.from_dict(v)
+        for k, v in data["dwell"].items():
+            stats.dwell[k] = QuantileSketch.from_dict(v)
+        return stats
+
+    def summary(self, percentiles: Iterable[float] = PERCENTILES) -> dict:
+        """Percentiles in days, e.g. ``{"cycle": {"count": 12, "p50": 3.1, ...}, ...}``."""
+        percentiles = tuple(percentiles)
+        return {
+            "cycle": _describe(self.cycle, percentiles),
+            "by_priority": {k: _describe(v, percentiles) for k, v in sorted(self.by_priority.items())},
+            "dwell": {k: _describe(v, percentiles) for k, v in sorted(self.dwell.items())},
+        }
+
+
+def _describe(sketch: QuantileSketch, percentiles: tuple[float, ...]) -> dict:
+    def days(value: Optional[float]) -> Optional[float]:
+        return None if value is None else value / SECONDS_PER_DAY
+
+    out = {"count": sketch.count, "mean": days(sketch.mean)}
+    for q in percentiles:
+        out[f"p{round(q * 100):d}"] = days(sketch.quantile(q))
+    return out
+
+
+def compute_cycle_time_stats(team_ids: Iterable[int], chunk_size: int = 2000) -> dict[int, CycleTimeStats]:
+    """Stream decisions and audit rows of ``team_ids`` into per-team stats."""
+    team_ids = list(team_ids)
+    stats: dict[int, CycleTimeStats] = {team_id: CycleTimeStats() for team_id in team_ids}
+    if not team_ids:
+        return stats
+
+    decided = (
+        Decision.objects.filter(team_id__in=team_ids, decided_at__isnull=False)
+        .order_by()
+        .values_list("team_id", "priority", "created_at", "decided_at")
+    )
+    for team_id, priority, created_at, decided_at in decided.iterator(chunk_size=chunk_size):
+        stats[team_id].add_cycle(priority, (decided_at - created_at).total_seconds())
+
+    transitions = (
+        DecisionAudit.objects.filter(action="status_changed", decision__team_id__in=team_ids)
+        .order_by("decision_id", "timestamp", "id")
+        .values_list("decision_id", "decision__team_id", "decision__created_at", "timestamp", "changes")
+    )
+    current_id, since = None, None
+    for decision_id, team_id, created_at, timestamp, changes in transitions.iterator(chunk_size=chunk_size):
+        if decision_id != current_id:
+            current_id, since = decision_id, created_at
+        left = changes.get("from") if isinstance(changes, dict) else None
+        if left and timestamp >= since:
+            stats[team_id].add_dwell(left, (timestamp - since).total_seconds())
+        since = max(since, timestamp)
+    return stats
+
+
+def merge_stats(parts: Iterable[CycleTimeStats]) -> CycleTimeStats:
+    merged = CycleTimeStats()
+    for part in parts:
+        merged.merge(part)
+    return merged
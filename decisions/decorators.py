@@ -0,0 +1,42 @@
+"""View decorators for async views.
+
+Django 4.2's ``login_required`` and ``require_POST``/``require_GET`` wrap views in a sync
+function, which would push an async view back onto a worker thread.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseNotAllowed
+
+
+def async_login_required(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        # request.user is lazy and loads the session/user from the DB
+        is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+        if not is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_require_POST(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def async_require_GET(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return HttpResponseNotAllowed(["GET", "HEAD"])
+        return await view(request, *args, **kwargs)
+
+    return wrapper
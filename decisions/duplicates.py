@@ -0,0 +1,183 @@
+"""Near-duplicate detection with MinHash and LSH.
+
+The title and description of a decision are reduced to word shingles
+(three consecutive stemmed terms, see ``decisions.search.terms``) and
+summarised by a ``NUM_PERM``-value MinHash signature: the share of equal
+values between two signatures estimates the Jaccard similarity of their
+shingle sets.
+
+The signature is cut into ``BANDS`` bands of ``ROWS`` values; each band is
+hashed to a bucket and stored in ``DecisionLSHBucket`` under an index on
+(band, bucket). Decisions that share at least one bucket are candidates,
+found with one indexed lookup per band instead of a scan; only candidates
+are compared signature by signature. With 16 bands of 4 rows, pairs with a
+Jaccard similarity around ``(1/16) ** (1/4) = 0.5`` or more almost always
+share a bucket.
+
+Signatures are kept up to date after every save (see decisions.signals);
+``manage.py backfill_minhash`` computes them for existing decisions.
+"""
+from __future__ import annotations
+
+import hashlib
+import zlib
+from functools import reduce
+from operator import or_
+from typing import Iterable, Optional
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Decision, DecisionLSHBucket, DecisionMinHash
+from .permissions import visible_decisions
+from .search import terms
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+DUPLICATE_THRESHOLD = 0.5
+# very generic text can share buckets with many decisions; compare at most this many
+MAX_CANDIDATES = 200
+MAX_RESULTS = 5
+
+_PRIME = (1 << 31) - 1  # Mersenne prime; a * x + b stays within int64
+# fixed seed: stored signatures are only comparable with the same permutations
+_random = np.random.default_rng(20240517)
+_A = _random.integers(1, _PRIME, NUM_PERM, dtype=np.int64)
+_B = _random.integers(0, _PRIME, NUM_PERM, dtype=np.int64)
+
+
+def shingles(text: str) -> set[str]:
+    words = terms(text)
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def signature(title: str, description: str) -> Optional[np.ndarray]:
+    """MinHash signature of the text, or None if it has no terms."""
+    items = shingles(f"{title}\n{description}")
+    if not items:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode()) % _PRIME for s in items), dtype=np.int64, count=len(items))
+    # one row per permutation, minimum over the shingles
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def buckets(sig: np.ndarray) -> list[int]:
+    """Bucket of each band (signed 64-bit, for a BigIntegerField)."""
+    return [
+        int.from_bytes(hashlib.blake2b(band.tobytes(), digest_size=8).digest(), "big", signed=True)
+        for band in sig.reshape(BANDS, ROWS)
+    ]
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(a == b))
+
+
+def _unpack(raw) -> np.ndarray:
+    return np.frombuffer(bytes(raw), dtype=np.int64)
+
+
+# =========================
+# Maintenance
+# =========================
+
+def update_signatures(decision_ids: Iterable[int]) -> int:
+    """Recompute signatures and buckets of ``decision_ids``; unchanged ones are not rewritten."""
+    ids = set(decision_ids)
+    if not ids:
+        return 0
+    stored = {
+        decision_id: bytes(raw)
+        for decision_id, raw in DecisionMinHash.objects.filter(decision_id__in=ids).values_list("decision_id", "signature")
+    }
+    signatures, changed = [], set()
+    for pk, title, description in Decision.objects.filter(pk__in=ids).values_list("pk", "title", "description"):
+        sig = signature(title, description)
+        raw = sig.tobytes() if sig is not None else None
+        if stored.get(pk) != raw:
+            changed.add(pk)
+            if sig is not None:
+                signatures.append((pk, sig, raw))
+    # deleted decisions lose their rows with the cascade
+    if not changed:
+        return 0
+    with transaction.atomic():
+        DecisionMinHash.objects.filter(decision_id__in=changed).delete()
+        DecisionLSHBucket.objects.filter(decision_id__in=changed).delete()
+        DecisionMinHash.objects.bulk_create([DecisionMinHash(decision_id=pk, signature=raw) for pk, _, raw in signatures])
+        DecisionLSHBucket.objects.bulk_create([
+            DecisionLSHBucket(decision_id=pk, band=band, bucket=bucket)
+            for pk, sig, _ in signatures
+            for band, bucket in enumerate(buckets(sig))
+        ])
+    return len(changed)
+
+
+def update_on_commit(decision_id: Optional[int]) -> None:
+    """Recompute the signature once the surrounding transaction commits."""
+    if decision_id is not None:
+        transaction.on_commit(lambda: update_signatures([decision_id]))
+
+
+def backfill(batch_size: int = 1000, missing_only: bool = True) -> int:
+    """Compute signatures for all decisions (or those without one), in batches."""
+    decisions = Decision.objects.all()
+    if missing_only:
+        decisions = decisions.filter(minhash__isnull=True)
+    updated, last = 0, 0
+    while True:
+        ids = list(decisions.filter(pk__gt=last).order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return updated
+        updated += update_signatures(ids)
+        last = ids[-1]
+
+
+# =========================
+# Lookup
+# =========================
+
+def find_duplicates(
+    user, team, title: str, description: str, exclude: Optional[int] = None, threshold: float = DUPLICATE_THRESHOLD,
+) -> list[dict]:
+    """Decisions of ``team`` visible to ``user`` that look like a copy of this text, most similar first."""
+    sig = signature(title, description)
+    if sig is None:
+        return []
+    match = reduce(or_, (Q(band=band, bucket=bucket) for band, bucket in enumerate(buckets(sig))))
+    # team first: the cap must not be filled with other teams' decisions
+    candidates = (
+        DecisionLSHBucket.objects.filter(match, decision__team=team)
+        .exclude(decision_id=exclude)
+        .values_list("decision_id", flat=True)
+    )
+    candidate_ids = list(candidates.distinct()[:MAX_CANDIDATES])
+    if not candidate_ids:
+        return []
+
+    decisions = {
+        d.pk: d
+        for d in visible_decisions(user).filter(pk__in=candidate_ids, team=team).only("pk", "title", "status", "created_at")
+    }
+    scored = []
+    for decision_id, raw in DecisionMinHash.objects.filter(decision_id__in=decisions).values_list("decision_id", "signature"):
+        score = similarity(sig, _unpack(raw))
+        if score >= threshold:
+            scored.append((score, decision_id))
+    scored.sort(reverse=True)
+    return [
+        {
+            "id": decision_id,
+            "title": decisions[decision_id].title,
+            "status": decisions[decision_id].status,
+            "created_at": decisions[decision_id].created_at,
+            "similarity": round(score, 2),
+        }
+        for score, decision_id in scored[:MAX_RESULTS]
+    ]
@@ -0,0 +1,220 @@
+"""AI job queue.
+
+``submit()`` records an ``AIJob`` and hands its id to the executor named by
+``settings.AI_JOB_EXECUTOR`` once the transaction commits, so the request
+returns immediately and never waits for the LLM:
+
+* ``EagerExecutor`` – runs the job inline (tests, debugging).
+* ``ThreadExecutor`` – a small thread pool inside the web process; no extra
+  process needed (runserver, single node).
+* ``DatabaseExecutor`` – nothing happens in the web process; one or more
+  ``manage.py run_ai_worker`` processes claim queued rows from the table.
+
+Finished jobs are pushed to the requester's notification stream as an
+``ai_job`` event; clients without the stream poll the status endpoint.
+"""
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor as _Pool
+from datetime import timedelta
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .ai_service import ai_service
+from .alternatives import create_alternatives, option_payload
+from .models import AIJob, Decision
+from .permissions import editable_decisions, visible_decisions
+from .pubsub import get_broker, user_channel
+
+DEFAULT_EXECUTOR = "decisions.jobs.ThreadExecutor"
+MAX_ATTEMPTS = 3
+# A running job older than this is assumed to belong to a dead worker.
+STALE_AFTER = timedelta(minutes=10)
+
+
+def _summary(decision: Decision) -> dict:
+    return {"summary": ai_service.generate_summary(decision)}
+
+
+def _alternatives(decision: Decision) -> dict:
+    options = create_alternatives(decision, ai_service.generate_alternatives(decision))
+    return {"alternatives": [option_payload(o) for o in options]}
+
+
+HANDLERS: dict[str, Callable[[Decision], dict]] = {
+    "analysis": ai_service.analyze_decision,
+    "summary": _summary,
+    "quality": ai_service.quality_check,
+    "alternatives": _alternatives,
+}
+
+# Decisions a user may run each kind on: kinds that write to the decision
+# need edit rights, like their synchronous endpoints in views_ai
+PERMISSIONS: dict[str, Callable] = {
+    "analysis": visible_decisions,
+    "summary": visible_decisions,
+    "quality": visible_decisions,
+    "alternatives": editable_decisions,
+}
+
+
+def allowed_decisions(kind: str, user):
+    return PERMISSIONS[kind](user)
+
+
+def _authorized(job: AIJob) -> bool:
+    # re-checked when the job runs: rights may have changed since the submit
+    if job.requested_by is None:
+        return True
+    return allowed_decisions(job.kind, job.requested_by).filter(pk=job.decision_id).exists()
+
+
+# =========================
+# Executors
+# =========================
+
+class Executor:
+    # True when workers pick jobs up from the table by themselves
+    polled = False
+
+    def dispatch(self, job_id: int) -> None:
+        raise NotImplementedError
+
+
+class EagerExecutor(Executor):
+    def dispatch(self, job_id: int) -> None:
+        run_job(job_id)
+
+
+class ThreadExecutor(Executor):
+    def __init__(self, max_workers: Optional[int] = None):
+        self._pool = _Pool(
+            max_workers=max_workers or getattr(settings, "AI_JOB_THREADS", 4),
+            thread_name_prefix="ai-job",
+        )
+
+    def dispatch(self, job_id: int) -> None:
+        self._pool.submit(_run_in_thread, job_id)
+
+
+class DatabaseExecutor(Executor):
+    """Jobs stay queued in the table until a worker claims them."""
+
+    polled = True
+
+    def dispatch(self, job_id: int) -> None:
+        pass
+
+
+def _run_in_thread(job_id: int) -> None:
+    try:
+        run_job(job_id)
+    finally:
+        connection.close()
+
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = import_string(getattr(settings, "AI_JOB_EXECUTOR", DEFAULT_EXECUTOR))()
+    return _executor
+
+
+# =========================
+# Submit / run
+# =========================
+
+def submit(kind: str, decision: Decision, user=None) -> AIJob:
+    if kind not in HANDLERS:
+        raise ValueError(f"unknown AI job kind: {kind}")
+    job = AIJob.objects.create(kind=kind, decision=decision, requested_by=user)
+    transaction.on_commit(lambda: get_executor().dispatch(job.pk))
+    return job
+
+
+def _claim(job_id: int) -> bool:
+    # conditional UPDATE: exactly one runner wins a queued job
+    return bool(
+        AIJob.objects.filter(pk=job_id, status="queued")
+        .update(status="running", started_at=timezone.now(), attempts=F("attempts") + 1)
+    )
+
+
+def claim_next() -> Optional[int]:
+    """Claim the oldest queued job for this worker; returns its id or None."""
+    candidates = AIJob.objects.filter(status="queued").order_by("created_at", "id").values_list("pk", flat=True)
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            job_id = candidates.select_for_update(skip_locked=True).first()
+            if job_id is not None and _claim(job_id):
+                return job_id
+        return None
+    for job_id in candidates[:10]:
+        if _claim(job_id):
+            return job_id
+    return None
+
+
+def run_job(job_id: int) -> Optional[AIJob]:
+    """Claim and run a queued job; None if another runner got it first."""
+    if not _claim(job_id):
+        return None
+    return run_claimed(job_id)
+
+
+def run_claimed(job_id: int) -> AIJob:
+    job = AIJob.objects.select_related("decision", "requested_by").get(pk=job_id)
+    try:
+        if not _authorized(job):
+            job.status, job.error = "failed", "Not allowed for this decision"
+        else:
+            job.result = HANDLERS[job.kind](job.decision)
+            job.status, job.error = "succeeded", ""
+    except Exception as e:
+        # retried by the next claim until MAX_ATTEMPTS
+        job.status = "queued" if job.attempts < MAX_ATTEMPTS else "failed"
+        job.error = str(e)
+    job.finished_at = timezone.now() if job.is_finished else None
+    job.save(update_fields=["result", "status", "error", "finished_at"])
+    if job.is_finished:
+        publish(job)
+    elif not get_executor().polled:
+        get_executor().dispatch(job.pk)
+    return job
+
+
+def requeue_stale(older_than: timedelta = STALE_AFTER) -> int:
+    cutoff = timezone.now() - older_than
+    return AIJob.objects.filter(status="running", started_at__lt=cutoff).update(status="queued")
+
+
+def job_payload(job: AIJob) -> dict:
+    return {
+        "id": job.pk,
+        "kind": job.kind,
+        "decision_id": job.decision_id,
+        "status": job.status,
+        "result": job.result,
+        "error": job.error if job.status == "failed" else "",
+    }
+
+
+def publish(job: AIJob) -> None:
+    if job.requested_by_id is None:
+        return
+    try:
+        get_broker().publish(user_channel(job.requested_by_id), {"event": "ai_job", "data": job_payload(job)})
+    except Exception:
+        pass
@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from decisions.ai_service import ai_service
+from decisions.testing import drill, fake_provider
+
+
+class Command(BaseCommand):
+    help = 'Run quality checks against a fake slow/failing LLM and report how long workers were held'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--latency', type=float, default=30.0, help='Seconds the fake provider takes per call')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of fake calls that fail (0-1)')
+        parser.add_argument('--calls', type=int, default=50)
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--max-seconds', type=float, help='Fail if any call took longer than this')
+
+    def handle(self, *args, **options):
+        with fake_provider(ai_service, latency=options['latency'], failure_rate=options['failure_rate'], seed=0):
+            report = drill(ai_service, calls=options['calls'], workers=options['workers'])
+
+        self.stdout.write(json.dumps(report, indent=2))
+        limit = options['max_seconds']
+        if limit is not None and report['max_seconds'] > limit:
+            raise CommandError(f"Slowest call took {report['max_seconds']}s (limit {limit}s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {report['calls']} calls, {report['provider_calls']} reached the provider, "
+            f"slowest {report['max_seconds']}s"
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from decisions.duplicates import backfill
+
+
+class Command(BaseCommand):
+    help = 'Compute the duplicate-detection MinHash signatures of decisions that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--all', action='store_true', help='Recompute the signatures of all decisions')
+
+    def handle(self, *args, **options):
+        updated = backfill(batch_size=options['batch_size'], missing_only=not options['all'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Updated {updated} signatures'))
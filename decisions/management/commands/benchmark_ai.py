@@ -0,0 +1,95 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from decisions.ai_service import AIService
+from decisions.models import Decision
+from decisions.providers import FakeProvider, OpenAIProvider, ReplayProvider
+from decisions.testing import BENCHMARK_METHODS, benchmark, synthetic_decisions
+
+
+class Command(BaseCommand):
+    help = 'Benchmark analysis, quality check and summary through an LLM provider (fake, replay or real)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--provider', default='fake',
+            help='fake, replay, openai or a dotted provider path (default: fake)',
+        )
+        parser.add_argument('--fixture', help='Replay fixture file (replay provider)')
+        parser.add_argument(
+            '--record', action='store_true',
+            help='Replay provider: complete misses through OpenAI and add them to the fixture',
+        )
+        parser.add_argument('--latency', type=float, default=0.2, help='Fake provider: median seconds per call')
+        parser.add_argument('--jitter', type=float, default=0.5, help='Fake provider: spread of the latency')
+        parser.add_argument(
+            '--distribution', default='lognormal', choices=['constant', 'uniform', 'lognormal'],
+            help='Fake provider: latency distribution',
+        )
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Fake provider: fraction of calls that fail')
+        parser.add_argument('--timeout-rate', type=float, default=0.0, help='Fake provider: fraction of calls that hang')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--decisions', type=int, default=20, help='Number of decisions to run the methods on')
+        parser.add_argument(
+            '--from-db', action='store_true',
+            help='Use the most recent saved decisions instead of synthetic ones '
+                 '(calls are recorded against their teams and count towards budgets)',
+        )
+        parser.add_argument('--methods', default=','.join(BENCHMARK_METHODS))
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--cache', action='store_true', help='Use the completion cache')
+
+    def _provider(self, options):
+        name = options['provider']
+        if name == 'fake':
+            return FakeProvider(
+                latency=options['latency'],
+                jitter=options['jitter'],
+                distribution=options['distribution'],
+                failure_rate=options['failure_rate'],
+                timeout_rate=options['timeout_rate'],
+                seed=options['seed'],
+            )
+        if name == 'replay':
+            if not options['fixture']:
+                raise CommandError('--fixture is required for the replay provider')
+            try:
+                return ReplayProvider(options['fixture'], record=options['record'])
+            except FileNotFoundError:
+                raise CommandError(f"Fixture {options['fixture']} not found (use --record to create it)")
+        if name == 'openai':
+            return OpenAIProvider()
+        try:
+            return import_string(name)()
+        except ImportError as e:
+            raise CommandError(str(e))
+
+    def handle(self, *args, **options):
+        methods = [m.strip() for m in options['methods'].split(',') if m.strip()]
+        unknown = set(methods) - set(BENCHMARK_METHODS)
+        if unknown:
+            raise CommandError(f"Unknown methods: {', '.join(sorted(unknown))}")
+
+        if options['from_db']:
+            decisions = list(Decision.objects.order_by('-updated_at')[:options['decisions']])
+            if not decisions:
+                raise CommandError('No decisions in the database')
+        else:
+            decisions = synthetic_decisions(options['decisions'], seed=options['seed'])
+
+        # a private service: its breaker and cache do not touch the shared one
+        service = AIService()
+        service.provider = self._provider(options)
+        if not service.provider.available:
+            raise CommandError(f'Provider {service.provider.name} is not available')
+
+        report = benchmark(
+            service, decisions, methods=methods, concurrency=options['concurrency'], cache=options['cache'],
+        )
+        self.stdout.write(json.dumps(report, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {report['calls']} calls through {report['provider']} in {report['wall_seconds']}s "
+            f"({report['throughput_per_second']}/s)"
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from decisions.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-team/per-day decision rollup table from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--team', type=int, action='append', dest='teams', help='Only rebuild this team id (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild_rollups(team_ids=options['teams'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Rebuilt {written} rollup rows'))
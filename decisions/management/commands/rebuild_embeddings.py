@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from decisions.similarity import rebuild_embeddings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related-decision embeddings of all decisions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        embedded = rebuild_embeddings(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Embedded {embedded} decisions'))
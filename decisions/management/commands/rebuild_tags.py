@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from decisions.tags import rebuild_tags
+
+
+class Command(BaseCommand):
+    help = 'Re-sync the normalised tags of all decisions from their tag strings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = rebuild_tags(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Re-synced the tags of {changed} decisions'))
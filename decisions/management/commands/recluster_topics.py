@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from decisions.topics import recluster
+
+
+class Command(BaseCommand):
+    help = 'Recluster the dashboard topics of teams whose decisions have drifted (run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--team', type=int, action='append', help='Recluster this team regardless of drift (repeatable)')
+        parser.add_argument('--every', type=float, help='Keep running and check for stale teams every this many seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            clustered = recluster(options['team'])
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Reclustered {len(clustered)} teams into {sum(clustered.values())} topics'
+            ))
+            if not options['every']:
+                break
+            time.sleep(options['every'])
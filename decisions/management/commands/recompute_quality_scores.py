@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from decisions.models import Decision
+from decisions.quality import recompute_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored heuristic quality_score of decisions (e.g. after changing the rules)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--team', type=int, action='append', dest='teams', help='Only this team id (repeatable)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        decisions = Decision.objects.all()
+        if options['teams']:
+            decisions = decisions.filter(team_id__in=options['teams'])
+        changed = recompute_scores(decisions, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Updated {changed} quality scores'))
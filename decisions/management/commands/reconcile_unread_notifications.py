@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from decisions.notifications import reconcile_unread_counts
+
+
+class Command(BaseCommand):
+    help = 'Repair cached unread-notification counters that drifted from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        corrected = reconcile_unread_counts(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Corrected {corrected} unread counters'))
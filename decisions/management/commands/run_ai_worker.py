@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from decisions.jobs import claim_next, requeue_stale, run_claimed
+
+
+class Command(BaseCommand):
+    help = 'Process queued AI jobs (use with AI_JOB_EXECUTOR = decisions.jobs.DatabaseExecutor)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit')
+
+    def handle(self, *args, **options):
+        processed = 0
+        requeue_stale()
+        while True:
+            close_old_connections()
+            job_id = claim_next()
+            if job_id is None:
+                if options['once']:
+                    break
+                requeue_stale()
+                time.sleep(options['poll_interval'])
+                continue
+
+            job = run_claimed(job_id)
+            processed += 1
+            self.stdout.write(str(job))
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Processed {processed} AI jobs'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from decisions.models import Team
+from decisions.quality_runs import DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, execute_run, start_run
+
+
+class Command(BaseCommand):
+    help = 'Quality-check open decisions of a team (or all teams), skipping unchanged ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--team', type=int, action='append', dest='teams', help='Team id (repeatable); default: all teams in one run')
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent AI calls')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Decisions per checkpoint')
+        parser.add_argument('--no-resume', action='store_true', help='Start over instead of continuing an unfinished run')
+
+    def handle(self, *args, **options):
+        scopes = [None]
+        if options['teams']:
+            scopes = list(Team.objects.filter(pk__in=options['teams']))
+            if len(scopes) != len(set(options['teams'])):
+                raise CommandError('Unknown team id')
+
+        for team in scopes:
+            run = start_run(team, resume=not options['no_resume'])
+            if run.last_decision_id:
+                self.stdout.write(f'Resuming {run} after decision {run.last_decision_id}')
+            run = execute_run(
+                run,
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                progress=lambda r: self.stdout.write(f'  {r.processed} scored, {r.skipped} skipped, {r.errors} errors'),
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ {run}: {run.processed} scored, {run.skipped} unchanged, {run.errors} errors, '
+                f'{run.throughput:.1f} decisions/s'
+            ))
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .caching import is_shared
+from .models import TeamMember
+
+CACHE_KEY = "memberships:user:{}"
+CACHE_TIMEOUT = 60 * 15
+
+
+def _cache_key(user_id) -> str:
+    return CACHE_KEY.format(user_id)
+
+
+def load_roles(user) -> dict[int, str]:
+    """Return the user's ``{team_id: role}`` map from cache or one query.
+
+    With a process-local cache, ``invalidate_user`` would only reach one
+    worker and the others would keep authorising a removed member, so the
+    map is then loaded per request (``get_resolver`` memoises it).
+    """
+    if not getattr(user, "is_authenticated", False):
+        return {}
+    if not is_shared():
+        return dict(TeamMember.objects.filter(user_id=user.pk).values_list("team_id", "role"))
+
+    key = _cache_key(user.pk)
+    try:
+        roles = cache.get(key)
+    except Exception:
+        roles = None
+    if roles is not None:
+        return roles
+
+    roles = dict(TeamMember.objects.filter(user_id=user.pk).values_list("team_id", "role"))
+    try:
+        cache.set(key, roles, CACHE_TIMEOUT)
+    except Exception:
+        pass
+    return roles
+
+
+def invalidate_user(user_id) -> None:
+    try:
+        cache.delete(_cache_key(user_id))
+    except Exception:
+        pass
+
+
+def invalidate_on_commit(user_id) -> None:
+    """Invalidate once the surrounding transaction commits.
+
+    Deleting earlier would let a concurrent request reload the old roles,
+    still visible to it, and cache them for the full timeout.
+    """
+    if user_id is not None:
+        transaction.on_commit(lambda: invalidate_user(user_id))
+
+
+class MembershipResolver:
+    """In-memory view of one user's team memberships.
+
+    The map is loaded lazily on first use, so requests that never check a
+    permission never touch the cache or the database.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._roles: Optional[dict[int, str]] = None
+
+    @property
+    def roles(self) -> dict[int, str]:
+        if self._roles is None:
+            self._roles = load_roles(self.user)
+        return self._roles
+
+    def role_for(self, team) -> Optional[str]:
+        team_id = getattr(team, "pk", team)
+        return self.roles.get(team_id)
+
+    def is_member(self, team) -> bool:
+        return self.role_for(team) is not None
+
+    def has_role(self, team, roles: Iterable[str]) -> bool:
+        return self.role_for(team) in tuple(roles)
+
+    def team_ids(self, roles: Optional[Iterable[str]] = None) -> list[int]:
+        if roles is None:
+            return list(self.roles)
+        roles = tuple(roles)
+        return [team_id for team_id, role in self.roles.items() if role in roles]
+
+
+def get_resolver(user) -> MembershipResolver:
+    """Return the resolver memoised on ``user``.
+
+    ``request.user`` is a single object for the whole request, so memoising
+    on it makes the resolver request-scoped without threading the request
+    through every permission helper.
+    """
+    resolver = getattr(user, "_membership_resolver", None)
+    if resolver is None:
+        resolver = MembershipResolver(user)
+        try:
+            user._membership_resolver = resolver
+        except AttributeError:
+            pass
+    return resolver
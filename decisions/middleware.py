@@ -0,0 +1,33 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .membership import get_resolver
+
+
+class MembershipMiddleware:
+    """Attach the user's membership resolver as ``request.memberships``.
+
+    Must run after ``AuthenticationMiddleware``. Sync and async capable, so
+    async views (the notification stream) are not adapted onto a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _attach(self, request):
+        request.memberships = SimpleLazyObject(lambda: get_resolver(request.user))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self._attach(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        self._attach(request)
+        return await self.get_response(request)
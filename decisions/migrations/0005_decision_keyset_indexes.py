@@ -0,0 +1,21 @@
+# Generated by Django 4.2.8 on 2026-10-17 06:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0004_decisioncomment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='decision',
+            index=models.Index(fields=['-updated_at', '-id'], name='decision_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='decision',
+            index=models.Index(fields=['team', '-updated_at', '-id'], name='decision_team_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.8 on 2026-10-17 06:27
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    Decision = apps.get_model('decisions', 'Decision')
+    DecisionDailyRollup = apps.get_model('decisions', 'DecisionDailyRollup')
+    grouped = (
+        Decision.objects.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('team_id', 'day', 'status', 'priority')
+        .annotate(
+            n=models.Count('id'),
+            decided=models.Count('decided_at'),
+            cycle=models.Sum(models.ExpressionWrapper(models.F('decided_at') - models.F('created_at'), output_field=models.DurationField())),
+        )
+    )
+    DecisionDailyRollup.objects.bulk_create(
+        [
+            DecisionDailyRollup(
+                team_id=row['team_id'], day=row['day'], status=row['status'], priority=row['priority'],
+                count=row['n'], decided_count=row['decided'],
+                cycle_seconds=int(row['cycle'].total_seconds()) if row['cycle'] else 0,
+            )
+            for row in grouped.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0005_decision_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DecisionDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('priority', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('decided_count', models.IntegerField(default=0)),
+                ('cycle_seconds', models.BigIntegerField(default=0, help_text='Sum of decided_at - created_at over decided rows')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='decisions.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['team', 'day'], name='rollup_team_day_idx')],
+                'unique_together': {('team', 'day', 'status', 'priority')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
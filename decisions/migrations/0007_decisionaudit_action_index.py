@@ -0,0 +1,17 @@
+# Generated by Django 4.2.8 on 2026-10-17 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0006_decisiondailyrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='decisionaudit',
+            index=models.Index(fields=['action', 'decision', 'timestamp'], name='audit_action_decision_ts_idx'),
+        ),
+    ]
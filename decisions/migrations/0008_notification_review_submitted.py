@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-17 06:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0007_decisionaudit_action_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notif_type',
+            field=models.CharField(choices=[('status_change', 'Status Change'), ('review_assigned', 'Review Assigned'), ('review_submitted', 'Review Submitted'), ('mention', 'Mention'), ('deadline', 'Deadline'), ('system', 'System')], default='system', max_length=30),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.8 on 2026-10-17 06:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('decisions', '0009_aijob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QualityScoreRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('last_decision_id', models.BigIntegerField(default=0)),
+                ('processed', models.IntegerField(default=0)),
+                ('skipped', models.IntegerField(default=0)),
+                ('errors', models.IntegerField(default=0)),
+                ('elapsed_seconds', models.FloatField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('started_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='quality_runs', to='decisions.team')),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DecisionQualityScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveSmallIntegerField()),
+                ('result', models.JSONField(default=dict)),
+                ('input_hash', models.CharField(blank=True, max_length=64)),
+                ('error', models.TextField(blank=True)),
+                ('scored_at', models.DateTimeField()),
+                ('decision', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='quality_score_record', to='decisions.decision')),
+                ('run', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scores', to='decisions.qualityscorerun')),
+            ],
+        ),
+    ]
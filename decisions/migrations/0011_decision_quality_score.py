@@ -0,0 +1,28 @@
+# Generated by Django 4.2.8 on 2026-10-17 06:42
+
+from django.db import migrations, models
+
+
+# Scores of existing decisions are computed by `manage.py recompute_quality_scores`
+# (decisions.quality uses the current models, so it cannot run from a migration).
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0010_quality_score_runs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='decision',
+            name='quality_score',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Heuristic quality (0-100), see decisions.quality'),
+        ),
+        migrations.AddIndex(
+            model_name='decision',
+            index=models.Index(fields=['-quality_score', '-id'], name='decision_quality_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='decision',
+            index=models.Index(fields=['team', '-quality_score', '-id'], name='decision_team_quality_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.8 on 2026-10-17 06:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0011_decision_quality_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='ai_daily_token_budget',
+            field=models.PositiveIntegerField(blank=True, help_text='LLM tokens per day; empty uses settings.AI_TEAM_DAILY_TOKEN_BUDGET', null=True),
+        ),
+        migrations.CreateModel(
+            name='AICall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(max_length=40)),
+                ('model', models.CharField(max_length=100)),
+                ('prompt_tokens', models.PositiveIntegerField(default=0)),
+                ('completion_tokens', models.PositiveIntegerField(default=0)),
+                ('latency_ms', models.FloatField(default=0)),
+                ('outcome', models.CharField(choices=[('ok', 'OK'), ('error', 'Error'), ('timeout', 'Timeout'), ('busy', 'Busy'), ('over_budget', 'Over budget')], default='ok', max_length=20)),
+                ('cache_hit', models.BooleanField(default=False)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('decision', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ai_calls', to='decisions.decision')),
+                ('team', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ai_calls', to='decisions.team')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['team', 'created_at'], name='aicall_team_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.8 on 2026-10-17 06:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0012_ai_call_ledger'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aicall',
+            name='outcome',
+            field=models.CharField(choices=[('ok', 'OK'), ('error', 'Error'), ('timeout', 'Timeout'), ('busy', 'Busy'), ('circuit_open', 'Circuit open'), ('over_budget', 'Over budget')], default='ok', max_length=20),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.8 on 2026-10-17 06:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Weighted tsvector of the document, maintained by PostgreSQL itself; the
+# config must match decisions.search.TEXT_SEARCH_CONFIG.
+SEARCH_VECTOR_SQL = """
+ALTER TABLE decisions_searchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(tags, '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(body, '')), 'C') ||
+    setweight(to_tsvector('english', coalesce(discussion, '')), 'D')
+) STORED;
+CREATE INDEX searchdocument_vector_gin ON decisions_searchdocument USING gin (search_vector);
+"""
+
+
+def add_search_vector(apps, schema_editor):
+    # other databases use the in-process index of decisions.search
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SEARCH_VECTOR_SQL)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE decisions_searchdocument DROP COLUMN search_vector')
+
+
+# Documents of existing decisions are built by `manage.py rebuild_search_index`
+# (it uses the current models, so it cannot run from a migration).
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0013_aicall_circuit_open'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('decision', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='decisions.decision')),
+                ('title', models.CharField(max_length=200)),
+                ('tags', models.CharField(blank=True, max_length=500)),
+                ('body', models.TextField(blank=True, help_text='Description and options')),
+                ('discussion', models.TextField(blank=True, help_text='Comments and template field values')),
+                ('updated_at', models.DateTimeField(db_index=True)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='decisions.team')),
+            ],
+        ),
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.8 on 2026-10-17 07:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Embeddings of existing decisions are computed by `manage.py rebuild_embeddings`
+# (it uses the current models, so it cannot run from a migration).
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0014_search_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DecisionEmbedding',
+            fields=[
+                ('decision', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='embedding', serialize=False, to='decisions.decision')),
+                ('vector', models.BinaryField()),
+                ('updated_at', models.DateTimeField(db_index=True)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='decisions.team')),
+            ],
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.8 on 2026-10-17 07:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0015_decision_embeddings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DecisionMinHash',
+            fields=[
+                ('decision', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='minhash', serialize=False, to='decisions.decision')),
+                ('signature', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DecisionLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('decision', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='decisions.decision')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'bucket'], name='lsh_band_bucket_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='decisionlshbucket',
+            constraint=models.UniqueConstraint(fields=('decision', 'band'), name='lsh_decision_band_uniq'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.8 on 2026-10-17 07:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0016_duplicate_signatures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Topic',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=200)),
+                ('centroid', models.BinaryField(help_text="float32, with the team's IDF weights folded in")),
+                ('count', models.IntegerField(default=0)),
+                ('decided_count', models.IntegerField(default=0)),
+                ('cycle_seconds', models.BigIntegerField(default=0, help_text='Sum of decided_at - created_at over decided rows')),
+                ('added_since_clustering', models.IntegerField(default=0)),
+                ('clustered_at', models.DateTimeField()),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='topics', to='decisions.team')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TopicMembership',
+            fields=[
+                ('decision', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='topic_membership', serialize=False, to='decisions.decision')),
+                ('decided', models.BooleanField(default=False)),
+                ('cycle_seconds', models.BigIntegerField(default=0)),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='decisions.topic')),
+            ],
+        ),
+    ]
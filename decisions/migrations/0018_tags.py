@@ -0,0 +1,78 @@
+# Generated by Django 4.2.8 on 2026-10-17 07:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def parse_tags(text):
+    # frozen copy of decisions.models.tag.parse_tags as of this migration
+    names = []
+    for part in (text or '').split(','):
+        name = part.strip().lower()[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def backfill_tags(apps, schema_editor, batch_size=1000):
+    Decision = apps.get_model('decisions', 'Decision')
+    Tag = apps.get_model('decisions', 'Tag')
+    DecisionTag = apps.get_model('decisions', 'DecisionTag')
+    last = 0
+    while True:
+        rows = list(
+            Decision.objects.filter(pk__gt=last).exclude(tags='').order_by('pk').values_list('pk', 'tags')[:batch_size]
+        )
+        if not rows:
+            return
+        parsed = [(pk, parse_tags(tags)) for pk, tags in rows]
+        names = {name for _, tag_names in parsed for name in tag_names}
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+        DecisionTag.objects.bulk_create(
+            [DecisionTag(decision_id=pk, tag_id=ids[name]) for pk, tag_names in parsed for name in tag_names],
+            ignore_conflicts=True,
+        )
+        last = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0017_topics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DecisionTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('decision', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='decisions.decision')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('decisions', models.ManyToManyField(related_name='tag_set', through='decisions.DecisionTag', to='decisions.decision')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='decisiontag',
+            name='tag',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='decisions.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='decisiontag',
+            index=models.Index(fields=['tag', 'decision'], name='decision_tag_tag_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='decisiontag',
+            constraint=models.UniqueConstraint(fields=('decision', 'tag'), name='decision_tag_uniq'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.8 on 2026-10-17 09:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decisions', '0018_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='qualityscorerun',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -9,6 +9,10 @@ from .decision import (
     DecisionComment,
     Notification,
 )
+from .analytics import DecisionDailyRollup, Topic, TopicMembership
+from .ai import AIJob, QualityScoreRun, DecisionQualityScore, AICall
+from .search import SearchDocument, DecisionEmbedding, DecisionMinHash, DecisionLSHBucket
+from .tag import Tag, DecisionTag
 from .template import (
     TemplateCategory,
     DecisionTemplate,
@@ -26,6 +30,19 @@ __all__ = [
     'DecisionAttachment',
     'DecisionComment',
     'Notification',
+    'DecisionDailyRollup',
+    'Topic',
+    'TopicMembership',
+    'AIJob',
+    'QualityScoreRun',
+    'DecisionQualityScore',
+    'AICall',
+    'SearchDocument',
+    'DecisionEmbedding',
+    'DecisionMinHash',
+    'DecisionLSHBucket',
+    'Tag',
+    'DecisionTag',
     'TemplateCategory',
     'DecisionTemplate',
     'TemplateField',
@@ -0,0 +1,152 @@
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+from .decision import Decision, Team
+
+
+class AIJob(models.Model):
+    """An AI request (analysis, summary, ...) processed off the request path.
+
+    Created by ``decisions.jobs.submit`` and run by the configured executor
+    (``settings.AI_JOB_EXECUTOR``); clients poll it or get the result pushed.
+    """
+    KIND_CHOICES = [
+        ('analysis', 'Analysis'),
+        ('summary', 'Summary'),
+        ('quality', 'Quality Check'),
+        ('alternatives', 'Alternatives'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    decision = models.ForeignKey(Decision, on_delete=models.CASCADE, related_name='ai_jobs')
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='ai_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # worker: oldest queued job first
+            models.Index(fields=['status', 'created_at'], name='aijob_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('succeeded', 'failed')
+
+
+class QualityScoreRun(models.Model):
+    """One batch quality-scoring pass over a team (or all teams).
+
+    ``last_decision_id`` is the checkpoint: decisions are processed in id
+    order, so an interrupted run resumes after it.
+    """
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, null=True, blank=True, related_name='quality_runs')
+    started_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+
+    last_decision_id = models.BigIntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)
+    errors = models.IntegerField(default=0)
+    elapsed_seconds = models.FloatField(default=0)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    # advanced by every checkpoint: a running run that stops advancing was orphaned
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        scope = self.team.name if self.team_id else 'all teams'
+        return f"Quality run #{self.pk} ({scope}, {self.status})"
+
+    @property
+    def throughput(self):
+        """Scored decisions per second of scoring time."""
+        return self.processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+class DecisionQualityScore(models.Model):
+    """Latest batch quality check of a decision.
+
+    ``input_hash`` identifies the inputs the score was computed from; a run
+    skips decisions whose hash is unchanged. It is empty when the AI call
+    failed, so the next run retries.
+    """
+    decision = models.OneToOneField(Decision, on_delete=models.CASCADE, related_name='quality_score_record')
+    run = models.ForeignKey(QualityScoreRun, on_delete=models.SET_NULL, null=True, blank=True, related_name='scores')
+    score = models.PositiveSmallIntegerField()
+    result = models.JSONField(default=dict)
+    input_hash = models.CharField(max_length=64, blank=True)
+    error = models.TextField(blank=True)
+    scored_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.decision_id}: {self.score}"
+
+
+class AICall(models.Model):
+    """One LLM call (or cache hit / short-circuit) made by ``AIService``.
+
+    Written in batches by ``decisions.ai_ledger``; ``created_at`` is the time
+    of the call, not of the insert.
+    """
+    OUTCOME_CHOICES = [
+        ('ok', 'OK'),
+        ('error', 'Error'),
+        ('timeout', 'Timeout'),
+        ('busy', 'Busy'),
+        ('circuit_open', 'Circuit open'),
+        ('over_budget', 'Over budget'),
+    ]
+
+    team = models.ForeignKey(Team, on_delete=models.SET_NULL, null=True, blank=True, related_name='ai_calls')
+    decision = models.ForeignKey(Decision, on_delete=models.SET_NULL, null=True, blank=True, related_name='ai_calls')
+    method = models.CharField(max_length=40)
+    model = models.CharField(max_length=100)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    latency_ms = models.FloatField(default=0)
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES, default='ok')
+    cache_hit = models.BooleanField(default=False)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # per-team usage over a date range
+            models.Index(fields=['team', 'created_at'], name='aicall_team_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.method} ({self.outcome}, {self.total_tokens} tokens)"
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
@@ -0,0 +1,61 @@
+from django.db import models
+
+from .decision import Decision, Team
+
+
+class DecisionDailyRollup(models.Model):
+    """Decision counts per team, creation day, status and priority.
+
+    Maintained incrementally by ``decisions.rollups`` whenever a decision is
+    saved or deleted; ``manage.py rebuild_decision_rollups`` recomputes it
+    from scratch.
+    """
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='daily_rollups')
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    priority = models.CharField(max_length=20)
+
+    count = models.IntegerField(default=0)
+    decided_count = models.IntegerField(default=0)
+    cycle_seconds = models.BigIntegerField(default=0, help_text="Sum of decided_at - created_at over decided rows")
+
+    class Meta:
+        unique_together = ['team', 'day', 'status', 'priority']
+        indexes = [
+            models.Index(fields=['team', 'day'], name='rollup_team_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.team_id} {self.day} {self.status}/{self.priority}: {self.count}"
+
+
+class Topic(models.Model):
+    """A cluster of one team's decisions, with its precomputed dashboard stats.
+
+    Recomputed by ``decisions.topics`` (``manage.py recluster_topics``); in
+    between, saved decisions are assigned to the nearest centroid and the
+    counters below follow incrementally.
+    """
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='topics')
+    label = models.CharField(max_length=200)
+    centroid = models.BinaryField(help_text="float32, with the team's IDF weights folded in")
+
+    count = models.IntegerField(default=0)
+    decided_count = models.IntegerField(default=0)
+    cycle_seconds = models.BigIntegerField(default=0, help_text="Sum of decided_at - created_at over decided rows")
+    added_since_clustering = models.IntegerField(default=0)
+    clustered_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.team_id} {self.label}: {self.count}"
+
+
+class TopicMembership(models.Model):
+    """The topic of a decision and what it contributed to the topic's counters."""
+    decision = models.OneToOneField(Decision, on_delete=models.CASCADE, primary_key=True, related_name='topic_membership')
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='memberships')
+    decided = models.BooleanField(default=False)
+    cycle_seconds = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"Decision {self.decision_id} in topic {self.topic_id}"
@@ -10,6 +10,10 @@ class Team(models.Model):
     """Organization Teams/Departments"""
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
+    ai_daily_token_budget = models.PositiveIntegerField(
+        null=True, blank=True,
+        help_text='LLM tokens per day; empty uses settings.AI_TEAM_DAILY_TOKEN_BUDGET',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
 
@@ -77,9 +81,18 @@ class Decision(models.Model):
     # Additional
     tags = models.CharField(max_length=500, blank=True, help_text="Comma-separated tags")
     impact_score = models.IntegerField(default=0, help_text="Expected impact (0-100)")
+    quality_score = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Heuristic quality (0-100), see decisions.quality")
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination on (updated_at, id), globally and per team
+            models.Index(fields=['-updated_at', '-id'], name='decision_updated_idx'),
+            models.Index(fields=['team', '-updated_at', '-id'], name='decision_team_updated_idx'),
+            # ... and on (quality_score, id) for sorting/filtering by quality
+            models.Index(fields=['-quality_score', '-id'], name='decision_quality_idx'),
+            models.Index(fields=['team', '-quality_score', '-id'], name='decision_team_quality_idx'),
+        ]
 
     @property
     def duration_days(self):
@@ -89,6 +102,19 @@ class Decision(models.Model):
         end = self.decided_at.date() if self.decided_at else date.today()
         return max((end - start).days, 0)
 
+    @property
+    def tag_names(self):
+        """Sorted tag names (from a prefetched ``tag_set``, else parsed from ``tags``).
+
+        Sorted so both sources give the same list: prompts and input hashes
+        built from it must not change with how the decision was loaded.
+        """
+        from .tag import parse_tags
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('tag_set')
+        if prefetched is not None:
+            return sorted(tag.name for tag in prefetched)
+        return sorted(parse_tags(self.tags))
+
     def __str__(self):
         return self.title
 
@@ -140,6 +166,10 @@ class DecisionAudit(models.Model):
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Streaming status-dwell reconstruction (see decisions.cycle_time)
+            models.Index(fields=['action', 'decision', 'timestamp'], name='audit_action_decision_ts_idx'),
+        ]
 
     @property
     def details(self):
@@ -201,6 +231,7 @@ class Notification(models.Model):
     TYPE_CHOICES = [
         ('status_change', 'Status Change'),
         ('review_assigned', 'Review Assigned'),
+        ('review_submitted', 'Review Submitted'),
         ('mention', 'Mention'),
         ('deadline', 'Deadline'),
         ('system', 'System'),
@@ -0,0 +1,67 @@
+from django.db import models
+
+from .decision import Decision, Team
+
+
+class SearchDocument(models.Model):
+    """Searchable text of one decision, maintained by decisions.search.
+
+    On PostgreSQL the table also has a generated, GIN-indexed
+    ``search_vector`` column (see migration 0014) that is not part of the
+    model; the fields below are its weighted sources.
+    """
+    decision = models.OneToOneField(Decision, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    # copied from the decision, for visibility filtering without a join
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='+')
+    title = models.CharField(max_length=200)  # weight A
+    tags = models.CharField(max_length=500, blank=True)  # weight B
+    body = models.TextField(blank=True, help_text="Description and options")  # weight C
+    discussion = models.TextField(blank=True, help_text="Comments and template field values")  # weight D
+    updated_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.title
+
+
+class DecisionEmbedding(models.Model):
+    """Hashed term frequencies of one decision, maintained by decisions.similarity.
+
+    ``vector`` is sparse: n int32 bucket indices followed by n float32
+    weights. IDF weighting happens in the in-process index.
+    """
+    decision = models.OneToOneField(Decision, on_delete=models.CASCADE, primary_key=True, related_name='embedding')
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='+')
+    vector = models.BinaryField()
+    updated_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Embedding of decision {self.decision_id}"
+
+
+class DecisionMinHash(models.Model):
+    """MinHash signature of a decision's title and description (decisions.duplicates)."""
+    decision = models.OneToOneField(Decision, on_delete=models.CASCADE, primary_key=True, related_name='minhash')
+    signature = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"MinHash of decision {self.decision_id}"
+
+
+class DecisionLSHBucket(models.Model):
+    """One LSH band of a decision's MinHash signature: decisions sharing a
+    (band, bucket) pair are duplicate candidates."""
+    decision = models.ForeignKey(Decision, on_delete=models.CASCADE, related_name='+')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='lsh_band_bucket_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['decision', 'band'], name='lsh_decision_band_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Decision {self.decision_id} band {self.band}"
@@ -0,0 +1,49 @@
+from django.db import models
+
+from .decision import Decision
+
+TAG_MAX_LENGTH = 100
+
+
+def parse_tags(text):
+    """Normalised (stripped, lower-case), de-duplicated names of a comma-separated tag string, in order."""
+    names = []
+    for part in (text or "").split(","):
+        name = part.strip().lower()[:TAG_MAX_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+class Tag(models.Model):
+    """A normalised tag.
+
+    ``Decision.tags`` stays the editable comma-separated source;
+    ``decisions.tags`` keeps this relation in sync with it on every save, so
+    tag filters and counts are indexed lookups instead of ``icontains`` scans.
+    """
+    name = models.CharField(max_length=TAG_MAX_LENGTH, unique=True)
+    decisions = models.ManyToManyField(Decision, through='DecisionTag', related_name='tag_set')
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class DecisionTag(models.Model):
+    # (decision, tag) is unique and (tag, decision) indexed: both directions are index-only
+    decision = models.ForeignKey(Decision, on_delete=models.CASCADE, db_index=False, related_name='+')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, db_index=False, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['decision', 'tag'], name='decision_tag_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'decision'], name='decision_tag_tag_idx'),
+        ]
+
+    def __str__(self):
+        return f"Decision {self.decision_id} tagged {self.tag_id}"
@@ -0,0 +1,267 @@
+"""Notification services.
+
+Fan-out: ``notify_*`` resolve their recipients with one query each and
+write all notifications with a single ``bulk_create``, so the cost of an
+event does not grow with team size. Each recipient gets at most one
+notification per event and the acting user none.
+
+Unread counters live in the cache so that rendering the badge in the
+header costs no query. Every write path adjusts the counter atomically
+(``incr``/``decr``); a missing key is recounted from the database on the
+next read, and ``reconcile_unread_counts`` (``manage.py
+reconcile_unread_notifications``) repairs any drift left by races.
+
+Live updates: new notifications and unread-count changes are published on
+commit to the recipient's ``pubsub.user_channel``, which the SSE stream
+(``views.notifications_stream``) forwards to open browser tabs.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Decision, DecisionComment, DecisionReview, Notification, TeamMember
+from .permissions import REVIEW_ROLES
+from .pubsub import get_broker, publish_on_commit, user_channel
+
+BULK_BATCH_SIZE = 500
+
+UNREAD_KEY = "notifications:unread:{}"
+# Bounded lifetime so a drifted counter heals itself even without the
+# reconciliation job.
+UNREAD_TIMEOUT = 60 * 60
+
+
+def _unread_key(user_id) -> str:
+    return UNREAD_KEY.format(user_id)
+
+
+def count_unread(user_id) -> int:
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def get_unread_count(user) -> int:
+    """Unread notifications of ``user``; zero queries when the counter is cached."""
+    user_id = getattr(user, "pk", user)
+    key = _unread_key(user_id)
+    try:
+        count = cache.get(key)
+    except Exception:
+        count = None
+    if count is not None:
+        return count
+
+    count = count_unread(user_id)
+    try:
+        # add(), not set(): never overwrite a counter a concurrent writer
+        # has just initialised and incremented.
+        cache.add(key, count, UNREAD_TIMEOUT)
+    except Exception:
+        pass
+    return count
+
+
+def adjust_unread(user_id, delta: int) -> None:
+    """Atomically add ``delta`` to a cached counter (no-op if not cached)."""
+    if not delta:
+        return
+    key = _unread_key(user_id)
+    try:
+        value = cache.incr(key, delta)
+    except ValueError:
+        return  # not cached; recounted on next read
+    except Exception:
+        return
+    if value < 0:
+        invalidate_unread([user_id])
+
+
+def adjust_unread_on_commit(user_id, delta: int) -> None:
+    transaction.on_commit(lambda: adjust_unread(user_id, delta))
+
+
+def invalidate_unread(user_ids: Iterable) -> None:
+    keys = [_unread_key(user_id) for user_id in user_ids]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception:
+        pass
+
+
+def mark_read(user, pk) -> int:
+    """Mark one notification read; returns the number of rows changed."""
+    changed = Notification.objects.filter(pk=pk, user=user, is_read=False).update(is_read=True)
+    adjust_unread_on_commit(user.pk, -changed)
+    if changed:
+        publish_unread_on_commit(user.pk)
+    return changed
+
+
+def mark_all_read(user) -> int:
+    changed = Notification.objects.filter(user=user, is_read=False).update(is_read=True)
+    adjust_unread_on_commit(user.pk, -changed)
+    if changed:
+        publish_unread_on_commit(user.pk)
+    return changed
+
+
+# =========================
+# Live updates
+# =========================
+
+def event_payload(notification: Notification) -> dict:
+    return {
+        "event": "notification",
+        "data": {
+            "id": notification.pk,
+            "type": notification.notif_type,
+            "title": notification.title,
+            "message": notification.message,
+            "decision_id": notification.decision_id,
+            "created_at": notification.created_at.isoformat() if notification.created_at else None,
+        },
+    }
+
+
+def publish_created(notifications: Iterable[Notification]) -> None:
+    publish_on_commit((user_channel(n.user_id), event_payload(n)) for n in notifications)
+
+
+def publish_unread_on_commit(user_id) -> None:
+    """Push the user's fresh unread count once the transaction commits.
+
+    Registered after the counter adjustment, so it reads the updated value.
+    """
+    def send():
+        try:
+            get_broker().publish(user_channel(user_id), {"event": "unread", "data": {"count": get_unread_count(user_id)}})
+        except Exception:
+            pass
+
+    transaction.on_commit(send)
+
+
+def reconcile_unread_counts(user_ids: Optional[Iterable] = None, batch_size: int = 1000) -> int:
+    """Rewrite cached counters that disagree with the database.
+
+    Returns the number of counters corrected. Uncached users are skipped;
+    they are counted fresh on their next read anyway.
+    """
+    users = get_user_model().objects.order_by("pk").values_list("pk", flat=True)
+    if user_ids is not None:
+        users = users.filter(pk__in=list(user_ids))
+
+    corrected = 0
+    batch = []
+    for user_id in users.iterator(chunk_size=batch_size):
+        batch.append(user_id)
+        if len(batch) >= batch_size:
+            corrected += _reconcile_batch(batch)
+            batch = []
+    if batch:
+        corrected += _reconcile_batch(batch)
+    return corrected
+
+
+def _reconcile_batch(user_ids: list) -> int:
+    keys = {_unread_key(user_id): user_id for user_id in user_ids}
+    cached = cache.get_many(list(keys))
+    if not cached:
+        return 0
+
+    actual = dict(
+        Notification.objects.filter(user_id__in=[keys[k] for k in cached], is_read=False)
+        .values("user_id")
+        .annotate(n=Count("id"))
+        .values_list("user_id", "n")
+    )
+    fixes = {}
+    for key, value in cached.items():
+        expected = actual.get(keys[key], 0)
+        if value != expected:
+            fixes[key] = expected
+    if fixes:
+        cache.set_many(fixes, UNREAD_TIMEOUT)
+    return len(fixes)
+
+
+# =========================
+# Fan-out
+# =========================
+
+def fan_out(recipients: dict, decision: Optional[Decision], title: str, message: str = "", actor=None) -> list[Notification]:
+    """Create one notification per recipient in a single ``bulk_create``.
+
+    ``recipients`` maps user id -> notification type. The actor and empty
+    ids are dropped.
+    """
+    actor_id = getattr(actor, "pk", actor)
+    recipients = {uid: kind for uid, kind in recipients.items() if uid is not None and uid != actor_id}
+    if not recipients:
+        return []
+
+    objs = [
+        Notification(user_id=uid, decision=decision, notif_type=kind, title=title[:200], message=message)
+        for uid, kind in sorted(recipients.items())
+    ]
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(objs, batch_size=BULK_BATCH_SIZE)
+        # bulk_create sends no signals; drop the counters in one round trip
+        # and let each recipient recount on their next page view.
+        user_ids = list(recipients)
+        transaction.on_commit(lambda: invalidate_unread(user_ids))
+        publish_created(created)
+    return created
+
+
+def _decision_people(decision: Decision, kind: str) -> dict:
+    """Author and assignee, while they are still on the decision's team."""
+    people = {decision.created_by_id, decision.assigned_to_id} - {None}
+    members = TeamMember.objects.filter(team_id=decision.team_id, user_id__in=people).values_list("user_id", flat=True)
+    return {user_id: kind for user_id in members}
+
+
+def notify_status_change(decision: Decision, actor, old_status: str, new_status: str) -> list[Notification]:
+    """Tell the team about a status change; reviewers are asked to review."""
+    recipients = {}
+    entering_review = new_status == "review"
+    # every current member, author and assignee included if they are still on the team
+    for user_id, role in TeamMember.objects.filter(team_id=decision.team_id).values_list("user_id", "role"):
+        recipients[user_id] = "review_assigned" if entering_review and role in REVIEW_ROLES else "status_change"
+
+    labels = dict(Decision.STATUS_CHOICES)
+    if entering_review:
+        title = f"Review requested: {decision.title}"
+    else:
+        title = f"{decision.title}: {labels.get(new_status, new_status)}"
+    message = f"{actor} changed the status from {labels.get(old_status, old_status)} to {labels.get(new_status, new_status)}."
+    return fan_out(recipients, decision, title, message, actor=actor)
+
+
+def notify_review_submitted(review: DecisionReview) -> list[Notification]:
+    """Tell the author and the assignee (if still on the team) that a review came in."""
+    decision = review.decision
+    title = f"New review on {decision.title}"
+    message = f"{review.reviewer}: {review.get_status_display()}"
+    if review.comment:
+        message += f" – {review.comment[:200]}"
+    return fan_out(_decision_people(decision, "review_submitted"), decision, title, message, actor=review.reviewer_id)
+
+
+def notify_mentions(decision: Decision, actor, text: str) -> list[Notification]:
+    """Notify team members mentioned as ``@username`` in ``text``."""
+    usernames = DecisionComment.extract_mentions(text)
+    if not usernames:
+        return []
+    user_ids = (
+        TeamMember.objects.filter(team_id=decision.team_id, user__username__in=usernames)
+        .values_list("user_id", flat=True)
+    )
+    recipients = {user_id: "mention" for user_id in user_ids}
+    return fan_out(recipients, decision, f"{actor} mentioned you on {decision.title}", text[:500], actor=actor)
@@ -0,0 +1,145 @@
+"""Keyset (cursor) pagination for decision lists.
+
+Pages are addressed by an opaque cursor that encodes the sort key of the
+boundary row instead of an OFFSET, so every page is a single index range
+scan no matter how deep the user scrolls.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+
+DEFAULT_ORDERING = ("-updated_at", "-id")
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded for the current ordering."""
+
+
+def _split(ordering: Sequence[str]) -> list[tuple[str, bool]]:
+    return [(f.lstrip("-"), f.startswith("-")) for f in ordering]
+
+
+def encode_cursor(values: Sequence[Any], direction: str) -> str:
+    payload = {"v": [v.isoformat() if hasattr(v, "isoformat") else v for v in values], "d": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[list[Any], str]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        values, direction = payload["v"], payload["d"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(str(e)) from e
+    if direction not in ("n", "p") or not isinstance(values, list):
+        raise InvalidCursor("malformed cursor")
+    return values, direction
+
+
+def get_page_size(request, default: Optional[int] = None) -> int:
+    """Page size from ``?page_size=``, clamped to ``DECISIONS_MAX_PAGE_SIZE``."""
+    default = default or getattr(settings, "DECISIONS_PAGE_SIZE", 25)
+    maximum = getattr(settings, "DECISIONS_MAX_PAGE_SIZE", 100)
+    try:
+        size = int(request.GET.get("page_size") or default)
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    page_size: int
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """Paginate a queryset on a unique, index-backed ordering.
+
+    The last ordering field must be unique (normally ``id``) so that the
+    ordering is total and rows are never skipped or repeated between pages.
+    """
+
+    def __init__(self, queryset: QuerySet, page_size: int, ordering: Sequence[str] = DEFAULT_ORDERING):
+        self.queryset = queryset
+        self.page_size = page_size
+        self.ordering = tuple(ordering)
+        self._fields = _split(self.ordering)
+
+    def _to_python(self, values: list[Any]) -> list[Any]:
+        if len(values) != len(self._fields):
+            raise InvalidCursor("cursor does not match ordering")
+        model = self.queryset.model
+        try:
+            return [model._meta.get_field(name).to_python(v) for (name, _), v in zip(self._fields, values)]
+        except Exception as e:
+            raise InvalidCursor(str(e)) from e
+
+    def _seek(self, values: list[Any], forward: bool) -> Q:
+        # (a, b) < (x, y)  <=>  a < x OR (a = x AND b < y), per-field direction aware
+        predicate = Q()
+        for i, (name, desc) in enumerate(self._fields):
+            op = "lt" if desc == forward else "gt"
+            clause = Q(**{f"{name}__{op}": values[i]})
+            for j, (prev_name, _) in enumerate(self._fields[:i]):
+                clause &= Q(**{prev_name: values[j]})
+            predicate |= clause
+        return predicate
+
+    def _key(self, obj) -> list[Any]:
+        return [getattr(obj, name) for name, _ in self._fields]
+
+    def page(self, cursor: Optional[str] = None) -> KeysetPage:
+        forward = True
+        qs = self.queryset
+        if cursor:
+            values, direction = decode_cursor(cursor)
+            forward = direction == "n"
+            qs = qs.filter(self._seek(self._to_python(values), forward))
+
+        if forward:
+            qs = qs.order_by(*self.ordering)
+        else:
+            qs = qs.order_by(*[(f[1:] if f.startswith("-") else "-" + f) for f in self.ordering])
+
+        rows = list(qs[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if not forward:
+            rows.reverse()
+
+        page = KeysetPage(object_list=rows, page_size=self.page_size)
+        if not rows:
+            return page
+        # A cursor always points at an existing row, so the side we came from
+        # is known to be non-empty; the other side is known from the +1 probe.
+        has_next = has_more if forward else True
+        has_previous = bool(cursor) if forward else has_more
+        if has_next:
+            page.next_cursor = encode_cursor(self._key(rows[-1]), "n")
+        if has_previous:
+            page.previous_cursor = encode_cursor(self._key(rows[0]), "p")
+        return page
@@ -3,9 +3,17 @@ from __future__ import annotations
 from typing import Optional
 
 from django.contrib.auth.models import AbstractBaseUser
+from django.db.models import Q, QuerySet
 
+from .membership import get_resolver
 from .models import Team, TeamMember, Decision
 
+CREATE_ROLES = ("admin", "decision_maker", "reviewer", "member", "owner")
+EDIT_ROLES = ("admin", "decision_maker", "owner")
+REVIEW_ROLES = ("admin", "decision_maker", "reviewer", "owner")
+# Authors may keep editing their own decisions until they are decided.
+AUTHOR_EDITABLE_STATUSES = ("draft", "review")
+
 
 def _is_authenticated(user: AbstractBaseUser) -> bool:
     try:
@@ -21,20 +29,15 @@ def _is_admin_user(user: AbstractBaseUser) -> bool:
         return False
 
 
-def _get_membership(user: AbstractBaseUser, team: Team) -> Optional[TeamMember]:
+def _get_role(user: AbstractBaseUser, team) -> Optional[str]:
+    """Role of ``user`` in ``team`` (object or id), from the request-scoped resolver."""
     if not _is_authenticated(user):
         return None
-    try:
-        return TeamMember.objects.filter(team=team, user=user).first()
-    except Exception:
-        return None
+    return get_resolver(user).role_for(team)
 
 
-def _role_in(member: Optional[TeamMember], roles: tuple[str, ...]) -> bool:
-    if not member:
-        return False
-    role = getattr(member, "role", None)
-    return role in roles
+def _role_in(role: Optional[str], roles: tuple[str, ...]) -> bool:
+    return role is not None and role in roles
 
 
 def can_view_team(user: AbstractBaseUser, team: Team) -> bool:
@@ -42,7 +45,7 @@ def can_view_team(user: AbstractBaseUser, team: Team) -> bool:
         return False
     if _is_admin_user(user):
         return True
-    return _get_membership(user, team) is not None
+    return _get_role(user, team) is not None
 
 
 def can_create_decision(user: AbstractBaseUser, team: Team) -> bool:
@@ -51,8 +54,7 @@ def can_create_decision(user: AbstractBaseUser, team: Team) -> bool:
     if _is_admin_user(user):
         return True
 
-    member = _get_membership(user, team)
-    return _role_in(member, ("admin", "decision_maker", "reviewer", "member", "owner"))
+    return _role_in(_get_role(user, team), CREATE_ROLES)
 
 
 def can_view_decision(user: AbstractBaseUser, decision: Decision) -> bool:
@@ -61,11 +63,11 @@ def can_view_decision(user: AbstractBaseUser, decision: Decision) -> bool:
     if _is_admin_user(user):
         return True
 
-    team = getattr(decision, "team", None)
-    if team is None:
+    team_id = getattr(decision, "team_id", None)
+    if team_id is None:
         return False
 
-    return _get_membership(user, team) is not None
+    return _get_role(user, team_id) is not None
 
 
 def can_edit_decision(user: AbstractBaseUser, decision: Decision) -> bool:
@@ -75,13 +77,12 @@ def can_edit_decision(user: AbstractBaseUser, decision: Decision) -> bool:
         return True
 
     try:
-        if decision.created_by_id == getattr(user, "id", None) and decision.status in ("draft", "review"):
+        if decision.created_by_id == getattr(user, "id", None) and decision.status in AUTHOR_EDITABLE_STATUSES:
             return True
     except Exception:
         pass
 
-    member = _get_membership(user, decision.team)
-    return _role_in(member, ("admin", "decision_maker", "owner"))
+    return _role_in(_get_role(user, decision.team_id), EDIT_ROLES)
 
 
 def can_review_decision(user: AbstractBaseUser, decision: Decision) -> bool:
@@ -90,5 +91,67 @@ def can_review_decision(user: AbstractBaseUser, decision: Decision) -> bool:
     if _is_admin_user(user):
         return True
 
-    member = _get_membership(user, decision.team)
-    return _role_in(member, ("admin", "decision_maker", "reviewer", "owner"))
+    return _role_in(_get_role(user, decision.team_id), REVIEW_ROLES)
+
+
+# =========================
+# Queryset-level authorization
+# =========================
+#
+# Bulk counterparts of the can_* checks above. Each returns the given
+# queryset (all rows by default) narrowed by a single
+# ``team_id IN (SELECT team_id FROM teammember ...)`` predicate, which
+# needs no DISTINCT and can use the team index.
+
+def _team_ids(user: AbstractBaseUser, roles: Optional[tuple[str, ...]] = None) -> QuerySet:
+    qs = TeamMember.objects.filter(user_id=user.pk)
+    if roles is not None:
+        qs = qs.filter(role__in=roles)
+    return qs.values("team_id")
+
+
+def visible_teams(user: AbstractBaseUser, queryset: Optional[QuerySet] = None, roles: Optional[tuple[str, ...]] = None) -> QuerySet:
+    """Teams the user belongs to, optionally only those where they hold one of ``roles``."""
+    qs = Team.objects.all() if queryset is None else queryset
+    if not _is_authenticated(user):
+        return qs.none()
+    if _is_admin_user(user):
+        return qs
+    return qs.filter(pk__in=_team_ids(user, roles))
+
+
+def visible_team_ids(user: AbstractBaseUser) -> list[int]:
+    """Ids of ``visible_teams(user)``; members are resolved in memory."""
+    if not _is_authenticated(user):
+        return []
+    if _is_admin_user(user):
+        return list(Team.objects.values_list("pk", flat=True))
+    return get_resolver(user).team_ids()
+
+
+def visible_decisions(user: AbstractBaseUser, queryset: Optional[QuerySet] = None) -> QuerySet:
+    qs = Decision.objects.all() if queryset is None else queryset
+    if not _is_authenticated(user):
+        return qs.none()
+    if _is_admin_user(user):
+        return qs
+    return qs.filter(team_id__in=_team_ids(user))
+
+
+def editable_decisions(user: AbstractBaseUser, queryset: Optional[QuerySet] = None) -> QuerySet:
+    qs = Decision.objects.all() if queryset is None else queryset
+    if not _is_authenticated(user):
+        return qs.none()
+    if _is_admin_user(user):
+        return qs
+    own_open = Q(created_by_id=user.pk, status__in=AUTHOR_EDITABLE_STATUSES, team_id__in=_team_ids(user))
+    return qs.filter(Q(team_id__in=_team_ids(user, EDIT_ROLES)) | own_open)
+
+
+def reviewable_decisions(user: AbstractBaseUser, queryset: Optional[QuerySet] = None) -> QuerySet:
+    qs = Decision.objects.all() if queryset is None else queryset
+    if not _is_authenticated(user):
+        return qs.none()
+    if _is_admin_user(user):
+        return qs
+    return qs.filter(team_id__in=_team_ids(user, REVIEW_ROLES))
@@ -0,0 +1,170 @@
+"""Token-budgeted decision context for LLM prompts.
+
+``load_sections`` collects what the model should know about a decision:
+its description, options (with pros/cons), template field values and the
+most recent comments, in three queries. ``PromptBuilder.pack`` fits them
+into ``AI_PROMPT_TOKEN_BUDGET`` tokens:
+
+* if everything fits, the sections are used verbatim;
+* otherwise the body is split into chunks of ``AI_PROMPT_CHUNK_TOKENS`` that
+  ``AIService`` condenses in parallel (map) and merges into one brief
+  (reduce), repeating the reduce for very long material.
+
+Whatever happens, ``fit`` truncates the result to the budget, so the size of
+a prompt never depends on how long a decision has grown.
+
+Tokens are estimated locally (about four characters per token, or 4/3 per
+word for text of many short words); no tokenizer is needed.
+"""
+from __future__ import annotations
+
+import math
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+from .models import DecisionComment, DecisionOption, TemplateFieldValue
+
+DEFAULT_TOKEN_BUDGET = 3000
+DEFAULT_CHUNK_TOKENS = 1500
+DEFAULT_MAX_COMMENTS = 20
+TRUNCATION_MARK = "\n[…truncated]"
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), math.ceil(len(text.split()) * 4 / 3))
+
+
+def fit(text: str, max_tokens: int) -> str:
+    """``text`` cut to at most ``max_tokens`` (estimated), at a line or word boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - estimate_tokens(TRUNCATION_MARK)
+    if budget <= 0:
+        return ""
+    # binary search on the prefix length, then back off to a boundary
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(text[:mid]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    cut = text[:low]
+    boundary = max(cut.rfind("\n"), cut.rfind(" "))
+    if boundary > low // 2:
+        cut = cut[:boundary]
+    return cut.rstrip() + TRUNCATION_MARK
+
+
+def split_chunks(text: str, chunk_tokens: int) -> list[str]:
+    """Consecutive pieces of ``text`` of at most ``chunk_tokens`` each, split at lines."""
+    chunks, current, size = [], [], 0
+    for line in text.splitlines():
+        tokens = estimate_tokens(line) + 1
+        if tokens > chunk_tokens:
+            # a single huge line (e.g. a pasted document): split by words,
+            # and words that are still too long (base64, URLs) by characters
+            words = line.split(" ")
+            step = max(1, len(words) * chunk_tokens // (tokens * 2))
+            pieces = []
+            for i in range(0, len(words), step):
+                piece = " ".join(words[i:i + step])
+                width = chunk_tokens * 2
+                pieces.extend(piece[j:j + width] for j in range(0, len(piece), width))
+        else:
+            pieces = [line]
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece) + 1
+            if current and size + piece_tokens > chunk_tokens:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += piece_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return [fit(chunk, chunk_tokens) for chunk in chunks if chunk.strip()]
+
+
+class Section(NamedTuple):
+    heading: str
+    text: str
+
+
+def render(sections: list[Section]) -> str:
+    return "\n\n".join(f"## {s.heading}\n{s.text.strip()}" for s in sections if s.text.strip())
+
+
+def _money(value) -> str:
+    return f"{value:,.2f}" if value is not None else ""
+
+
+def load_sections(decision, max_comments: Optional[int] = None) -> list[Section]:
+    """Description, options, template values and recent comments of ``decision``."""
+    if max_comments is None:
+        max_comments = getattr(settings, "AI_PROMPT_MAX_COMMENTS", DEFAULT_MAX_COMMENTS)
+    sections = [Section("Description", decision.description or "")]
+    if not decision.pk:
+        return sections
+
+    options = []
+    for option in DecisionOption.objects.filter(decision=decision).order_by("id"):
+        lines = [f"- {option.title}{' (selected)' if option.is_selected else ''}: {option.description.strip()}"]
+        if option.pros.strip():
+            lines.append(f"  Pros: {option.pros.strip()}")
+        if option.cons.strip():
+            lines.append(f"  Cons: {option.cons.strip()}")
+        extra = ", ".join(filter(None, [
+            f"cost {_money(option.estimated_cost)}" if option.estimated_cost is not None else "",
+            f"time {option.estimated_time}" if option.estimated_time else "",
+            f"{option.votes} votes" if option.votes else "",
+        ]))
+        if extra:
+            lines.append(f"  ({extra})")
+        options.append("\n".join(lines))
+    sections.append(Section("Options", "\n".join(options)))
+
+    values = (
+        TemplateFieldValue.objects.filter(decision=decision)
+        .select_related("field")
+        .order_by("field__order", "field__id")
+    )
+    sections.append(Section("Template fields", "\n".join(
+        f"- {v.field.label}: {v.value.strip()}" for v in values if v.value.strip()
+    )))
+
+    comments = list(
+        DecisionComment.objects.filter(decision=decision)
+        .select_related("user")
+        .order_by("-created_at", "-id")[:max_comments]
+    )
+    sections.append(Section("Recent comments", "\n".join(
+        f"- {c.user.username} ({c.created_at:%Y-%m-%d}): {c.text.strip()}" for c in reversed(comments)
+    )))
+    return sections
+
+
+class Packed(NamedTuple):
+    text: str
+    # body chunks still to be condensed; empty when ``text`` is final
+    chunks: list[str]
+
+
+class PromptBuilder:
+    def __init__(self, budget: Optional[int] = None, chunk_tokens: Optional[int] = None):
+        self.budget = budget or getattr(settings, "AI_PROMPT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)
+        self.chunk_tokens = min(
+            chunk_tokens or getattr(settings, "AI_PROMPT_CHUNK_TOKENS", DEFAULT_CHUNK_TOKENS),
+            self.budget,
+        )
+
+    def pack(self, sections: list[Section]) -> Packed:
+        text = render(sections)
+        if estimate_tokens(text) <= self.budget:
+            return Packed(text, [])
+        return Packed("", split_chunks(text, self.chunk_tokens))
+
+    def fit(self, text: str) -> str:
+        return fit(text, self.budget)
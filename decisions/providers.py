@@ -0,0 +1,357 @@
+"""LLM providers behind ``AIService``.
+
+A provider turns a chat completion request (``{"model", "messages",
+"temperature", ["response_format"]}``) into a ``Completion``. The one in use
+is ``settings.AI_PROVIDER`` (dotted path) built with
+``settings.AI_PROVIDER_OPTIONS``:
+
+* ``OpenAIProvider`` – the OpenAI API (default).
+* ``FakeProvider`` – offline and deterministic: latency, failures and
+  content are derived from a hash of the request and ``seed``, so the
+  same request behaves the same way on every run and in every thread.
+* ``ReplayProvider`` – serves completions recorded in a JSON fixture file;
+  with ``record=True`` misses go to an inner provider and are added to the
+  fixture.
+
+Providers only talk to the model. Caching, budgets, the circuit breaker
+and async deadlines stay in ``AIService``; the sync ``complete`` gets its
+deadline as ``timeout`` because a blocking call cannot be abandoned.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import AsyncIterator, NamedTuple, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .ai_cache import completion_key
+from .prompts import estimate_tokens
+
+DEFAULT_PROVIDER = "decisions.providers.OpenAIProvider"
+
+
+class Completion(NamedTuple):
+    content: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class ProviderError(Exception):
+    pass
+
+
+class ProviderTimeout(ProviderError):
+    pass
+
+
+class ReplayMiss(ProviderError):
+    """No recorded completion for the request."""
+
+
+class Provider:
+    name = "base"
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @property
+    def async_available(self) -> bool:
+        return self.available
+
+    def complete(self, request: dict, timeout: float) -> Completion:
+        raise NotImplementedError
+
+    async def acomplete(self, request: dict) -> Completion:
+        raise NotImplementedError
+
+    async def astream(self, request: dict) -> AsyncIterator[str]:
+        """Text chunks of the completion as they arrive."""
+        completion = await self.acomplete(request)
+        yield completion.content
+
+
+def get_provider() -> Provider:
+    path = getattr(settings, "AI_PROVIDER", DEFAULT_PROVIDER)
+    return import_string(path)(**getattr(settings, "AI_PROVIDER_OPTIONS", {}))
+
+
+def _prompt_tokens(request: dict) -> int:
+    return sum(estimate_tokens(m.get("content") or "") for m in request["messages"])
+
+
+# =========================
+# OpenAI
+# =========================
+
+class OpenAIProvider(Provider):
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key
+        self._client = None
+        self._async_client = None
+
+    @property
+    def client(self):
+        """Lazy load OpenAI client"""
+        if self._client is None:
+            try:
+                from openai import OpenAI
+                api_key = self.api_key or os.getenv('OPENAI_API_KEY', 'dummy-key')
+                # No client-side retries: a retry would multiply the deadline.
+                self._client = OpenAI(api_key=api_key, max_retries=0)
+            except Exception as e:
+                print(f"OpenAI client initialization failed: {e}")
+                self._client = None
+        return self._client
+
+    @property
+    def async_client(self):
+        """Lazy load AsyncOpenAI client (None without an API key)"""
+        api_key = self.api_key or os.getenv('OPENAI_API_KEY')
+        if self._async_client is None and api_key:
+            try:
+                from openai import AsyncOpenAI
+                self._async_client = AsyncOpenAI(api_key=api_key, max_retries=0)
+            except Exception as e:
+                print(f"AsyncOpenAI client initialization failed: {e}")
+                self._async_client = None
+        return self._async_client
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+    @property
+    def async_available(self) -> bool:
+        return self.async_client is not None
+
+    @staticmethod
+    def _completion(response) -> Completion:
+        usage = response.usage
+        return Completion(
+            response.choices[0].message.content,
+            getattr(usage, "prompt_tokens", 0) or 0,
+            getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+    def complete(self, request: dict, timeout: float) -> Completion:
+        return self._completion(self.client.chat.completions.create(timeout=timeout, **request))
+
+    async def acomplete(self, request: dict) -> Completion:
+        return self._completion(await self.async_client.chat.completions.create(**request))
+
+    async def astream(self, request: dict) -> AsyncIterator[str]:
+        stream = await self.async_client.chat.completions.create(stream=True, **request)
+        try:
+            async for chunk in stream:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    yield text
+        finally:
+            await stream.close()
+
+
+# =========================
+# Fake
+# =========================
+
+class FakeProvider(Provider):
+    """Deterministic offline provider.
+
+    ``latency`` is the median seconds per call; ``jitter`` spreads it
+    (``distribution`` ``"constant"``, ``"uniform"`` ±jitter·latency, or
+    ``"lognormal"`` with sigma ``jitter``). ``failure_rate`` of the calls
+    raise ``ProviderError`` after the latency, ``timeout_rate`` of them hang
+    until the deadline and raise ``ProviderTimeout``.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        distribution: str = "constant",
+        failure_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        seed: int = 0,
+        stream_interval: float = 0.01,
+    ):
+        if distribution not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"unknown latency distribution: {distribution}")
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.failure_rate = failure_rate
+        self.timeout_rate = timeout_rate
+        self.seed = seed
+        self.stream_interval = stream_interval
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _plan(self, request: dict) -> tuple[random.Random, float, str]:
+        """(rng, latency, fate) of a request; fate is "ok", "error" or "timeout"."""
+        with self._lock:
+            self.calls += 1
+        digest = hashlib.sha256(f"{self.seed}:{completion_key(request)}".encode()).digest()
+        rng = random.Random(digest)
+        if self.distribution == "uniform":
+            latency = self.latency * (1 + self.jitter * (2 * rng.random() - 1))
+        elif self.distribution == "lognormal":
+            latency = self.latency * math.exp(rng.gauss(0, self.jitter))
+        else:
+            latency = self.latency
+        roll = rng.random()
+        fate = "timeout" if roll < self.timeout_rate else "error" if roll < self.timeout_rate + self.failure_rate else "ok"
+        return rng, max(0.0, latency), fate
+
+    def _content(self, request: dict, rng: random.Random) -> str:
+        tag = hashlib.sha256(completion_key(request).encode()).hexdigest()[:8]
+        if not request.get("response_format"):
+            prompt = request["messages"][-1]["content"]
+            words = " ".join(prompt.split()[:40])
+            return f"Fake completion {tag}. {words}"
+        # one JSON document that satisfies every structured prompt of AIService
+        return json.dumps({
+            "insights": [f"Insight {tag}-{i}" for i in range(3)],
+            "risks": [f"Risk {tag}-{i}" for i in range(2)],
+            "recommendations": [f"Recommendation {tag}-{i}" for i in range(3)],
+            "score": rng.randint(40, 95),
+            "missing_information": [],
+            "questions": [f"Question {tag}?"],
+            "suggested_improvements": [f"Improvement {tag}"],
+            "alternatives": [
+                {
+                    "title": f"Alternative {tag}-{i}",
+                    "description": "Generated offline.",
+                    "pros": ["cheap"],
+                    "cons": ["untested"],
+                    "estimated_cost": rng.randint(1, 100) * 1000,
+                    "estimated_time": f"{rng.randint(1, 12)} weeks",
+                }
+                for i in range(1, 4)
+            ],
+            "options": [],
+        })
+
+    def _completion(self, request: dict, rng: random.Random) -> Completion:
+        content = self._content(request, rng)
+        return Completion(content, _prompt_tokens(request), estimate_tokens(content))
+
+    def complete(self, request: dict, timeout: float) -> Completion:
+        rng, latency, fate = self._plan(request)
+        if fate == "timeout" or latency > timeout:
+            time.sleep(timeout)
+            raise ProviderTimeout(f"no response within {timeout}s")
+        time.sleep(latency)
+        if fate == "error":
+            raise ProviderError("injected failure")
+        return self._completion(request, rng)
+
+    async def acomplete(self, request: dict) -> Completion:
+        rng, latency, fate = self._plan(request)
+        if fate == "timeout":
+            # the caller's deadline ends this
+            await asyncio.Event().wait()
+        await asyncio.sleep(latency)
+        if fate == "error":
+            raise ProviderError("injected failure")
+        return self._completion(request, rng)
+
+    async def astream(self, request: dict) -> AsyncIterator[str]:
+        completion = await self.acomplete(request)
+        for i, word in enumerate(completion.content.split(" ")):
+            if i:
+                await asyncio.sleep(self.stream_interval)
+            yield word if i == 0 else " " + word
+
+
+# =========================
+# Record / replay
+# =========================
+
+class ReplayProvider(Provider):
+    """Completions from a JSON fixture keyed by request hash.
+
+    The fixture maps the hash of each request to ``{"content",
+    "prompt_tokens", "completion_tokens"}``. With ``record=True`` a miss is
+    completed by ``inner`` (a dotted provider path, built with
+    ``inner_options``) and written back to the fixture.
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        path: str,
+        record: bool = False,
+        inner: str = DEFAULT_PROVIDER,
+        inner_options: Optional[dict] = None,
+        latency: float = 0.0,
+    ):
+        self.path = path
+        self.record = record
+        self.latency = latency
+        self.inner = import_string(inner)(**(inner_options or {})) if record else None
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.fixtures: dict[str, dict] = json.load(f)
+        except FileNotFoundError:
+            if not record:
+                raise
+            self.fixtures = {}
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    @staticmethod
+    def key(request: dict) -> str:
+        return completion_key(request).rsplit(":", 1)[-1]
+
+    def _lookup(self, request: dict) -> Optional[Completion]:
+        item = self.fixtures.get(self.key(request))
+        if item is None:
+            return None
+        return Completion(item["content"], item.get("prompt_tokens", 0), item.get("completion_tokens", 0))
+
+    def _store(self, request: dict, completion: Completion) -> None:
+        with self._lock:
+            self.fixtures[self.key(request)] = completion._asdict()
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.fixtures, f, indent=1, sort_keys=True, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+    def complete(self, request: dict, timeout: float) -> Completion:
+        completion = self._lookup(request)
+        if completion is not None:
+            time.sleep(self.latency)
+            return completion
+        if not self.record:
+            raise ReplayMiss(f"no recorded completion for {self.key(request)}")
+        completion = self.inner.complete(request, timeout)
+        self._store(request, completion)
+        return completion
+
+    async def acomplete(self, request: dict) -> Completion:
+        completion = self._lookup(request)
+        if completion is not None:
+            await asyncio.sleep(self.latency)
+            return completion
+        if not self.record:
+            raise ReplayMiss(f"no recorded completion for {self.key(request)}")
+        completion = await self.inner.acomplete(request)
+        self._store(request, completion)
+        return completion
@@ -0,0 +1,213 @@
+"""Pluggable publish/subscribe for pushing events to open connections.
+
+Publishers are ordinary (sync) request code; subscribers are async views
+holding a long-lived response, e.g. the notification SSE stream. The
+backend is chosen by ``settings.DECISIONS_PUBSUB_BACKEND`` (dotted path):
+
+* ``InProcessBroker`` – fan-out inside one process. Fine for tests, runserver
+  and single-node deployments.
+* ``RedisBroker`` – Redis pub/sub, for several workers or hosts. Each
+  process holds one Redis connection per event loop, however many clients
+  are subscribed, and dispatches to them locally.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = "decisions.pubsub.InProcessBroker"
+# Per-subscriber backlog; a client that falls this far behind loses the
+# oldest events (the unread count is resent on reconnect anyway).
+QUEUE_SIZE = 100
+
+
+def user_channel(user_id) -> str:
+    return f"notifications:user:{user_id}"
+
+
+def sse_event(event: str, data) -> str:
+    """One Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class Subscription:
+    """Queue of messages for one subscriber, bound to its event loop.
+
+    Use as ``async with broker.subscribe(channel) as sub``; leaving the block
+    unsubscribes.
+    """
+
+    def __init__(self, broker: "InProcessBroker", channel: str, maxsize: int = QUEUE_SIZE):
+        self.broker = broker
+        self.channel = channel
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+
+    async def __aenter__(self) -> "Subscription":
+        self.loop = asyncio.get_running_loop()
+        self.broker._add(self)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.broker._remove(self)
+
+    def _put(self, message: Any) -> None:
+        # runs on self.loop
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    def deliver(self, message: Any) -> None:
+        """Thread-safe: may be called from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # loop closed; the subscriber is gone
+
+    async def get(self, timeout: Optional[float] = None) -> Any:
+        """Next message, or ``None`` after ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broker:
+    def publish(self, channel: str, message: Any) -> None:
+        raise NotImplementedError
+
+    def publish_many(self, items: Iterable[tuple[str, Any]]) -> None:
+        for channel, message in items:
+            self.publish(channel, message)
+
+    def subscribe(self, channel: str) -> Subscription:
+        raise NotImplementedError
+
+
+class InProcessBroker(Broker):
+    def __init__(self):
+        self._subscribers: dict[str, set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def _add(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subscribers[sub.channel].add(sub)
+
+    def _remove(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.channel]
+
+    def dispatch(self, channel: str, message: Any) -> None:
+        with self._lock:
+            subs = list(self._subscribers.get(channel, ()))
+        for sub in subs:
+            sub.deliver(message)
+
+    def publish(self, channel: str, message: Any) -> None:
+        self.dispatch(channel, message)
+
+    def subscriber_count(self, channel: Optional[str] = None) -> int:
+        with self._lock:
+            if channel is not None:
+                return len(self._subscribers.get(channel, ()))
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, channel: str) -> Subscription:
+        return Subscription(self, channel)
+
+
+class RedisBroker(InProcessBroker):
+    """Redis pub/sub with local fan-out.
+
+    Every process pattern-subscribes once (per event loop) to all channels
+    under ``prefix`` and hands messages to its own subscribers.
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "decisions:pubsub:"):
+        super().__init__()
+        self.url = url or settings.REDIS_URL
+        self.prefix = prefix
+        self._client = None
+        self._readers: dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+    def _sync_client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self.url)
+        return self._client
+
+    def publish(self, channel: str, message: Any) -> None:
+        self._sync_client().publish(self.prefix + channel, json.dumps(message, default=str))
+
+    def publish_many(self, items: Iterable[tuple[str, Any]]) -> None:
+        pipe = self._sync_client().pipeline(transaction=False)
+        for channel, message in items:
+            pipe.publish(self.prefix + channel, json.dumps(message, default=str))
+        pipe.execute()
+
+    async def _read(self) -> None:
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.psubscribe(self.prefix + "*")
+            async for item in pubsub.listen():
+                if item.get("type") != "pmessage":
+                    continue
+                channel = item["channel"].decode()[len(self.prefix):]
+                self.dispatch(channel, json.loads(item["data"]))
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+    def _ensure_reader(self) -> None:
+        loop = asyncio.get_running_loop()
+        task = self._readers.get(loop)
+        if task is None or task.done():
+            self._readers[loop] = loop.create_task(self._read())
+
+    def _add(self, sub: Subscription) -> None:
+        self._ensure_reader()
+        super()._add(sub)
+
+
+_broker: Optional[Broker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> Broker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, "DECISIONS_PUBSUB_BACKEND", DEFAULT_BACKEND)
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish_on_commit(items: Iterable[tuple[str, Any]]) -> None:
+    """Publish ``(channel, message)`` pairs once the transaction commits."""
+    items = list(items)
+    if not items:
+        return
+
+    def send():
+        try:
+            get_broker().publish_many(items)
+        except Exception:
+            pass  # live updates are best effort; the page still shows everything
+
+    transaction.on_commit(send)
@@ -0,0 +1,240 @@
+"""Heuristic decision quality: one declarative rule set.
+
+A rule is a named predicate over a handful of *features* of a decision
+(description length, option count, owner, due date, tags, priority and two
+keyword flags) with a penalty; the score is 100 minus the penalties of the
+failing rules.
+
+Features are computed either in SQL for a whole queryset in one query
+(``feature_queryset``) or from a single instance (``features_for``); the
+rules themselves exist only once. The score is stored in the indexed
+``Decision.quality_score`` column, kept current on save (see signals.py),
+so lists can sort and filter by quality without per-row work.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from django.db.models import BooleanField, Case, Count, IntegerField, OuterRef, Q, QuerySet, Subquery, Value, When
+from django.db.models.functions import Coalesce, Length, Trim
+from django.db.models.lookups import GreaterThan
+
+MIN_CONTEXT_LENGTH = 80
+HIGH_PRIORITIES = ("high", "critical")
+ALTERNATIVE_KEYWORDS = ("alternative",)  # also matches "Alternativen"
+RISK_KEYWORDS = ("risk", "risik")
+
+FEATURES = (
+    "description_length",
+    "options_count",
+    "mentions_alternatives",
+    "mentions_risks",
+    "has_owner",
+    "has_due_date",
+    "has_tags",
+    "priority",
+)
+
+
+class Rule(NamedTuple):
+    name: str
+    penalty: int
+    passes: Callable[[dict], bool]
+    item: str
+    why: str
+    question: Optional[str] = None
+    improvement: Optional[str] = None
+
+
+RULES = (
+    Rule(
+        "context", 15,
+        lambda f: f["description_length"] >= MIN_CONTEXT_LENGTH,
+        "Insufficient context / detail",
+        "The description is quite short; reviewers may not have enough context to assess impact and trade-offs.",
+        "What is the concrete problem statement and desired outcome?",
+        "Expand the description with context, constraints, and a clear success criterion.",
+    ),
+    Rule(
+        "alternatives", 25,
+        lambda f: f["options_count"] > 0 or f["mentions_alternatives"],
+        "Alternatives / options",
+        "No options were listed. Decisions are stronger when alternatives and trade-offs are explicit.",
+        "Which alternatives were considered (at least 2), and why were they rejected?",
+        "Add 2–3 alternatives with pros/cons and a short rationale.",
+    ),
+    Rule(
+        "owner", 10,
+        lambda f: f["has_owner"],
+        "Responsible owner",
+        "There is no assignee/owner to drive the decision to completion.",
+        "Who is responsible for implementing and tracking this decision?",
+        "Assign an owner so follow-up tasks and accountability are clear.",
+    ),
+    Rule(
+        "deadline", 5,
+        lambda f: f["has_due_date"],
+        "Deadline",
+        "No due date is set. Without a deadline, reviews and implementation often stall.",
+        "By when does this decision need to be approved/implemented?",
+        "Set a realistic due date to prevent the decision from stalling.",
+    ),
+    Rule(
+        "tags", 5,
+        lambda f: f["has_tags"],
+        "Tags / classification",
+        "Tags help find decisions later (search, reporting, reuse).",
+        None,
+        "Add 1–3 tags to classify the decision (e.g., 'tech-stack', 'hiring', 'budget').",
+    ),
+    Rule(
+        "risks", 10,
+        lambda f: f["priority"] not in HIGH_PRIORITIES or f["mentions_risks"],
+        "Risk assessment",
+        "High priority decision without described risks or downsides.",
+        "What are the top 3 risks and a mitigation/rollback plan?",
+        "Describe the main risks, costs and a rollback plan.",
+    ),
+)
+
+
+# =========================
+# Features
+# =========================
+
+def _mentions(text: str, keywords: Iterable[str]) -> bool:
+    text = text.lower()
+    return any(k in text for k in keywords)
+
+
+def features_for(decision, options_count: int) -> dict:
+    # strip(" ") mirrors SQL TRIM(), which only removes spaces
+    description = (decision.description or "").strip(" ")
+    return {
+        "description_length": len(description),
+        "options_count": options_count,
+        "mentions_alternatives": _mentions(description, ALTERNATIVE_KEYWORDS),
+        "mentions_risks": _mentions(description, RISK_KEYWORDS),
+        "has_owner": decision.assigned_to_id is not None,
+        "has_due_date": decision.due_date is not None,
+        "has_tags": bool((decision.tags or "").strip(" ")),
+        "priority": decision.priority,
+    }
+
+
+def _keyword_flag(keywords: Iterable[str]) -> Case:
+    condition = Q()
+    for keyword in keywords:
+        condition |= Q(description__icontains=keyword)
+    return Case(When(condition, then=Value(True)), default=Value(False), output_field=BooleanField())
+
+
+def _present(field: str) -> Case:
+    return Case(When(**{f"{field}__isnull": True}, then=Value(False)), default=Value(True), output_field=BooleanField())
+
+
+def _non_blank(field: str) -> Case:
+    return Case(When(GreaterThan(Length(Trim(field)), 0), then=Value(True)), default=Value(False), output_field=BooleanField())
+
+
+def feature_queryset(queryset: QuerySet) -> QuerySet:
+    """``(pk, quality_score, *FEATURES)`` rows for ``queryset``, in one query."""
+    option_model = queryset.model._meta.get_field("options").related_model
+    options = (
+        option_model.objects.filter(decision=OuterRef("pk"))
+        .order_by()
+        .values("decision")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    return (
+        queryset.order_by()
+        .annotate(
+            q_description_length=Length(Trim("description")),
+            q_options_count=Coalesce(Subquery(options, output_field=IntegerField()), 0),
+            q_mentions_alternatives=_keyword_flag(ALTERNATIVE_KEYWORDS),
+            q_mentions_risks=_keyword_flag(RISK_KEYWORDS),
+            q_has_owner=_present("assigned_to"),
+            q_has_due_date=_present("due_date"),
+            q_has_tags=_non_blank("tags"),
+        )
+        .values_list(
+            "pk",
+            "quality_score",
+            "q_description_length",
+            "q_options_count",
+            "q_mentions_alternatives",
+            "q_mentions_risks",
+            "q_has_owner",
+            "q_has_due_date",
+            "q_has_tags",
+            "priority",
+        )
+    )
+
+
+# =========================
+# Scoring
+# =========================
+
+def failing_rules(features: dict) -> list[Rule]:
+    return [rule for rule in RULES if not rule.passes(features)]
+
+
+def _score(failing: list[Rule]) -> int:
+    return max(0, min(100, 100 - sum(rule.penalty for rule in failing)))
+
+
+def score(features: dict) -> int:
+    return _score(failing_rules(features))
+
+
+def evaluate(features: dict) -> dict:
+    """Score plus the actionable findings of the failing rules."""
+    failing = failing_rules(features)
+    risks = []
+    if features["priority"] in HIGH_PRIORITIES:
+        risks.append("High priority decision: validate risks, costs, and rollback plan before implementation.")
+    return {
+        "score": _score(failing),
+        "missing_information": [{"item": rule.item, "why": rule.why} for rule in failing],
+        "questions": [rule.question for rule in failing if rule.question],
+        "risks": risks,
+        "suggested_improvements": [rule.improvement for rule in failing if rule.improvement],
+    }
+
+
+def compute_score(decision, options_count: Optional[int] = None) -> int:
+    """Score of one instance; counts its options unless given."""
+    if options_count is None:
+        options_count = decision.options.count() if decision.pk else 0
+    return score(features_for(decision, options_count))
+
+
+def recompute_scores(queryset: QuerySet, chunk_size: int = 2000) -> int:
+    """Recompute ``quality_score`` for ``queryset``; returns rows changed.
+
+    One streaming SELECT computes all features; changed rows are written
+    with one UPDATE per distinct score (at most ~100) per chunk.
+    """
+    changed = 0
+    pending: dict[int, list] = defaultdict(list)
+    pending_count = 0
+
+    def flush():
+        for value, pks in pending.items():
+            queryset.model._base_manager.filter(pk__in=pks).update(quality_score=value)
+        pending.clear()
+
+    for pk, stored, *values in feature_queryset(queryset).iterator(chunk_size=chunk_size):
+        value = score(dict(zip(FEATURES, values)))
+        if value != stored:
+            pending[value].append(pk)
+            pending_count += 1
+            changed += 1
+        if pending_count >= chunk_size:
+            flush()
+            pending_count = 0
+    flush()
+    return changed
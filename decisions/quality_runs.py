@@ -0,0 +1,191 @@
+"""Batch quality scoring of open decisions.
+
+A ``QualityScoreRun`` walks a team's (or every team's) open decisions in id
+order, in chunks. Per chunk it
+
+1. loads the decisions with their option counts and the stored input
+   hashes in two queries,
+2. skips decisions whose inputs are unchanged since their last score,
+3. scores the rest on a bounded thread pool (the LLM call is the slow part
+   and needs no database connection),
+4. upserts the scores and advances the run's checkpoint in one transaction.
+
+Killing a run therefore loses at most one chunk; starting again with
+``resume`` continues after the checkpoint. A run still marked running
+whose checkpoint has not moved for ``STALE_AFTER`` was orphaned (crash,
+deploy) and may be claimed again with ``claim_stale``.
+"""
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, NamedTuple, Optional
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .ai_service import ai_service
+from .models import Decision, DecisionQualityScore, QualityScoreRun, Team
+
+OPEN_STATUSES = ("draft", "review", "approved")
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 50
+# well above the time one chunk of AI calls takes
+STALE_AFTER = timedelta(minutes=10)
+
+# One background run per process is plenty; the run itself is parallel.
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="quality-run")
+
+
+class Outcome(NamedTuple):
+    decision_id: int
+    result: dict
+    input_hash: str
+    error: str
+
+
+def _score(item: tuple[Decision, str]) -> Outcome:
+    decision, input_hash = item
+    baseline = ai_service.heuristic_quality(decision, decision.options_count)
+    if not ai_service.client:
+        return Outcome(decision.pk, baseline, input_hash, "")
+    try:
+        return Outcome(decision.pk, ai_service.enrich_quality(baseline, decision, decision.options_count), input_hash, "")
+    except Exception as e:
+        # keep the heuristic score, but no hash: retried next run
+        return Outcome(decision.pk, baseline, "", str(e) or e.__class__.__name__)
+
+
+def start_run(team: Optional[Team] = None, user=None, resume: bool = True) -> QualityScoreRun:
+    """The unfinished run for this scope when resuming, else a new one."""
+    if resume:
+        run = (
+            QualityScoreRun.objects.filter(team=team, status__in=("running", "failed"))
+            .order_by("-started_at")
+            .first()
+        )
+        if run is not None:
+            if run.status != "running":
+                run.status = "running"
+                run.save(update_fields=["status"])
+            return run
+    return QualityScoreRun.objects.create(team=team, started_by=user)
+
+
+def is_stale(run: QualityScoreRun, older_than: timedelta = STALE_AFTER) -> bool:
+    return run.status == "running" and run.updated_at < timezone.now() - older_than
+
+
+def claim_stale(run: QualityScoreRun) -> bool:
+    """Take over an orphaned run; exactly one caller wins (conditional UPDATE)."""
+    now = timezone.now()
+    claimed = QualityScoreRun.objects.filter(pk=run.pk, status="running", updated_at=run.updated_at).update(updated_at=now)
+    if claimed:
+        run.updated_at = now
+    return bool(claimed)
+
+
+def _save_chunk(run: QualityScoreRun, outcomes: list[Outcome], checkpoint: int, skipped: int, elapsed: float) -> None:
+    now = timezone.now()
+    scores = [
+        DecisionQualityScore(
+            decision_id=o.decision_id,
+            run=run,
+            score=o.result.get("score", 0),
+            result=o.result,
+            input_hash=o.input_hash,
+            error=o.error,
+            scored_at=now,
+        )
+        for o in outcomes
+    ]
+    with transaction.atomic():
+        if scores:
+            DecisionQualityScore.objects.bulk_create(
+                scores,
+                update_conflicts=True,
+                unique_fields=["decision"],
+                update_fields=["run", "score", "result", "input_hash", "error", "scored_at"],
+            )
+        run.last_decision_id = checkpoint
+        run.processed += len(outcomes)
+        run.skipped += skipped
+        run.errors += sum(1 for o in outcomes if o.error)
+        run.elapsed_seconds += elapsed
+        run.save(update_fields=["last_decision_id", "processed", "skipped", "errors", "elapsed_seconds", "updated_at"])
+
+
+def execute_run(
+    run: QualityScoreRun,
+    workers: int = DEFAULT_WORKERS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    progress: Optional[Callable[[QualityScoreRun], None]] = None,
+) -> QualityScoreRun:
+    decisions = (
+        Decision.objects.filter(status__in=OPEN_STATUSES)
+        .annotate(options_count=Count("options"))
+        .order_by("id")
+    )
+    if run.team_id:
+        decisions = decisions.filter(team_id=run.team_id)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="quality-score") as pool:
+            while True:
+                chunk = list(decisions.filter(id__gt=run.last_decision_id)[:batch_size])
+                if not chunk:
+                    break
+                started = time.monotonic()
+
+                stored = dict(
+                    DecisionQualityScore.objects.filter(decision_id__in=[d.pk for d in chunk])
+                    .values_list("decision_id", "input_hash")
+                )
+                todo = []
+                for decision in chunk:
+                    input_hash = ai_service.quality_input_hash(decision, decision.options_count)
+                    if stored.get(decision.pk) != input_hash:
+                        todo.append((decision, input_hash))
+
+                outcomes = list(pool.map(_score, todo))
+                _save_chunk(run, outcomes, chunk[-1].pk, len(chunk) - len(todo), time.monotonic() - started)
+                if progress is not None:
+                    progress(run)
+    except Exception:
+        run.status = "failed"
+        run.save(update_fields=["status"])
+        raise
+
+    run.status = "completed"
+    run.finished_at = timezone.now()
+    run.save(update_fields=["status", "finished_at"])
+    return run
+
+
+def run_in_background(run: QualityScoreRun, **kwargs) -> None:
+    def work():
+        try:
+            execute_run(run, **kwargs)
+        except Exception as e:
+            print(f"Quality run #{run.pk} failed: {e}")
+        finally:
+            connection.close()
+
+    transaction.on_commit(lambda: _background.submit(work))
+
+
+def run_payload(run: QualityScoreRun) -> dict:
+    return {
+        "id": run.pk,
+        "team_id": run.team_id,
+        "status": run.status,
+        "processed": run.processed,
+        "skipped": run.skipped,
+        "errors": run.errors,
+        "throughput": round(run.throughput, 2),
+        "checkpoint": run.last_decision_id,
+        "started_at": run.started_at.isoformat(),
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+    }
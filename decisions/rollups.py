@@ -0,0 +1,138 @@
+"""Incremental maintenance of ``DecisionDailyRollup``.
+
+Every decision contributes to exactly one rollup row, keyed by
+(team, creation day, status, priority). When a decision is saved the old
+contribution is subtracted and the new one added; deletes subtract.
+``QuerySet.update()`` bypasses signals, so ``rebuild_rollups`` exists to
+repair any drift.
+"""
+from __future__ import annotations
+
+from typing import NamedTuple, Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Decision, DecisionDailyRollup
+
+
+class Contribution(NamedTuple):
+    team_id: int
+    day: object
+    status: str
+    priority: str
+    decided: int
+    cycle_seconds: int
+
+    @property
+    def key(self):
+        return self.team_id, self.day, self.status, self.priority
+
+
+def contribution(team_id, created_at, status, priority, decided_at) -> Optional[Contribution]:
+    if team_id is None or created_at is None:
+        return None
+    cycle = 0
+    if decided_at is not None:
+        cycle = int((decided_at - created_at).total_seconds())
+    return Contribution(
+        team_id=team_id,
+        day=timezone.localtime(created_at).date() if timezone.is_aware(created_at) else created_at.date(),
+        status=status,
+        priority=priority,
+        decided=1 if decided_at is not None else 0,
+        cycle_seconds=cycle,
+    )
+
+
+def contribution_for(decision: Decision) -> Optional[Contribution]:
+    return contribution(decision.team_id, decision.created_at, decision.status, decision.priority, decision.decided_at)
+
+
+def stored_contribution(pk) -> Optional[Contribution]:
+    """Contribution of the row currently in the database (before a save)."""
+    row = (
+        Decision.objects.filter(pk=pk)
+        .values_list("team_id", "created_at", "status", "priority", "decided_at")
+        .first()
+    )
+    return contribution(*row) if row else None
+
+
+def apply(contrib: Optional[Contribution], sign: int) -> None:
+    if contrib is None:
+        return
+    team_id, day, status, priority = contrib.key
+    deltas = {
+        "count": F("count") + sign,
+        "decided_count": F("decided_count") + sign * contrib.decided,
+        "cycle_seconds": F("cycle_seconds") + sign * contrib.cycle_seconds,
+    }
+    rows = DecisionDailyRollup.objects.filter(team_id=team_id, day=day, status=status, priority=priority)
+    if rows.update(**deltas) or sign < 0:
+        # A missing row on subtract means the table has drifted (or the team
+        # is being cascade-deleted); leave it to rebuild_rollups.
+        return
+    try:
+        with transaction.atomic():
+            DecisionDailyRollup.objects.create(
+                team_id=team_id, day=day, status=status, priority=priority,
+                count=sign, decided_count=sign * contrib.decided, cycle_seconds=sign * contrib.cycle_seconds,
+            )
+    except IntegrityError:
+        # lost the insert race; the row exists now
+        rows.update(**deltas)
+
+
+def move(old: Optional[Contribution], new: Optional[Contribution]) -> None:
+    if old == new:
+        return
+    with transaction.atomic():
+        apply(old, -1)
+        apply(new, +1)
+
+
+def rebuild_rollups(team_ids=None, batch_size: int = 1000) -> int:
+    """Recompute rollup rows from the decision table. Returns rows written."""
+    decisions = Decision.objects.all()
+    rollups = DecisionDailyRollup.objects.all()
+    if team_ids is not None:
+        decisions = decisions.filter(team_id__in=team_ids)
+        rollups = rollups.filter(team_id__in=team_ids)
+
+    grouped = (
+        decisions.order_by()
+        .annotate(day=TruncDate("created_at"))
+        .values("team_id", "day", "status", "priority")
+        .annotate(
+            n=Count("id"),
+            decided=Count("decided_at"),
+            cycle=Sum(ExpressionWrapper(F("decided_at") - F("created_at"), output_field=DurationField())),
+        )
+    )
+
+    written = 0
+    with transaction.atomic():
+        rollups.delete()
+        batch = []
+        for row in grouped.iterator():
+            cycle = row["cycle"]
+            batch.append(DecisionDailyRollup(
+                team_id=row["team_id"],
+                day=row["day"],
+                status=row["status"],
+                priority=row["priority"],
+                count=row["n"],
+                decided_count=row["decided"],
+                cycle_seconds=int(cycle.total_seconds()) if cycle else 0,
+            ))
+            if len(batch) >= batch_size:
+                DecisionDailyRollup.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            DecisionDailyRollup.objects.bulk_create(batch)
+            written += len(batch)
+    return written
@@ -0,0 +1,315 @@
+"""Ranked full-text search over decisions.
+
+Each decision has one ``SearchDocument`` with its searchable text in four
+weighted parts: title (A), tags (B), description and options (C), comments
+and template field values (D). Documents are rebuilt by ``index_decisions``
+after every change that touches that text (see decisions.signals) and can
+be rebuilt wholesale with ``manage.py rebuild_search_index``.
+
+* **PostgreSQL**: the table has a generated ``search_vector`` column
+  (weighted ``tsvector``, maintained by the database) with a GIN index;
+  queries use ``websearch_to_tsquery`` and ``ts_rank_cd``, so only matching
+  rows are read and ranked.
+* **Other databases** (SQLite in tests and development): an in-process
+  inverted index of stemmed terms, synced incrementally from documents
+  changed since the last query.
+
+Either way the query understands ``"phrases"`` (as terms), ``-excluded``
+words and AND semantics, and results are limited to the user's teams.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Iterable, NamedTuple, Optional
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .models import Decision, DecisionComment, DecisionOption, SearchDocument, TemplateFieldValue
+from .permissions import visible_decisions, visible_team_ids
+
+# must match the generated column in migration 0014
+TEXT_SEARCH_CONFIG = "english"
+# ts_rank's default weights for A, B, C, D
+WEIGHTS = {"title": 1.0, "tags": 0.4, "body": 0.2, "discussion": 0.1}
+# tsvector values are limited to 1 MB; comments are the part that grows
+MAX_FIELD_CHARS = 100_000
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+SNIPPET_CHARS = 200
+
+
+# =========================
+# Documents
+# =========================
+
+def _join(parts: Iterable[str]) -> str:
+    return "\n".join(p.strip() for p in parts if p and p.strip())[:MAX_FIELD_CHARS]
+
+
+def index_decisions(decision_ids: Iterable[int]) -> int:
+    """(Re)build the documents of ``decision_ids``; drops those of deleted decisions."""
+    ids = set(decision_ids)
+    if not ids:
+        return 0
+    options, discussion = defaultdict(list), defaultdict(list)
+    rows = DecisionOption.objects.filter(decision_id__in=ids).order_by("id")
+    for decision_id, title, description, pros, cons in rows.values_list("decision_id", "title", "description", "pros", "cons"):
+        options[decision_id].extend((title, description, pros, cons))
+    for decision_id, value in TemplateFieldValue.objects.filter(decision_id__in=ids).values_list("decision_id", "value"):
+        discussion[decision_id].append(value)
+    rows = DecisionComment.objects.filter(decision_id__in=ids).order_by("-created_at", "-id")
+    for decision_id, text in rows.values_list("decision_id", "text"):
+        discussion[decision_id].append(text)
+
+    now = timezone.now()
+    documents = [
+        SearchDocument(
+            decision_id=d["pk"],
+            team_id=d["team_id"],
+            title=d["title"],
+            tags=d["tags"],
+            body=_join([d["description"], *options[d["pk"]]]),
+            discussion=_join(discussion[d["pk"]]),
+            updated_at=now,
+        )
+        for d in Decision.objects.filter(pk__in=ids).values("pk", "team_id", "title", "tags", "description")
+    ]
+    SearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=["decision"],
+        update_fields=["team", "title", "tags", "body", "discussion", "updated_at"],
+    )
+    missing = ids - {d.decision_id for d in documents}
+    if missing:
+        SearchDocument.objects.filter(decision_id__in=missing).delete()
+        for decision_id in missing:
+            _memory_index.remove(decision_id)
+    return len(documents)
+
+
+def index_on_commit(decision_id: Optional[int]) -> None:
+    """Re-index once the surrounding transaction commits."""
+    if decision_id is not None:
+        transaction.on_commit(lambda: index_decisions([decision_id]))
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+    """Rebuild every document, ``batch_size`` decisions at a time."""
+    indexed, last = 0, 0
+    while True:
+        ids = list(Decision.objects.filter(pk__gt=last).order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return indexed
+        indexed += index_decisions(ids)
+        last = ids[-1]
+
+
+# =========================
+# Query parsing (fallback index)
+# =========================
+
+_TOKEN = re.compile(r'(-?)"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in into is it its of on or that the their this to was "
+    "were will with".split()
+)
+
+
+def _stem(word: str) -> str:
+    # a few English suffixes (and a final e), enough to match plural and
+    # verb forms both ways: pipeline(s) -> pipelin, pricing/priced -> pric
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    for suffix in ("ing", "ed", "es", "s", "e"):
+        if word.endswith(suffix) and not word.endswith("ss") and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def terms(text: str) -> list[str]:
+    return [_stem(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+
+def parse_query(query: str) -> tuple[list[str], list[str]]:
+    """(required terms, excluded terms) of a web-search style query."""
+    include, exclude = [], []
+    for negated, phrase, word in _TOKEN.findall(query):
+        if word:
+            if word.lower() == "or":
+                continue
+            negated, phrase = ("-", word[1:]) if word.startswith("-") and len(word) > 1 else ("", word)
+        (exclude if negated else include).extend(terms(phrase))
+    return list(dict.fromkeys(include)), list(dict.fromkeys(exclude))
+
+
+# =========================
+# In-process inverted index
+# =========================
+
+class InvertedIndex:
+    """Term -> {decision id: weighted term frequency}, synced from SearchDocument.
+
+    ``sync`` reads only the documents updated since the previous sync.
+    Deleted decisions are removed in this process by ``index_decisions``;
+    other processes may keep stale postings, which ``search`` drops when
+    it re-checks the hits against the database.
+    """
+
+    def __init__(self):
+        self.postings: dict[str, dict[int, float]] = defaultdict(dict)
+        self.documents: dict[int, tuple[int, tuple[str, ...]]] = {}
+        self.synced_at = None
+        self._lock = threading.Lock()
+
+    def _add(self, decision_id: int, team_id: int, fields: dict[str, str]) -> None:
+        self._remove(decision_id)
+        frequencies: dict[str, float] = defaultdict(float)
+        for field, weight in WEIGHTS.items():
+            for term in terms(fields[field]):
+                frequencies[term] += weight
+        for term, frequency in frequencies.items():
+            self.postings[term][decision_id] = frequency
+        self.documents[decision_id] = (team_id, tuple(frequencies))
+
+    def _remove(self, decision_id: int) -> None:
+        entry = self.documents.pop(decision_id, None)
+        if entry is None:
+            return
+        for term in entry[1]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(decision_id, None)
+                if not postings:
+                    del self.postings[term]
+
+    def remove(self, decision_id: int) -> None:
+        with self._lock:
+            self._remove(decision_id)
+
+    def sync(self) -> None:
+        with self._lock:
+            rows = SearchDocument.objects.order_by("updated_at")
+            if self.synced_at is not None:
+                # >=: rows written in the same instant as the last sync
+                rows = rows.filter(updated_at__gte=self.synced_at)
+            for row in rows.values("decision_id", "team_id", "updated_at", *WEIGHTS).iterator(chunk_size=2000):
+                self._add(row["decision_id"], row["team_id"], row)
+                self.synced_at = row["updated_at"]
+
+    def search(self, include: list[str], exclude: list[str], team_ids: Optional[set[int]], limit: int) -> list[tuple[int, float]]:
+        """Top ``limit`` (decision id, score) with every included term and no excluded one."""
+        with self._lock:
+            postings = [self.postings.get(term, {}) for term in include]
+            if not postings or not all(postings):
+                return []
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for p in postings[1:]:
+                candidates.intersection_update(p)
+            for term in exclude:
+                candidates.difference_update(self.postings.get(term, ()))
+            if team_ids is not None:
+                candidates = {c for c in candidates if self.documents[c][0] in team_ids}
+            total = max(len(self.documents), 1)
+            idf = [math.log(1 + total / len(p)) for p in postings]
+
+            def score(decision_id: int) -> float:
+                # saturating term frequency (BM25-like), weighted by rarity
+                return sum(w * (tf := p[decision_id]) / (tf + 1.2) for p, w in zip(postings, idf))
+
+            return heapq.nlargest(limit, ((c, score(c)) for c in candidates), key=lambda hit: (hit[1], hit[0]))
+
+
+_memory_index = InvertedIndex()
+
+
+# =========================
+# Search
+# =========================
+
+class Hit(NamedTuple):
+    decision_id: int
+    rank: float
+
+
+def _postgres_hits(documents, query: str, limit: int) -> list[Hit]:
+    column = f"{connection.ops.quote_name(SearchDocument._meta.db_table)}.search_vector"
+    tsquery = f"websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', %s)"
+    rows = (
+        documents.filter(RawSQL(f"{column} @@ {tsquery}", [query], output_field=BooleanField()))
+        # normalization 32: rank / (rank + 1), i.e. within 0..1
+        .annotate(rank=RawSQL(f"ts_rank_cd({column}, {tsquery}, 32)", [query], output_field=FloatField()))
+        .order_by("-rank", "-decision_id")
+        .values_list("decision_id", "rank")[:limit]
+    )
+    return [Hit(*row) for row in rows]
+
+
+def _memory_hits(documents, include: list[str], exclude: list[str], team_ids: set[int], limit: int) -> list[Hit]:
+    _memory_index.sync()
+    # over-fetch: postings of decisions deleted by other processes are dropped below
+    ranked = _memory_index.search(include, exclude, team_ids, limit * 2)
+    existing = set(documents.filter(decision_id__in=[d for d, _ in ranked]).values_list("decision_id", flat=True))
+    return [Hit(d, round(score, 6)) for d, score in ranked if d in existing][:limit]
+
+
+def snippet(document: SearchDocument, include: list[str]) -> str:
+    """The first line of the document that mentions a query term."""
+    wanted = set(include)
+    for text in (document.body, document.discussion):
+        for line in text.splitlines():
+            if wanted.intersection(terms(line)):
+                line = line.strip()
+                return line if len(line) <= SNIPPET_CHARS else line[:SNIPPET_CHARS].rsplit(" ", 1)[0] + "…"
+    text = document.body.strip()
+    return text[:SNIPPET_CHARS]
+
+
+def search(user, query: str, limit: int = DEFAULT_LIMIT, team_id: Optional[int] = None) -> list[dict]:
+    """Decisions visible to ``user`` that match ``query``, best first."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    include, exclude = parse_query(query)
+    if not include:
+        return []
+    # SearchDocument has the decision's team_id, so the decision rules apply as-is
+    documents = visible_decisions(user, SearchDocument.objects.all())
+    if team_id is not None:
+        documents = documents.filter(team_id=team_id)
+
+    if connection.vendor == "postgresql":
+        hits = _postgres_hits(documents, query, limit)
+    else:
+        team_ids = set(visible_team_ids(user))
+        if team_id is not None:
+            team_ids &= {team_id}
+        hits = _memory_hits(documents, include, exclude, team_ids, limit)
+
+    by_id = {
+        d.decision_id: d
+        for d in SearchDocument.objects.filter(decision_id__in=[h.decision_id for h in hits]).select_related("decision", "team")
+    }
+    results = []
+    for hit in hits:
+        document = by_id.get(hit.decision_id)
+        if document is None:
+            continue
+        decision = document.decision
+        results.append({
+            "id": decision.pk,
+            "title": decision.title,
+            "team": document.team.name,
+            "status": decision.status,
+            "priority": decision.priority,
+            "rank": hit.rank,
+            "snippet": snippet(document, include),
+        })
+    return results
@@ -0,0 +1,124 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import duplicates, quality, rollups, search, similarity, tags, topics
+from .ai_ledger import invalidate_budget
+from .caching import bump_on_commit
+from .membership import invalidate_on_commit
+from .models import (
+    Decision,
+    DecisionAudit,
+    DecisionComment,
+    DecisionOption,
+    DecisionReview,
+    Notification,
+    Team,
+    TeamMember,
+    TemplateFieldValue,
+)
+from .notifications import adjust_unread_on_commit, publish_created
+
+
+@receiver([post_save, post_delete], sender=TeamMember)
+def team_member_changed(sender, instance, **kwargs):
+    invalidate_on_commit(instance.user_id)
+    bump_on_commit("team", instance.team_id)
+
+
+@receiver(post_save, sender=Team)
+def team_saved(sender, instance, raw=False, **kwargs):
+    # the budget is cached for a few minutes by ai_ledger.budget_for
+    if not raw:
+        invalidate_budget(instance.pk)
+
+
+@receiver(pre_save, sender=Decision)
+def decision_before_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._rollup_previous = rollups.stored_contribution(instance.pk) if instance.pk else None
+    score = quality.compute_score(instance)
+    instance._quality_changed = score != instance.quality_score
+    instance.quality_score = score
+
+
+@receiver(post_save, sender=Decision)
+def decision_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "quality_score" not in update_fields and getattr(instance, "_quality_changed", False):
+        Decision.objects.filter(pk=instance.pk).update(quality_score=instance.quality_score)
+    if update_fields is None or "tags" in update_fields:
+        tags.sync_decision(instance)
+
+    previous = getattr(instance, "_rollup_previous", None)
+    rollups.move(previous, rollups.contribution_for(instance))
+    if previous is not None and previous.team_id != instance.team_id:
+        bump_on_commit("team", previous.team_id)
+    bump_on_commit("team", instance.team_id)
+    bump_on_commit("user", instance.created_by_id)
+    search.index_on_commit(instance.pk)
+    similarity.embed_on_commit(instance.pk)
+    # after the re-embedding, which it reads
+    topics.assign_on_commit(instance.pk)
+    duplicates.update_on_commit(instance.pk)
+
+
+@receiver(pre_delete, sender=Decision)
+def decision_deleting(sender, instance, **kwargs):
+    # the topic membership goes with the cascade; its counters must go first
+    topics.unassign(instance.pk)
+
+
+@receiver(post_delete, sender=Decision)
+def decision_deleted(sender, instance, **kwargs):
+    rollups.apply(rollups.contribution_for(instance), -1)
+    bump_on_commit("team", instance.team_id)
+    bump_on_commit("user", instance.created_by_id)
+    # the rows go with the cascade; this drops them from the in-process indexes
+    search.index_on_commit(instance.pk)
+    similarity.embed_on_commit(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=DecisionOption)
+def decision_option_changed(sender, instance, raw=False, **kwargs):
+    # option count feeds the quality score
+    if not raw:
+        quality.recompute_scores(Decision.objects.filter(pk=instance.decision_id))
+        search.index_on_commit(instance.decision_id)
+        similarity.embed_on_commit(instance.decision_id)
+
+
+@receiver([post_save, post_delete], sender=DecisionComment)
+@receiver([post_save, post_delete], sender=TemplateFieldValue)
+def decision_text_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_on_commit(instance.decision_id)
+
+
+@receiver([post_save, post_delete], sender=DecisionReview)
+def decision_review_changed(sender, instance, **kwargs):
+    bump_on_commit("team", instance.decision.team_id)
+    bump_on_commit("user", instance.reviewer_id)
+
+
+@receiver(post_save, sender=DecisionAudit)
+def decision_audit_saved(sender, instance, created=False, raw=False, **kwargs):
+    # status_changed rows feed the dwell-time sketches
+    if created and not raw and instance.action == "status_changed":
+        bump_on_commit("team", instance.decision.team_id)
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created=False, raw=False, **kwargs):
+    # read-state changes go through notifications.mark_read/mark_all_read
+    if created and not raw and not instance.is_read:
+        adjust_unread_on_commit(instance.user_id, +1)
+        publish_created([instance])
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_unread_on_commit(instance.user_id, -1)
@@ -0,0 +1,377 @@
+"""Related decisions from a local vector index (no external service).
+
+Each decision is embedded as a hashed bag of words: the stemmed terms of
+its title, tags, description and options (``decisions.search.terms``) are
+hashed into ``SIMILARITY_DIMENSIONS`` buckets with sublinear term
+frequencies. The sparse vectors are stored in ``DecisionEmbedding`` and
+rebuilt after every change to that text (see decisions.signals), or
+wholesale with ``manage.py rebuild_embeddings``.
+
+``VectorIndex`` keeps the TF-IDF weighted, L2-normalised vectors of all
+decisions as an inverted index: one posting list of (row, weight) per
+bucket. The top-k cosine neighbours of a decision are a scatter-add of
+the postings of the buckets its vector uses (a decision has tens of
+terms, not hundreds) and an ``argpartition``, a few milliseconds for 100k
+rows. Memory follows the stored terms, not decisions x dimensions: about
+12 bytes per term plus up to as much again of spare posting capacity, so
+roughly 100 MB per process for 100k decisions of 60 terms, and lists grow
+per bucket instead of in one large reallocation. It syncs incrementally
+from the embeddings changed since the last query; IDF is re-estimated,
+and all postings re-weighted bucket by bucket, whenever the number of
+decisions has changed by ``IDF_REFRESH_GROWTH`` since the last estimate.
+"""
+from __future__ import annotations
+
+import threading
+import zlib
+from collections import defaultdict
+from typing import Iterable, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Decision, DecisionEmbedding, DecisionOption
+from .permissions import visible_decisions, visible_team_ids
+from .search import terms
+
+DEFAULT_DIMENSIONS = 512
+FIELD_WEIGHTS = {"title": 2.0, "tags": 2.0, "description": 1.0, "options": 1.0}
+IDF_REFRESH_GROWTH = 0.2
+# neighbours below this cosine share little more than common words
+MIN_SIMILARITY = 0.05
+DEFAULT_K = 5
+MAX_K = 50
+
+
+def dimensions() -> int:
+    return getattr(settings, "SIMILARITY_DIMENSIONS", DEFAULT_DIMENSIONS)
+
+
+# =========================
+# Embeddings
+# =========================
+
+def _bucket(term: str, dims: int) -> int:
+    # crc32, not hash(): buckets must be stable across processes
+    return zlib.crc32(term.encode()) % dims
+
+
+def embed(fields: dict[str, str], dims: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+    """Sparse (bucket indices, sublinear weights) of title/tags/description/options text."""
+    dims = dims or dimensions()
+    counts: dict[int, float] = defaultdict(float)
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in terms(fields.get(field) or ""):
+            counts[_bucket(term, dims)] += weight
+    # whole tags too, so "cloud-migration" matches only itself
+    for tag in (fields.get("tags") or "").split(","):
+        if tag.strip():
+            counts[_bucket("tag:" + tag.strip().lower(), dims)] += FIELD_WEIGHTS["tags"]
+    indices = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+    weights = 1 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    order = np.argsort(indices)
+    return indices[order], weights[order]
+
+
+def pack(indices: np.ndarray, weights: np.ndarray) -> bytes:
+    return indices.astype(np.int32).tobytes() + weights.astype(np.float32).tobytes()
+
+
+def unpack(raw: bytes) -> tuple[np.ndarray, np.ndarray]:
+    n = len(raw) // 8
+    return np.frombuffer(raw, dtype=np.int32, count=n), np.frombuffer(raw, dtype=np.float32, count=n, offset=4 * n)
+
+
+def embed_decisions(decision_ids: Iterable[int]) -> int:
+    """(Re)compute the embeddings of ``decision_ids``; drops those of deleted decisions."""
+    ids = set(decision_ids)
+    if not ids:
+        return 0
+    options = defaultdict(list)
+    rows = DecisionOption.objects.filter(decision_id__in=ids).order_by("id")
+    for decision_id, title, description in rows.values_list("decision_id", "title", "description"):
+        options[decision_id].extend((title, description))
+
+    now, dims = timezone.now(), dimensions()
+    embeddings = [
+        DecisionEmbedding(
+            decision_id=d["pk"],
+            team_id=d["team_id"],
+            vector=pack(*embed({**d, "options": "\n".join(options[d["pk"]])}, dims)),
+            updated_at=now,
+        )
+        for d in Decision.objects.filter(pk__in=ids).values("pk", "team_id", "title", "tags", "description")
+    ]
+    DecisionEmbedding.objects.bulk_create(
+        embeddings, update_conflicts=True, unique_fields=["decision"], update_fields=["team", "vector", "updated_at"],
+    )
+    missing = ids - {e.decision_id for e in embeddings}
+    if missing:
+        DecisionEmbedding.objects.filter(decision_id__in=missing).delete()
+        for decision_id in missing:
+            vector_index.remove(decision_id)
+    return len(embeddings)
+
+
+def embed_on_commit(decision_id: Optional[int]) -> None:
+    """Re-embed once the surrounding transaction commits."""
+    if decision_id is not None:
+        transaction.on_commit(lambda: embed_decisions([decision_id]))
+
+
+def rebuild_embeddings(batch_size: int = 500) -> int:
+    """Recompute every embedding, ``batch_size`` decisions at a time."""
+    embedded, last = 0, 0
+    while True:
+        ids = list(Decision.objects.filter(pk__gt=last).order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return embedded
+        embedded += embed_decisions(ids)
+        last = ids[-1]
+
+
+# =========================
+# Index
+# =========================
+
+class VectorIndex:
+    """Inverted index of the TF-IDF weighted, row-normalised vectors, synced from DecisionEmbedding.
+
+    Every bucket has a posting list of (row, weight) pairs in two growable
+    arrays; its length is the bucket's document frequency. Rows are kept
+    contiguous (a removed row is replaced by the last one). Deleted
+    decisions are removed in this process by ``embed_decisions``; other
+    processes may keep stale rows, which the callers drop when they load
+    the hits.
+    """
+
+    def __init__(self, dims: int):
+        self.dims = dims
+        self.postings = [np.zeros(0, dtype=np.int32) for _ in range(dims)]
+        self.weights = [np.zeros(0, dtype=np.float32) for _ in range(dims)]
+        # buckets of each row, to find its postings again
+        self.terms: list[np.ndarray] = []
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.teams = np.zeros(0, dtype=np.int64)
+        self.size = 0
+        self.rows: dict[int, int] = {}
+        # document frequency (= filled length of the postings) and the IDF the weights use
+        self.df = np.zeros(dims, dtype=np.int64)
+        self.idf = np.ones(dims, dtype=np.float32)
+        self.idf_docs = 0
+        self.synced_at = None
+        self._lock = threading.Lock()
+
+    def _weigh(self, indices: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        vector = np.zeros(self.dims, dtype=np.float32)
+        vector[indices] = weights * self.idf[indices]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _grow(self) -> None:
+        capacity = max(1024, 2 * len(self.ids))
+        self.ids = np.resize(self.ids, capacity)
+        self.teams = np.resize(self.teams, capacity)
+
+    def _extend(self, bucket: int, rows: np.ndarray, weights: np.ndarray) -> None:
+        n = int(self.df[bucket])
+        end = n + len(rows)
+        if end > len(self.postings[bucket]):
+            capacity = max(8, end, 2 * len(self.postings[bucket]))
+            self.postings[bucket] = np.resize(self.postings[bucket], capacity)
+            self.weights[bucket] = np.resize(self.weights[bucket], capacity)
+        self.postings[bucket][n:end] = rows
+        self.weights[bucket][n:end] = weights
+        self.df[bucket] = end
+
+    def _drop(self, rows: list[int]) -> None:
+        """Take the postings of ``rows`` out of their buckets."""
+        if not rows:
+            return
+        dropped = np.array(rows, dtype=np.int32)
+        for bucket in np.unique(np.concatenate([self.terms[row] for row in rows])):
+            n = int(self.df[bucket])
+            keep = ~np.isin(self.postings[bucket][:n], dropped)
+            kept = int(keep.sum())
+            postings, weights = self.postings[bucket][:n][keep], self.weights[bucket][:n][keep]
+            if len(self.postings[bucket]) > 4 * max(kept, 8):
+                # give memory back once a bucket has mostly emptied
+                self.postings[bucket] = np.resize(self.postings[bucket], 2 * max(kept, 8))
+                self.weights[bucket] = np.resize(self.weights[bucket], 2 * max(kept, 8))
+            self.postings[bucket][:kept], self.weights[bucket][:kept] = postings, weights
+            self.df[bucket] = kept
+
+    def _put(self, vectors: list[tuple[int, int, np.ndarray, np.ndarray]]) -> None:
+        """Insert or replace (decision id, team id, indices, weights) in one pass per bucket."""
+        self._drop([self.rows[d] for d, _, _, _ in vectors if d in self.rows])
+        rows = []
+        for decision_id, team_id, indices, _ in vectors:
+            row = self.rows.get(decision_id)
+            if row is None:
+                if self.size == len(self.ids):
+                    self._grow()
+                row, self.size = self.size, self.size + 1
+                self.rows[decision_id] = row
+                self.ids[row] = decision_id
+                self.terms.append(indices.copy())
+            else:
+                self.terms[row] = indices.copy()
+            self.teams[row] = team_id
+            rows.append(row)
+        if not rows:
+            return
+        lengths = [len(indices) for _, _, indices, _ in vectors]
+        buckets = np.concatenate([indices for _, _, indices, _ in vectors])
+        owners = np.repeat(np.array(rows, dtype=np.int32), lengths)
+        weights = np.concatenate([weights for _, _, _, weights in vectors]) * self.idf[buckets]
+        norms = np.sqrt(np.bincount(np.repeat(np.arange(len(rows)), lengths), weights=weights ** 2, minlength=len(rows)))
+        weights /= np.repeat(np.where(norms > 0, norms, 1), lengths).astype(np.float32)
+        order = np.argsort(buckets, kind="stable")
+        buckets, owners, weights = buckets[order], owners[order], weights[order]
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]]) if len(buckets) else np.zeros(0, dtype=np.int64)
+        for start, end in zip(starts, np.r_[starts[1:], len(buckets)]):
+            self._extend(int(buckets[start]), owners[start:end], weights[start:end])
+
+    def _remove(self, decision_id: int) -> None:
+        row = self.rows.pop(decision_id, None)
+        if row is None:
+            return
+        self._drop([row])
+        last = self.size - 1
+        if row != last:
+            for bucket in self.terms[last]:
+                postings = self.postings[bucket][: self.df[bucket]]
+                postings[postings == last] = row
+            self.terms[row] = self.terms[last]
+            self.ids[row], self.teams[row] = self.ids[last], self.teams[last]
+            self.rows[int(self.ids[row])] = row
+        self.terms.pop()
+        self.size = last
+
+    def remove(self, decision_id: int) -> None:
+        with self._lock:
+            self._remove(decision_id)
+
+    def _refresh_idf(self) -> None:
+        """Re-weight every posting with the current document frequencies."""
+        idf = (np.log((1 + self.size) / (1 + self.df)) + 1).astype(np.float32)
+        # weights are tf * old idf / norm: rescale per bucket, then re-normalise the rows
+        squares = np.zeros(self.size)
+        for bucket in np.flatnonzero(self.df):
+            weights = self.weights[bucket][: self.df[bucket]]
+            weights *= idf[bucket] / self.idf[bucket]
+            squares += np.bincount(self.postings[bucket][: self.df[bucket]], weights=weights ** 2, minlength=self.size)
+        norms = np.sqrt(squares).astype(np.float32)
+        norms[norms == 0] = 1
+        for bucket in np.flatnonzero(self.df):
+            self.weights[bucket][: self.df[bucket]] /= norms[self.postings[bucket][: self.df[bucket]]]
+        self.idf, self.idf_docs = idf, self.size
+
+    def sync(self) -> None:
+        with self._lock:
+            rows = DecisionEmbedding.objects.order_by("updated_at")
+            if self.synced_at is not None:
+                # >=: rows written in the same instant as the last sync
+                rows = rows.filter(updated_at__gte=self.synced_at)
+            batch = []
+            for decision_id, team_id, raw, updated_at in rows.values_list(
+                "decision_id", "team_id", "vector", "updated_at"
+            ).iterator(chunk_size=2000):
+                indices, weights = unpack(bytes(raw))
+                if len(indices) and indices.max() >= self.dims:
+                    continue  # embedded with other SIMILARITY_DIMENSIONS; rebuild_embeddings
+                batch.append((decision_id, team_id, indices, weights))
+                self.synced_at = updated_at
+                if len(batch) == 2000:
+                    self._put(batch)
+                    batch = []
+            self._put(batch)
+            if abs(self.size - self.idf_docs) > IDF_REFRESH_GROWTH * self.idf_docs:
+                self._refresh_idf()
+
+    def vector_for(self, decision_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self.rows.get(decision_id)
+            if row is None:
+                return None
+            vector = np.zeros(self.dims, dtype=np.float32)
+            for bucket in self.terms[row]:
+                n = self.df[bucket]
+                vector[bucket] = self.weights[bucket][:n][self.postings[bucket][:n] == row][0]
+            return vector
+
+    def vector_of(self, fields: dict[str, str]) -> np.ndarray:
+        with self._lock:
+            return self._weigh(*embed(fields, self.dims))
+
+    def nearest(
+        self, vector: np.ndarray, k: int, team_ids: Optional[set[int]] = None, exclude: Optional[int] = None,
+    ) -> list[tuple[int, float]]:
+        """Top ``k`` (decision id, cosine) for ``vector``, best first."""
+        with self._lock:
+            n = self.size
+            if not n or not vector.any():
+                return []
+            scores = np.zeros(n, dtype=np.float32)
+            for bucket in np.flatnonzero(vector):
+                # a row appears at most once per posting list, so += does not drop repeats
+                filled = self.df[bucket]
+                scores[self.postings[bucket][:filled]] += self.weights[bucket][:filled] * vector[bucket]
+            if team_ids is not None:
+                scores[~np.isin(self.teams[:n], np.fromiter(team_ids, dtype=np.int64))] = -1
+            if exclude in self.rows:
+                scores[self.rows[exclude]] = -1
+            k = min(k, n)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(int(self.ids[i]), float(scores[i])) for i in top if scores[i] >= MIN_SIMILARITY]
+
+
+vector_index = VectorIndex(dimensions())
+
+
+# =========================
+# Queries
+# =========================
+
+def _results(user, hits: list[tuple[int, float]], k: int) -> list[dict]:
+    decisions = visible_decisions(user).filter(pk__in=[d for d, _ in hits]).select_related("team")
+    by_id = {d.pk: d for d in decisions}
+    results = []
+    for decision_id, score in hits:
+        decision = by_id.get(decision_id)
+        if decision is not None:
+            results.append({
+                "id": decision.pk,
+                "title": decision.title,
+                "team": decision.team.name,
+                "status": decision.status,
+                "similarity": round(score, 4),
+            })
+    return results[:k]
+
+
+def related_decisions(user, decision: Decision, k: int = DEFAULT_K) -> list[dict]:
+    """Decisions visible to ``user`` most similar to ``decision``."""
+    k = max(1, min(k, MAX_K))
+    vector_index.sync()
+    vector = vector_index.vector_for(decision.pk)
+    if vector is None:
+        options = "\n".join(f"{o.title}\n{o.description}" for o in decision.options.all()) if decision.pk else ""
+        vector = vector_index.vector_of({
+            "title": decision.title, "tags": decision.tags, "description": decision.description, "options": options,
+        })
+    # over-fetch: rows of decisions deleted by other processes are dropped in _results
+    hits = vector_index.nearest(vector, k * 2, set(visible_team_ids(user)), exclude=decision.pk)
+    return _results(user, hits, k)
+
+
+def similar_to_text(user, title: str, description: str = "", tags: str = "", k: int = DEFAULT_K) -> list[dict]:
+    """Decisions visible to ``user`` similar to a draft that is not saved yet."""
+    k = max(1, min(k, MAX_K))
+    vector_index.sync()
+    vector = vector_index.vector_of({"title": title, "tags": tags, "description": description})
+    hits = vector_index.nearest(vector, k * 2, set(visible_team_ids(user)))
+    return _results(user, hits, k)
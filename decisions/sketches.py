@@ -0,0 +1,101 @@
+"""Mergeable quantile sketches.
+
+``QuantileSketch`` is a DDSketch-style log-bucketed histogram: every value
+is counted in bucket ``ceil(log_gamma(value))``, which bounds the relative
+error of any quantile by ``relative_accuracy``. Two sketches with the same
+accuracy merge by adding bucket counts, so per-team sketches can be cached
+and combined into org-wide percentiles without revisiting raw rows.
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, Optional
+
+# Values at or below this are counted in the zero bucket (durations are
+# clamped to >= 0 before they get here).
+MIN_VALUE = 1e-9
+
+
+class QuantileSketch:
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: int = 1) -> None:
+        value = max(float(value), 0.0)
+        if value <= MIN_VALUE:
+            self.zero_count += weight
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + weight
+        self.count += weight
+        self.sum += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def extend(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("cannot merge sketches with different accuracy")
+        for key, n in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        if not 0 <= q <= 1:
+            raise ValueError("q must be in [0, 1]")
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                estimate = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        return {
+            "a": self.relative_accuracy,
+            "b": {str(k): n for k, n in self.bins.items()},
+            "z": self.zero_count,
+            "n": self.count,
+            "s": self.sum,
+            "lo": self.min if self.count else None,
+            "hi": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data["a"])
+        sketch.bins = {int(k): n for k, n in data["b"].items()}
+        sketch.zero_count = data["z"]
+        sketch.count = data["n"]
+        sketch.sum = data["s"]
+        if sketch.count:
+            sketch.min, sketch.max = data["lo"], data["hi"]
+        return sketch
@@ -0,0 +1,89 @@
+"""Normalised tags: the ``Tag``/``DecisionTag`` relation behind ``Decision.tags``.
+
+The comma-separated ``Decision.tags`` field stays what forms edit and what
+scoring and embeddings read; after every save the relation is brought in
+line with it (see decisions.signals). ``QuerySet.update()`` bypasses that,
+so ``manage.py rebuild_tags`` re-syncs everything in batches.
+
+Filtering by tag is a semi-join on the (tag, decision) index per tag, and
+facet counts are one grouped query over the visible decisions.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count, QuerySet
+
+from .models import Decision, DecisionTag, Tag
+from .models.tag import parse_tags
+
+DEFAULT_FACET_LIMIT = 20
+MAX_FACET_LIMIT = 100
+
+
+def _tag_ids(names: set[str]) -> dict[str, int]:
+    ids = dict(Tag.objects.filter(name__in=names).values_list("name", "pk"))
+    missing = names - ids.keys()
+    if missing:
+        # ignore_conflicts: a concurrent save may create the same tag
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        ids.update(Tag.objects.filter(name__in=missing).values_list("name", "pk"))
+    return ids
+
+
+def _sync(wanted: dict[int, list[str]]) -> int:
+    current = defaultdict(set)
+    for decision_id, name in DecisionTag.objects.filter(decision_id__in=wanted).values_list("decision_id", "tag__name"):
+        current[decision_id].add(name)
+    changed = [pk for pk, names in wanted.items() if set(names) != current[pk]]
+    if not changed:
+        return 0
+    ids = _tag_ids({name for pk in changed for name in wanted[pk]})
+    with transaction.atomic():
+        DecisionTag.objects.filter(decision_id__in=changed).delete()
+        DecisionTag.objects.bulk_create([
+            DecisionTag(decision_id=pk, tag_id=ids[name]) for pk in changed for name in wanted[pk]
+        ])
+    return len(changed)
+
+
+def sync_decision(decision: Decision) -> int:
+    """Bring the relation of one (just saved) decision in line with its ``tags`` string."""
+    return _sync({decision.pk: parse_tags(decision.tags)})
+
+
+def sync_tags(decision_ids: Iterable[int]) -> int:
+    """Re-sync the relation of ``decision_ids`` from the database. Returns decisions changed."""
+    rows = Decision.objects.filter(pk__in=set(decision_ids)).values_list("pk", "tags")
+    return _sync({pk: parse_tags(tags) for pk, tags in rows})
+
+
+def rebuild_tags(batch_size: int = 1000) -> int:
+    """Re-sync every decision, ``batch_size`` at a time."""
+    changed, last = 0, 0
+    while True:
+        ids = list(Decision.objects.filter(pk__gt=last).order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return changed
+        changed += sync_tags(ids)
+        last = ids[-1]
+
+
+def filter_by_tags(decisions: QuerySet, names: Iterable[str]) -> QuerySet:
+    """Decisions carrying every one of ``names``."""
+    for name in {n for raw in names for n in parse_tags(raw)}:
+        decisions = decisions.filter(pk__in=DecisionTag.objects.filter(tag__name=name).values("decision_id"))
+    return decisions
+
+
+def facet_counts(decisions: QuerySet, limit: int = DEFAULT_FACET_LIMIT) -> list[dict]:
+    """Most used tags among ``decisions`` with their counts, in one grouped query."""
+    rows = (
+        DecisionTag.objects.filter(decision_id__in=decisions.order_by().values("pk"))
+        .values("tag__name")
+        .annotate(count=Count("decision_id"))
+        .order_by("-count", "tag__name")[:limit]
+    )
+    return [{"name": row["tag__name"], "count": row["count"]} for row in rows]
@@ -0,0 +1,228 @@
+"""Fault-injection and benchmark harness for the AI layer.
+
+``fake_provider`` points a service at a ``FakeProvider`` (see
+``decisions.providers``) with configurable latency and failure rate. A slow
+fake honours the sync ``timeout`` it is given, the way the real client
+does, so a drill measures what the service's deadlines and circuit breaker
+make of a slow or failing provider:
+
+    with fake_provider(ai_service, latency=30, failure_rate=0):
+        report = drill(ai_service, calls=50, workers=8)
+    assert report["max_seconds"] < ai_service.deadline("quality") + 1
+
+``benchmark`` drives ``analyze_decision``, ``quality_check`` and
+``generate_summary`` concurrently through whatever provider the service
+has and reports throughput and latency percentiles.
+
+Used by ``manage.py ai_fault_drill`` and ``manage.py benchmark_ai``.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from django.db import connection
+
+from .ai_cache import CompletionCache
+from .models import Decision
+from .providers import Completion, FakeProvider, Provider
+from .sketches import QuantileSketch
+
+BENCHMARK_METHODS = ("analysis", "quality", "summary")
+PERCENTILES = (0.5, 0.95, 0.99)
+
+
+@contextmanager
+def fake_provider(service, latency: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None, **options):
+    """Point ``service`` at a ``FakeProvider`` with a fresh breaker and cache."""
+    saved = service._provider
+    service.provider = FakeProvider(latency=latency, failure_rate=failure_rate, seed=seed or 0, **options)
+    service.breaker.reset()
+    service.cache.local.clear()
+    try:
+        yield service.provider
+    finally:
+        service.provider = saved
+        service.breaker.reset()
+        service.cache.local.clear()
+
+
+def _decision(i: int) -> Decision:
+    # unsaved and team-less: no database access, no budget
+    return Decision(title=f"Drill decision {i} {time.time_ns()}", description="Fault drill.", priority="medium")
+
+
+def drill(service, calls: int = 50, workers: int = 8) -> dict:
+    """Run ``calls`` sync quality checks on ``workers`` threads and time them.
+
+    Every call gets a distinct prompt, so the completion cache cannot hide
+    the provider's behaviour.
+    """
+    def one(i: int) -> tuple[float, str]:
+        started = time.monotonic()
+        result = service.quality_check(_decision(i), options_count=0)
+        return time.monotonic() - started, str(result.get("score"))
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        timings = [seconds for seconds, _ in pool.map(one, range(calls))]
+    wall = time.monotonic() - started
+
+    timings.sort()
+    return {
+        "calls": calls,
+        "provider_calls": service.provider.calls,
+        "wall_seconds": round(wall, 3),
+        "p50_seconds": round(timings[len(timings) // 2], 3),
+        "max_seconds": round(timings[-1], 3),
+        "breaker": service.breaker.stats(),
+    }
+
+
+# =========================
+# Benchmark
+# =========================
+
+class MeteredProvider(Provider):
+    """Wraps a provider and measures its sync calls."""
+
+    def __init__(self, inner: Provider):
+        self.inner = inner
+        self.name = inner.name
+        self.calls = 0
+        self.errors = 0
+        self.latency = QuantileSketch()
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.inner.available
+
+    @property
+    def async_available(self) -> bool:
+        return self.inner.async_available
+
+    def complete(self, request: dict, timeout: float) -> Completion:
+        started = time.monotonic()
+        ok = False
+        try:
+            completion = self.inner.complete(request, timeout)
+            ok = True
+            return completion
+        finally:
+            with self._lock:
+                self.calls += 1
+                self.errors += not ok
+                self.latency.add(time.monotonic() - started)
+
+    async def acomplete(self, request: dict) -> Completion:
+        return await self.inner.acomplete(request)
+
+    def astream(self, request: dict):
+        return self.inner.astream(request)
+
+
+class _NoCache(CompletionCache):
+    """Every call reaches the provider."""
+
+    def get_or_call(self, key, call):
+        return call()
+
+    async def aget_or_call(self, key, call):
+        return await call()
+
+
+def synthetic_decisions(count: int, seed: int = 0) -> list[Decision]:
+    """Unsaved, team-less decisions of varying length.
+
+    Titles and descriptions depend only on ``i`` and ``seed``, so the same
+    run sends the same prompts every time (which a replay fixture needs).
+    """
+    priorities = ("low", "medium", "high", "critical")
+    decisions = []
+    for i in range(count):
+        sentences = [
+            f"Point {j} of benchmark decision {seed}-{i}: compare cost, risk and timeline."
+            for j in range(1 + (i * 7 + seed) % 12)
+        ]
+        decisions.append(Decision(
+            title=f"Benchmark decision {seed}-{i}",
+            description=" ".join(sentences),
+            priority=priorities[i % len(priorities)],
+        ))
+    return decisions
+
+
+def _describe(sketch: QuantileSketch) -> dict:
+    return {
+        f"p{round(q * 100)}_ms": round(sketch.quantile(q) * 1000, 1) if sketch.count else None
+        for q in PERCENTILES
+    }
+
+
+def benchmark(
+    service,
+    decisions: Iterable[Decision],
+    methods: Iterable[str] = BENCHMARK_METHODS,
+    concurrency: int = 8,
+    cache: bool = False,
+) -> dict:
+    """Call every method in ``methods`` on every decision, ``concurrency`` at a time.
+
+    Without ``cache`` the completion cache is bypassed, so each call reaches
+    the provider and repeated runs measure the same thing. The service's
+    provider is metered for the duration of the run.
+    """
+    calls = {
+        "analysis": service.analyze_decision,
+        "quality": lambda d: service.quality_check(d, options_count=None if d.pk else 0),
+        "summary": service.generate_summary,
+    }
+    work = [(method, decision) for decision in decisions for method in methods]
+    sketches = {method: QuantileSketch() for method in methods}
+    lock = threading.Lock()
+
+    def one(item):
+        method, decision = item
+        started = time.monotonic()
+        try:
+            calls[method](decision)
+        finally:
+            elapsed = time.monotonic() - started
+            with lock:
+                sketches[method].add(elapsed)
+            connection.close()
+
+    saved = service._provider, service.cache
+    metered = MeteredProvider(service.provider)
+    service.provider = metered
+    if not cache:
+        service.cache = _NoCache()
+    try:
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, work))
+        wall = time.monotonic() - started
+    finally:
+        service._provider, service.cache = saved
+
+    return {
+        "provider": metered.name,
+        "calls": len(work),
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput_per_second": round(len(work) / wall, 2) if wall else None,
+        "methods": {
+            method: {"calls": sketch.count, **_describe(sketch)}
+            for method, sketch in sketches.items()
+        },
+        "provider_calls": {
+            "calls": metered.calls,
+            "errors": metered.errors,
+            **_describe(metered.latency),
+        },
+        "breaker": service.breaker.stats(),
+    }
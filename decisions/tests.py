@@ -1,3 +1,557 @@
-from django.test import TestCase
+import importlib
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import duplicates, jobs, quality_runs, search, similarity, tags
+from .ai_ledger import add_tokens, budget_for, over_budget
+from .ai_service import ai_service
+from .checks import shared_cache_check
+from .circuit import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from .membership import load_roles
+from .models import (
+    AIJob,
+    Decision,
+    DecisionDailyRollup,
+    DecisionOption,
+    DecisionTag,
+    QualityScoreRun,
+    Tag,
+    Team,
+    TeamMember,
+)
+from .pagination import KeysetPaginator
+from .permissions import (
+    can_edit_decision,
+    can_review_decision,
+    can_view_decision,
+    editable_decisions,
+    reviewable_decisions,
+    visible_decisions,
+)
+from .rollups import rebuild_rollups
+from .sketches import QuantileSketch
+from .testing import drill, fake_provider
+
+
+def make_user(username, **extra):
+    return User.objects.create_user(username, password="pw", **extra)
+
+
+class DecisionTestCase(TestCase):
+    """A team with one member per role and a decision created by the reviewer."""
+
+    def setUp(self):
+        cache.clear()
+        self.team = Team.objects.create(name="Platform")
+        self.other_team = Team.objects.create(name="Sales")
+        self.users = {}
+        for role in ("admin", "decision_maker", "reviewer", "observer"):
+            self.users[role] = make_user(role)
+            TeamMember.objects.create(team=self.team, user=self.users[role], role=role)
+        self.outsider = make_user("outsider")
+        self.decision = self.create_decision("Pick a database", created_by=self.users["reviewer"])
+
+    def create_decision(self, title, description="", team=None, created_by=None, **fields):
+        # run the on_commit indexing hooks, as after a real request
+        with self.captureOnCommitCallbacks(execute=True):
+            return Decision.objects.create(
+                title=title, description=description, team=team or self.team,
+                created_by=created_by or self.users["admin"], **fields
+            )
+
+    def client_for(self, user):
+        self.client.force_login(user)
+        return self.client
+
+
+# =========================
+# Keyset pagination
+# =========================
+
+class KeysetPaginationTests(DecisionTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(24):
+            self.create_decision(f"Decision {i}")
+        # ties on the first ordering column must still page deterministically
+        Decision.objects.filter(pk__in=Decision.objects.order_by("pk").values("pk")[:10]).update(
+            updated_at=self.decision.updated_at
+        )
+
+    def test_pages_cover_every_row_once_in_order(self):
+        paginator = KeysetPaginator(Decision.objects.all(), 7)
+        page, ids = paginator.page(), []
+        while True:
+            ids.extend(d.pk for d in page)
+            if not page.has_next:
+                break
+            page = paginator.page(page.next_cursor)
+        expected = list(Decision.objects.order_by("-updated_at", "-id").values_list("pk", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_cursor_returns_the_previous_page(self):
+        paginator = KeysetPaginator(Decision.objects.all(), 7)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual([d.pk for d in back], [d.pk for d in first])
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_invalid_cursor_is_a_bad_request(self):
+        response = self.client_for(self.users["admin"]).get(reverse("decisions:decision_list"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_json_list_pages(self):
+        client = self.client_for(self.users["admin"])
+        url, seen, cursor = reverse("decisions:decision_list"), 0, None
+        while True:
+            params = {"format": "json", "page_size": 10, **({"cursor": cursor} if cursor else {})}
+            data = client.get(url, params).json()
+            seen += data["count"]
+            cursor = data["next"]
+            if not cursor:
+                break
+        self.assertEqual(seen, 25)
+
+
+# =========================
+# Memberships and permissions
+# =========================
+
+class SharedCacheTests(DecisionTestCase):
+    def test_role_change_takes_effect_without_a_shared_cache(self):
+        observer = self.users["observer"]
+        self.assertFalse(can_edit_decision(User.objects.get(pk=observer.pk), self.decision))
+        # another process would not see this worker's invalidation; nothing may be cached locally
+        TeamMember.objects.filter(user=observer).update(role="admin")
+        self.assertTrue(can_edit_decision(User.objects.get(pk=observer.pk), self.decision))
+
+    def test_shared_cache_is_invalidated_after_commit(self):
+        observer = self.users["observer"]
+        with mock.patch("decisions.membership.is_shared", return_value=True):
+            self.assertEqual(load_roles(observer), {self.team.pk: "observer"})
+            with self.captureOnCommitCallbacks(execute=True):
+                TeamMember.objects.filter(user=observer).get().delete()
+                # a concurrent request must not be able to re-cache the old roles before the commit
+                self.assertIsNotNone(cache.get(f"memberships:user:{observer.pk}"))
+            self.assertIsNone(cache.get(f"memberships:user:{observer.pk}"))
+            self.assertEqual(load_roles(observer), {})
+
+    def test_process_local_cache_warning(self):
+        self.assertEqual([w.id for w in shared_cache_check(None)], ["decisions.W001"])
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://x"}}):
+            self.assertEqual(shared_cache_check(None), [])
+
+
+class PermissionTests(DecisionTestCase):
+    def test_querysets_match_object_checks(self):
+        approved = self.create_decision("Approved", status="approved")
+        hidden = self.create_decision("Hidden", team=self.other_team)
+        for user in [*self.users.values(), self.outsider]:
+            user = User.objects.get(pk=user.pk)
+            for decision in (self.decision, approved, hidden):
+                self.assertEqual(
+                    can_view_decision(user, decision), visible_decisions(user).filter(pk=decision.pk).exists()
+                )
+                self.assertEqual(
+                    can_edit_decision(user, decision), editable_decisions(user).filter(pk=decision.pk).exists()
+                )
+                self.assertEqual(
+                    can_review_decision(user, decision), reviewable_decisions(user).filter(pk=decision.pk).exists()
+                )
+
+    def test_roles(self):
+        self.assertTrue(can_edit_decision(self.users["admin"], self.decision))
+        self.assertTrue(can_edit_decision(self.users["decision_maker"], self.decision))
+        self.assertFalse(can_edit_decision(self.users["observer"], self.decision))
+        self.assertTrue(can_review_decision(self.users["reviewer"], self.decision))
+        self.assertTrue(can_view_decision(self.users["observer"], self.decision))
+        self.assertFalse(can_view_decision(self.outsider, self.decision))
+
+    def test_observer_cannot_edit_through_views(self):
+        client = self.client_for(self.users["observer"])
+        self.assertEqual(client.get(reverse("decisions:decision_edit", args=[self.decision.pk])).status_code, 403)
+        self.assertEqual(client.post(reverse("decisions:decision_delete", args=[self.decision.pk])).status_code, 403)
+        self.assertTrue(Decision.objects.filter(pk=self.decision.pk).exists())
+
+    def test_outsider_cannot_view(self):
+        response = self.client_for(self.outsider).get(reverse("decisions:decision_detail", args=[self.decision.pk]))
+        self.assertIn(response.status_code, (403, 404))
+
+
+# =========================
+# Rollups and sketches
+# =========================
+
+class RollupTests(DecisionTestCase):
+    def snapshot(self):
+        return sorted(
+            DecisionDailyRollup.objects.filter(count__gt=0).values_list(
+                "team_id", "day", "status", "priority", "count", "decided_count", "cycle_seconds"
+            )
+        )
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        decisions = [
+            self.create_decision(str(i), priority=("low", "high", "critical")[i % 3], team=(self.team, self.other_team)[i % 2])
+            for i in range(12)
+        ]
+        for decision in decisions[:5]:
+            decision.status = "approved"
+            decision.decided_at = decision.created_at + timedelta(days=2)
+            decision.save()
+        decisions[5].team = self.other_team
+        decisions[5].save()
+        decisions[6].delete()
+        incremental = self.snapshot()
+        rebuild_rollups()
+        self.assertEqual(self.snapshot(), incremental)
+        self.assertEqual(sum(row[4] for row in incremental), 12)
+
+
+class QuantileSketchTests(TestCase):
+    def test_quantiles_within_relative_accuracy_after_merge(self):
+        values = [1.07 ** i for i in range(2000)]
+        left, right = QuantileSketch(), QuantileSketch()
+        for i, value in enumerate(values):
+            (left if i % 2 else right).add(value)
+        merged = QuantileSketch.from_dict(left.to_dict()).merge(right)
+        for q in (0.5, 0.9, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertLessEqual(abs(merged.quantile(q) - exact) / exact, 0.02)
+
+    def test_empty_sketch(self):
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+
+
+# =========================
+# Batch quality runs
+# =========================
+
+class QualityRunResumeTests(DecisionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("decisions:api_quality_run_start")
+        self.run = QualityScoreRun.objects.create(team=self.team, last_decision_id=self.decision.pk)
+        patcher = mock.patch.object(quality_runs, "run_in_background")
+        self.background = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def orphan(self):
+        QualityScoreRun.objects.filter(pk=self.run.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.run.refresh_from_db()
+
+    def test_progressing_run_is_returned_as_is(self):
+        response = self.client_for(self.users["admin"]).post(self.url, {"team_id": self.team.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["run"]["id"], self.run.pk)
+        self.background.assert_not_called()
+
+    def test_orphaned_run_is_resumed_from_its_checkpoint(self):
+        self.orphan()
+        response = self.client_for(self.users["admin"]).post(self.url, {"team_id": self.team.pk})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["run"]["checkpoint"], self.decision.pk)
+        (run,), _ = self.background.call_args
+        self.assertEqual(run.pk, self.run.pk)
+        self.assertFalse(quality_runs.is_stale(QualityScoreRun.objects.get(pk=self.run.pk)))
+
+    def test_only_one_caller_claims_an_orphaned_run(self):
+        self.orphan()
+        other = QualityScoreRun.objects.get(pk=self.run.pk)
+        self.assertTrue(quality_runs.claim_stale(self.run))
+        self.assertFalse(quality_runs.claim_stale(other))
+
+
+# =========================
+# Circuit breaker and deadlines
+# =========================
+
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.breaker = CircuitBreaker(failure_threshold=3, window=10, reset_timeout=5, clock=lambda: self.now)
+
+    def trip(self):
+        for _ in range(3):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure(1)
+
+    def test_opens_after_failures_and_refuses_calls(self):
+        self.trip()
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_lets_one_probe_through(self):
+        self.trip()
+        self.now = 6
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        self.trip()
+        self.now = 6
+        self.breaker.allow()
+        self.breaker.record_failure(1)
+        self.assertEqual(self.breaker.state, OPEN)
+
+    def test_successful_probe_closes(self):
+        self.trip()
+        self.now = 6
+        self.breaker.allow()
+        self.breaker.record_success(0.1)
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, slow_call_threshold=1, clock=lambda: self.now)
+        for _ in range(2):
+            breaker.allow()
+            breaker.record_success(5)
+        self.assertEqual(breaker.state, OPEN)
+
+
+@override_settings(AI_METHOD_TIMEOUTS={"quality": 0.3}, AI_TIMEOUT=0.3)
+class DeadlineTests(TestCase):
+    def test_slow_provider_is_cut_off_at_the_deadline(self):
+        with fake_provider(ai_service, latency=5):
+            report = drill(ai_service, calls=8, workers=4)
+        self.assertLess(report["max_seconds"], ai_service.deadline("quality") + 1)
+
+    def test_failing_provider_opens_the_breaker(self):
+        with fake_provider(ai_service, latency=0.01, failure_rate=1.0) as provider:
+            report = drill(ai_service, calls=20, workers=2)
+            # once open, calls fall back without reaching the provider
+            self.assertLess(provider.calls, report["calls"])
+            self.assertEqual(ai_service.breaker.state, OPEN)
+
+
+# =========================
+# AI token budgets
+# =========================
+
+class TokenBudgetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = Team.objects.create(name="Platform")
+
+    def set_budget(self, budget):
+        # saving the team drops the cached budget
+        self.team.ai_daily_token_budget = budget
+        self.team.save()
+
+    def test_unset_budget_is_unlimited(self):
+        self.assertIsNone(budget_for(self.team.pk))
+        self.assertFalse(over_budget(self.team.pk))
+
+    def test_zero_budget_blocks_every_call(self):
+        self.set_budget(0)
+        self.assertEqual(budget_for(self.team.pk), 0)
+        self.assertTrue(over_budget(self.team.pk))
+
+    @override_settings(AI_TEAM_DAILY_TOKEN_BUDGET=1000)
+    def test_setting_applies_only_to_teams_without_a_budget(self):
+        self.assertEqual(budget_for(self.team.pk), 1000)
+        self.set_budget(0)
+        self.assertEqual(budget_for(self.team.pk), 0)
+
+    def test_budget_is_enforced_from_the_token_counter(self):
+        self.set_budget(100)
+        add_tokens(self.team.pk, 99)
+        self.assertFalse(over_budget(self.team.pk))
+        add_tokens(self.team.pk, 1)
+        self.assertTrue(over_budget(self.team.pk))
+
+    def test_unlimited_is_cached(self):
+        budget_for(self.team.pk)
+        with self.assertNumQueries(0):
+            self.assertIsNone(budget_for(self.team.pk))
+
+
+# =========================
+# AI jobs
+# =========================
+
+class AIJobPermissionTests(DecisionTestCase):
+    def test_observer_cannot_queue_alternatives(self):
+        # alternatives jobs write options: edit rights, not view rights
+        url = reverse("decisions:api_ai_job_submit", args=[self.decision.pk, "alternatives"])
+        response = self.client_for(self.users["observer"]).post(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(AIJob.objects.exists())
+
+    def test_observer_can_queue_read_only_jobs(self):
+        url = reverse("decisions:api_ai_job_submit", args=[self.decision.pk, "summary"])
+        self.assertEqual(self.client_for(self.users["observer"]).post(url).status_code, 202)
+
+    def test_job_fails_when_rights_are_lost_before_it_runs(self):
+        job = jobs.submit("alternatives", self.decision, self.users["decision_maker"])
+        TeamMember.objects.filter(user=self.users["decision_maker"]).update(role="observer")
+        cache.clear()
+        with mock.patch.dict(jobs.HANDLERS, {"alternatives": mock.Mock(return_value={})}) as handlers:
+            job = jobs.run_job(job.pk)
+            handlers["alternatives"].assert_not_called()
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.error, "Not allowed for this decision")
+        self.assertFalse(DecisionOption.objects.filter(decision=self.decision).exists())
+
+
+# =========================
+# Search, similarity, duplicates, tags
+# =========================
+
+class SearchTests(DecisionTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(search, "_memory_index", search.InvertedIndex())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.billing = self.create_decision("Migrate billing to Stripe", "Payments provider switch", tags="payments")
+        self.hiring = self.create_decision("Hire data engineer", "Team growth")
+        self.secret = self.create_decision("Billing audit", "Check invoices", team=self.other_team)
+
+    def titles(self, user, query):
+        return [hit["title"] for hit in search.search(user, query)]
+
+    def test_ranked_and_scoped_to_visible_teams(self):
+        self.assertEqual(self.titles(self.users["admin"], "billing"), ["Migrate billing to Stripe"])
+        self.assertEqual(self.titles(self.outsider, "billing"), [])
+
+    def test_stemming_and_exclusion(self):
+        self.assertEqual(self.titles(self.users["admin"], "hiring engineers"), ["Hire data engineer"])
+        self.assertEqual(self.titles(self.users["admin"], "stripe -payments"), [])
+
+    def test_edits_and_deletes_are_reindexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.billing.title = "Move invoices"
+            self.billing.save()
+        self.assertEqual(self.titles(self.users["admin"], "migrate"), [])
+        self.assertEqual(self.titles(self.users["admin"], "invoices"), ["Move invoices"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.hiring.delete()
+        self.assertEqual(self.titles(self.users["admin"], "engineer"), [])
+
+
+class SimilarityTests(DecisionTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(similarity, "vector_index", similarity.VectorIndex(similarity.dimensions()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.stripe = self.create_decision("Migrate billing to Stripe", "Move payments and invoicing to Stripe", tags="payments")
+        self.payments = self.create_decision("Switch payment provider for invoices", "Stripe or Adyen for billing", tags="payments")
+        self.hiring = self.create_decision("Hire data engineer", "Team growth for pipelines")
+        self.hidden = self.create_decision("Stripe billing migration", "payments invoicing", team=self.other_team)
+
+    def test_related_decisions_are_ranked_and_visible_only(self):
+        ids = [r["id"] for r in similarity.related_decisions(self.users["admin"], self.stripe)]
+        self.assertEqual(ids[0], self.payments.pk)
+        self.assertNotIn(self.hidden.pk, ids)
+        self.assertNotIn(self.stripe.pk, ids)
+
+    def test_similar_to_draft_text(self):
+        results = similarity.similar_to_text(self.users["admin"], "hiring an engineer for data pipelines")
+        self.assertEqual(results[0]["id"], self.hiring.pk)
+
+    def test_deleted_decision_leaves_the_index(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.payments.delete()
+        ids = [r["id"] for r in similarity.related_decisions(self.users["admin"], self.stripe)]
+        self.assertNotIn(self.payments.pk, ids)
+
+    def test_index_matches_dense_cosines(self):
+        index = similarity.vector_index
+        index.sync()
+        query = index.vector_for(self.stripe.pk)
+        hits = dict(index.nearest(query, 10))
+        for decision in (self.payments, self.hidden):
+            self.assertAlmostEqual(hits[decision.pk], float(index.vector_for(decision.pk) @ query), places=5)
+
+
+class DuplicateTests(DecisionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.original = self.create_decision(
+            "Adopt Kubernetes for services", "Move all backend services to a managed Kubernetes cluster this quarter"
+        )
+
+    def test_near_copy_is_found(self):
+        found = duplicates.find_duplicates(
+            self.users["admin"], self.team,
+            "Adopt Kubernetes for services", "Move all backend services to a managed Kubernetes cluster next quarter",
+        )
+        self.assertEqual([d["id"] for d in found], [self.original.pk])
+
+    def test_unrelated_text_and_other_teams_are_not(self):
+        self.assertEqual(duplicates.find_duplicates(self.users["admin"], self.team, "Office snacks", "Fruit on Fridays"), [])
+        self.assertEqual(
+            duplicates.find_duplicates(
+                self.users["admin"], self.other_team, self.original.title, self.original.description
+            ),
+            [],
+        )
+
+    def test_other_teams_do_not_use_up_the_candidates(self):
+        title, description = "Quarterly budget review", "Review the budget for the next quarter with finance"
+        for _ in range(3):
+            self.create_decision(title, description, team=self.other_team)
+        copy = self.create_decision(title, description)
+        with mock.patch.object(duplicates, "MAX_CANDIDATES", 1):
+            found = duplicates.find_duplicates(self.users["admin"], self.team, title, description)
+        self.assertEqual([d["id"] for d in found], [copy.pk])
+
+    def test_excluding_the_decision_itself(self):
+        found = duplicates.find_duplicates(
+            self.users["admin"], self.team, self.original.title, self.original.description, exclude=self.original.pk
+        )
+        self.assertEqual(found, [])
+
+
+class TagTests(DecisionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cloud = self.create_decision("A", tags="Cloud, infra ,cloud")
+        self.hiring = self.create_decision("B", tags="cloud,hiring")
+        self.secret = self.create_decision("C", tags="cloud,secret", team=self.other_team)
+
+    def test_relation_follows_the_tags_field(self):
+        self.assertEqual(sorted(self.cloud.tag_set.values_list("name", flat=True)), ["cloud", "infra"])
+        self.cloud.tags = "infra"
+        self.cloud.save()
+        self.assertEqual(list(self.cloud.tag_set.values_list("name", flat=True)), ["infra"])
+
+    def test_filter_requires_every_tag(self):
+        decisions = visible_decisions(self.users["admin"])
+        self.assertEqual(set(tags.filter_by_tags(decisions, ["cloud"])), {self.cloud, self.hiring})
+        self.assertEqual(list(tags.filter_by_tags(decisions, ["cloud", "hiring"])), [self.hiring])
+
+    def test_facets_count_visible_decisions_only(self):
+        facets = tags.facet_counts(visible_decisions(self.users["admin"]))
+        self.assertEqual(facets[0], {"name": "cloud", "count": 2})
+        self.assertNotIn("secret", [f["name"] for f in facets])
+
+    def test_rebuild_repairs_bulk_updates(self):
+        Decision.objects.filter(pk=self.hiring.pk).update(tags="ops")
+        self.assertEqual(tags.rebuild_tags(), 1)
+        self.assertEqual(list(self.hiring.tag_set.values_list("name", flat=True)), ["ops"])
+
+    def test_migration_backfill_matches_the_live_sync(self):
+        synced = sorted(DecisionTag.objects.values_list("decision_id", "tag__name"))
+        DecisionTag.objects.all().delete()
+        Tag.objects.all().delete()
+        migration = importlib.import_module("decisions.migrations.0018_tags")
+        migration.backfill_tags(apps, None, batch_size=2)
+        self.assertEqual(sorted(DecisionTag.objects.values_list("decision_id", "tag__name")), synced)
+
+    def test_tag_names_are_sorted_with_and_without_prefetch(self):
+        prefetched = Decision.objects.prefetch_related("tag_set").get(pk=self.cloud.pk)
+        self.assertEqual(prefetched.tag_names, Decision.objects.get(pk=self.cloud.pk).tag_names)
@@ -0,0 +1,288 @@
+"""Topic clustering of decisions for the analytics dashboard.
+
+Each team's decisions are clustered separately (so a topic never mixes, or
+labels itself with, text from teams a user cannot see). The features are
+the hashed term vectors of title, tags, description and options that
+``decisions.similarity`` already stores in ``DecisionEmbedding``, TF-IDF
+weighted over the team and L2-normalised; spherical k-means groups them in
+a few vectorised NumPy steps per iteration.
+
+Reclustering is a periodic batch job (``manage.py recluster_topics``,
+from cron or with ``--every``) that only revisits teams whose decisions
+have drifted by ``TOPIC_RECLUSTER_DRIFT`` since their last run. In
+between, a saved decision is assigned to its team's nearest centroid
+(centroids are stored with the IDF weights folded in, so this is one dot
+product with the stored term weights) and the ``Topic`` counters are
+moved like the daily rollups. The dashboard only reads ``Topic`` rows.
+"""
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Decision, DecisionEmbedding, Topic, TopicMembership
+from .search import STOPWORDS
+from .similarity import dimensions, unpack
+
+DEFAULT_MAX_TOPICS = 12
+DEFAULT_RECLUSTER_DRIFT = 0.2
+KMEANS_ITERATIONS = 25
+KMEANS_SEED = 7
+LABEL_TERMS = 3
+_LABEL_WORD = re.compile(r"[^\W\d_][\w-]{2,}")
+
+
+def max_topics() -> int:
+    return getattr(settings, "TOPIC_MAX_CLUSTERS", DEFAULT_MAX_TOPICS)
+
+
+def recluster_drift() -> float:
+    return getattr(settings, "TOPIC_RECLUSTER_DRIFT", DEFAULT_RECLUSTER_DRIFT)
+
+
+# =========================
+# Clustering
+# =========================
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def kmeans(points: np.ndarray, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = KMEANS_SEED):
+    """Spherical k-means of L2-normalised rows: (unit centroids, label per row).
+
+    Seeded with k-means++ on cosine distance; stops early once no row
+    changes cluster. An emptied cluster keeps its previous centroid.
+    """
+    n = len(points)
+    rng = np.random.default_rng(seed)
+    centroids = np.empty((k, points.shape[1]), dtype=np.float32)
+    centroids[0] = points[rng.integers(n)]
+    distance = np.clip(1 - points @ centroids[0], 0, None)
+    for j in range(1, k):
+        total = float((distance ** 2).sum())
+        pick = rng.choice(n, p=distance ** 2 / total) if total > 0 else rng.integers(n)
+        centroids[j] = points[pick]
+        distance = np.minimum(distance, np.clip(1 - points @ centroids[j], 0, None))
+
+    labels = None
+    for _ in range(iterations):
+        assigned = np.argmax(points @ centroids.T, axis=1)
+        if labels is not None and np.array_equal(assigned, labels):
+            break
+        labels = assigned
+        members = np.zeros((k, n), dtype=np.float32)
+        members[labels, np.arange(n)] = 1
+        sums = members @ points
+        filled = sums.any(axis=1)
+        centroids[filled] = _normalize(sums[filled])
+    return centroids, labels
+
+
+def topic_count(n: int) -> int:
+    # rule of thumb k ~ sqrt(n / 2), capped for the dashboard
+    return max(1, min(max_topics(), n, round(math.sqrt(n / 2))))
+
+
+def _words(title: str, tags: str) -> set[str]:
+    words = {w for w in _LABEL_WORD.findall(title.lower()) if w not in STOPWORDS}
+    words.update(tag.strip().lower() for tag in (tags or "").split(",") if tag.strip())
+    return words
+
+
+def _labels(words: list[set[str]], labels: np.ndarray, k: int) -> list[str]:
+    """Words of titles and tags that are most over-represented in each cluster."""
+    overall = Counter(w for ws in words for w in ws)
+    per_topic = defaultdict(Counter)
+    for ws, label in zip(words, labels):
+        per_topic[label].update(ws)
+    sizes = np.bincount(labels, minlength=k)
+    result = []
+    for j in range(k):
+        scores = {
+            w: c / sizes[j] - overall[w] / len(words)
+            for w, c in per_topic[j].items()
+            if c > 1 or sizes[j] == 1
+        }
+        top = sorted(scores, key=lambda w: (-scores[w], w))[:LABEL_TERMS]
+        result.append(", ".join(top) or f"Topic {j + 1}")
+    return result
+
+
+def _contribution(created_at, decided_at) -> tuple[bool, int]:
+    if decided_at is None or created_at is None:
+        return False, 0
+    return True, int((decided_at - created_at).total_seconds())
+
+
+def recluster_team(team_id: int) -> int:
+    """Recompute the topics of one team from its embeddings. Returns the number of topics."""
+    dims = dimensions()
+    ids, rows = [], []
+    for decision_id, raw in DecisionEmbedding.objects.filter(team_id=team_id).order_by("decision_id").values_list("decision_id", "vector"):
+        indices, weights = unpack(bytes(raw))
+        if len(indices) and indices.max() < dims:
+            ids.append(decision_id)
+            rows.append((indices, weights))
+    if not ids:
+        Topic.objects.filter(team_id=team_id).delete()
+        return 0
+
+    features = np.zeros((len(ids), dims), dtype=np.float32)
+    for i, (indices, weights) in enumerate(rows):
+        features[i, indices] = weights
+    df = np.count_nonzero(features, axis=0)
+    idf = (np.log((1 + len(ids)) / (1 + df)) + 1).astype(np.float32)
+    k = topic_count(len(ids))
+    centroids, labels = kmeans(_normalize(features * idf), k)
+
+    info = {pk: (title, tags, created_at, decided_at) for pk, title, tags, created_at, decided_at in
+            Decision.objects.filter(pk__in=ids).values_list("pk", "title", "tags", "created_at", "decided_at")}
+    kept = [i for i, pk in enumerate(ids) if pk in info]  # skip decisions deleted meanwhile
+    ids, labels = [ids[i] for i in kept], labels[kept]
+    contributions = [_contribution(*info[pk][2:]) for pk in ids]
+    decided = np.array([d for d, _ in contributions], dtype=np.int64)
+    cycle = np.array([c for _, c in contributions], dtype=np.int64)
+    counts = np.bincount(labels, minlength=k)
+    decided_counts = np.bincount(labels, weights=decided, minlength=k)
+    cycle_sums = np.bincount(labels, weights=cycle, minlength=k)
+    names = _labels([_words(*info[pk][:2]) for pk in ids], labels, k)
+
+    now = timezone.now()
+    with transaction.atomic():
+        Topic.objects.filter(team_id=team_id).delete()
+        topics = Topic.objects.bulk_create([
+            Topic(
+                team_id=team_id,
+                label=names[j][:200],
+                centroid=(centroids[j] * idf).astype(np.float32).tobytes(),
+                count=int(counts[j]),
+                decided_count=int(decided_counts[j]),
+                cycle_seconds=int(cycle_sums[j]),
+                clustered_at=now,
+            )
+            for j in range(k)
+        ])
+        TopicMembership.objects.bulk_create([
+            TopicMembership(decision_id=pk, topic=topics[label], decided=contrib[0], cycle_seconds=contrib[1])
+            for pk, label, contrib in zip(ids, labels, contributions)
+        ], batch_size=1000)
+    return k
+
+
+def stale_team_ids(drift: Optional[float] = None) -> list[int]:
+    """Teams never clustered, or with at least ``drift`` of their decisions assigned since."""
+    drift = recluster_drift() if drift is None else drift
+    clustered = Topic.objects.values("team_id").annotate(total=Sum("count"), added=Sum("added_since_clustering"))
+    stale, seen = [], set()
+    for row in clustered:
+        seen.add(row["team_id"])
+        if row["added"] and row["added"] >= drift * max(row["total"], 1):
+            stale.append(row["team_id"])
+    unclustered = DecisionEmbedding.objects.exclude(team_id__in=seen).values_list("team_id", flat=True).distinct()
+    return sorted(stale + list(unclustered))
+
+
+def recluster(team_ids: Optional[Iterable[int]] = None) -> dict[int, int]:
+    """Recluster ``team_ids`` (default: the stale teams). Returns topics per team."""
+    team_ids = stale_team_ids() if team_ids is None else team_ids
+    return {team_id: recluster_team(team_id) for team_id in team_ids}
+
+
+# =========================
+# Incremental assignment
+# =========================
+
+def _apply(topic_id: int, sign: int, decided: bool, cycle_seconds: int, added: int = 0) -> None:
+    Topic.objects.filter(pk=topic_id).update(
+        count=F("count") + sign,
+        decided_count=F("decided_count") + sign * int(decided),
+        cycle_seconds=F("cycle_seconds") + sign * cycle_seconds,
+        added_since_clustering=F("added_since_clustering") + added,
+    )
+
+
+def assign_decisions(decision_ids: Iterable[int]) -> int:
+    """Move ``decision_ids`` to their nearest topic and update the counters. Returns decisions moved."""
+    ids = set(decision_ids)
+    if not ids:
+        return 0
+    decisions = list(Decision.objects.filter(pk__in=ids).values_list("pk", "team_id", "created_at", "decided_at"))
+    vectors = dict(DecisionEmbedding.objects.filter(decision_id__in=ids).values_list("decision_id", "vector"))
+    dims = dimensions()
+    rows = defaultdict(list)
+    for topic_id, team_id, raw in Topic.objects.filter(team_id__in={d[1] for d in decisions}).order_by("pk").values_list("pk", "team_id", "centroid"):
+        centroid = np.frombuffer(bytes(raw), dtype=np.float32)
+        if len(centroid) == dims:
+            rows[team_id].append((topic_id, centroid))
+    centroids = {team_id: ([t for t, _ in topics], np.stack([c for _, c in topics])) for team_id, topics in rows.items()}
+    current = {m.decision_id: m for m in TopicMembership.objects.filter(decision_id__in=ids)}
+
+    moved = 0
+    for pk, team_id, created_at, decided_at in decisions:
+        topic_id = None
+        if team_id in centroids and pk in vectors:
+            topic_ids, matrix = centroids[team_id]
+            indices, weights = unpack(bytes(vectors[pk]))
+            if len(indices) and indices.max() < dims:
+                topic_id = topic_ids[int(np.argmax(matrix[:, indices] @ weights))]
+        decided, cycle = _contribution(created_at, decided_at)
+        old = current.get(pk)
+        if old is not None and (old.topic_id, old.decided, old.cycle_seconds) == (topic_id, decided, cycle):
+            continue
+        moved += 1
+        with transaction.atomic():
+            if old is not None:
+                _apply(old.topic_id, -1, old.decided, old.cycle_seconds)
+            if topic_id is None:
+                TopicMembership.objects.filter(decision_id=pk).delete()
+                continue
+            _apply(topic_id, +1, decided, cycle, added=int(old is None or old.topic_id != topic_id))
+            TopicMembership.objects.update_or_create(
+                decision_id=pk, defaults={"topic_id": topic_id, "decided": decided, "cycle_seconds": cycle},
+            )
+    return moved
+
+
+def assign_on_commit(decision_id: Optional[int]) -> None:
+    """Assign the decision once the surrounding transaction (and its re-embedding) commits."""
+    if decision_id is not None:
+        transaction.on_commit(lambda: assign_decisions([decision_id]))
+
+
+def unassign(decision_id: int) -> None:
+    """Take a decision that is about to be deleted out of its topic's counters."""
+    row = TopicMembership.objects.filter(decision_id=decision_id).values_list("topic_id", "decided", "cycle_seconds").first()
+    if row is not None:
+        topic_id, decided, cycle_seconds = row
+        _apply(topic_id, -1, decided, cycle_seconds)
+
+
+# =========================
+# Dashboard
+# =========================
+
+def topic_stats(team_ids: Iterable[int], limit: int = 10) -> list[dict]:
+    """Largest precomputed topics of ``team_ids`` with their average cycle time in days."""
+    topics = Topic.objects.filter(team_id__in=list(team_ids), count__gt=0).select_related("team").order_by("-count", "pk")[:limit]
+    return [
+        {
+            "id": topic.pk,
+            "label": topic.label,
+            "team": topic.team.name,
+            "count": topic.count,
+            "decided": topic.decided_count,
+            "avg_cycle_days": topic.cycle_seconds / topic.decided_count / 86400.0 if topic.decided_count else None,
+        }
+        for topic in topics
+    ]
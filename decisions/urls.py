@@ -4,6 +4,8 @@ from django.urls import path
 from django.contrib.auth import views as auth_views
 
 from . import views
+from . import views_ai
+from . import views_templates
 
 app_name = "decisions"
 
@@ -22,12 +24,22 @@ urlpatterns = [
 
     # Decisions
     path("list/", views.decision_list, name="decision_list"),
+    path("api/search/", views.decision_search, name="api_decision_search"),
+    path("api/similar/", views.decision_similar, name="api_decision_similar"),
+    path("api/tags/decisions/", views.decisions_by_tag, name="api_decisions_by_tag"),
+    path("api/tags/facets/", views.tag_facets, name="api_tag_facets"),
     path("create/", views.decision_create, name="decision_create"),
     path("decision/<int:pk>/", views.decision_detail, name="decision_detail"),
+    path("decision/<int:pk>/related/", views.decision_related, name="decision_related"),
     path("decision/<int:pk>/edit/", views.decision_edit, name="decision_edit"),
     path("decision/<int:pk>/delete/", views.decision_delete, name="decision_delete"),
     path("decision/<int:pk>/status/", views.decision_change_status, name="decision_change_status"),
 
+    # Templates
+    path("templates/", views_templates.template_library, name="template_library"),
+    path("templates/<int:template_id>/", views_templates.template_detail, name="template_detail"),
+    path("templates/<int:template_id>/create/", views_templates.create_from_template, name="create_from_template"),
+
     # Reviews
     path("decision/<int:pk>/review/", views.decision_submit_review, name="decision_submit_review"),
 
@@ -35,10 +47,22 @@ urlpatterns = [
     path("decision/<int:pk>/comments/add/", views.decision_add_comment, name="decision_add_comment"),
 
     # Notifications
-    path("notifications/", views.notifications, name="notifications_list"),
+    path("notifications/", views.notifications_list, name="notifications_list"),
     path("notifications/read/<int:pk>/", views.notifications_mark_read, name="notifications_mark_read"),
     path("notifications/mark-all-read/", views.notifications_mark_all_read, name="notifications_mark_all_read"),
+    path("notifications/stream/", views.notifications_stream, name="notifications_stream"),
 
-    # ✅ API – AI Quality Check
-    path("api/ai/quality-check/<int:pk>/", views.api_ai_quality_check, name="api_ai_quality_check"),
+    # ✅ API – AI (async; heuristic fallback when the AI budget is exceeded)
+    path("api/ai/quality-check/<int:decision_id>/", views_ai.ai_quality_check, name="api_ai_quality_check"),
+    path("api/ai/summary/<int:decision_id>/", views_ai.ai_generate_summary, name="api_ai_generate_summary"),
+    path("api/ai/summary/<int:decision_id>/stream/", views_ai.ai_stream_summary, name="api_ai_stream_summary"),
+    path("api/ai/analyze/<int:decision_id>/", views_ai.ai_analyze_decision, name="api_ai_analyze"),
+    path("api/ai/alternatives/<int:decision_id>/", views_ai.ai_generate_alternatives, name="api_ai_generate_alternatives"),
+    path("api/ai/options/<int:option_id>/pros-cons/", views_ai.ai_generate_pros_cons, name="api_ai_generate_pros_cons"),
+    path("api/ai/pros-cons/<int:decision_id>/", views_ai.ai_fill_pros_cons, name="api_ai_fill_pros_cons"),
+    path("api/ai/jobs/<int:decision_id>/<slug:kind>/", views_ai.ai_job_submit, name="api_ai_job_submit"),
+    path("api/ai/jobs/<int:job_id>/", views_ai.ai_job_status, name="api_ai_job_status"),
+    path("api/ai/usage/", views_ai.ai_usage, name="api_ai_usage"),
+    path("api/quality/runs/", views_ai.quality_run_start, name="api_quality_run_start"),
+    path("api/quality/runs/<int:run_id>/", views_ai.quality_run_status, name="api_quality_run_status"),
 ]
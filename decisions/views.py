@@ -1,12 +1,16 @@
 # decisions/views.py  (GESAMTDATEI – KOMPLETT ERSETZEN)
 
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import views as auth_views  # optional, falls du es wo brauchst
-from django.db.models import Count
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.loader import render_to_string
 from django.utils import timezone
-from django.views.decorators.http import require_POST
 
 from .models import (
     Decision,
@@ -17,29 +21,78 @@ from .models import (
     DecisionReview,
     DecisionAudit,
 )
+from . import duplicates
+from . import notifications as notification_service
+from . import permissions
+from . import search
+from . import similarity
+from . import tags
+from .analytics import analytics_service
+from .decorators import async_login_required
+from .pagination import DEFAULT_ORDERING, InvalidCursor, KeysetPaginator, get_page_size
+from .permissions import CREATE_ROLES, visible_decisions, visible_teams
+from .pubsub import get_broker, sse_event, user_channel
 
 # =========================
 # Permissions (minimal, robust)
 # =========================
 
-def _is_team_member(user, team: Team) -> bool:
-    return TeamMember.objects.filter(team=team, user=user).exists()
-
+# all rules live in permissions.py so they match visible_decisions()/editable_decisions()/...
 def can_view_team(user, team: Team) -> bool:
-    return _is_team_member(user, team)
+    return permissions.can_view_team(user, team)
 
 def can_view_decision(user, decision: Decision) -> bool:
-    return _is_team_member(user, decision.team)
+    return permissions.can_view_decision(user, decision)
 
 def can_edit_decision(user, decision: Decision) -> bool:
-    # simplest rule: team member can edit (du kannst hier später Rollen prüfen)
-    return _is_team_member(user, decision.team)
+    return permissions.can_edit_decision(user, decision)
 
 def can_create_decision(user, team: Team) -> bool:
-    return _is_team_member(user, team)
+    return permissions.can_create_decision(user, team)
 
 def can_review_decision(user, decision: Decision) -> bool:
-    return _is_team_member(user, decision.team)
+    return permissions.can_review_decision(user, decision)
+
+
+# =========================
+# Pagination
+# =========================
+
+# ?sort= values -> keyset ordering (each backed by an index, see Decision.Meta)
+DECISION_ORDERINGS = {
+    "recent": DEFAULT_ORDERING,
+    "quality": ("-quality_score", "-id"),
+    "quality_asc": ("quality_score", "id"),
+}
+
+
+def _render_decision_page(request, queryset, template, fragment, context=None, ordering=DEFAULT_ORDERING):
+    """Render one keyset page of ``queryset``.
+
+    ``?cursor=`` selects the page, ``?page_size=`` its size and
+    ``?format=json`` returns only the rendered rows plus cursors, for
+    infinite scroll. Other query parameters (filters, sort) are kept in
+    the pagination links as ``page_query``.
+    """
+    paginator = KeysetPaginator(queryset, get_page_size(request), ordering)
+    try:
+        page = paginator.page(request.GET.get("cursor") or None)
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+
+    params = request.GET.copy()
+    for key in ("cursor", "page_size", "format"):
+        params.pop(key, None)
+
+    context = dict(context or {}, decisions=page, page=page, page_query=params.urlencode())
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "html": render_to_string(fragment, context, request=request),
+            "count": len(page),
+            "next": page.next_cursor,
+            "previous": page.previous_cursor,
+        })
+    return render(request, template, context)
 
 
 # =========================
@@ -48,9 +101,8 @@ def can_review_decision(user, decision: Decision) -> bool:
 
 @login_required
 def dashboard(request):
-    # robust: alle Decisions in Teams, wo der user Mitglied ist
-    decisions = Decision.objects.filter(team__teammember__user=request.user).distinct().order_by("-updated_at")
-    return render(request, "decisions/dashboard.html", {"decisions": decisions})
+    decisions = visible_decisions(request.user)
+    return _render_decision_page(request, decisions, "decisions/dashboard.html", "decisions/partials/decision_cards.html")
 
 
 # =========================
@@ -59,25 +111,30 @@ def dashboard(request):
 
 @login_required
 def analytics_dashboard(request):
-    qs = Decision.objects.filter(team__teammember__user=request.user).distinct()
+    # reads the per-team/per-day rollups, not the decision table
+    metrics = analytics_service.get_user_dashboard_metrics(request.user)
+    by_status, by_priority = metrics["by_status"], metrics["by_priority"]
 
-    stats = {
-        "total": qs.count(),
-        "draft": qs.filter(status="draft").count(),
-        "review": qs.filter(status="review").count(),
-        "approved": qs.filter(status="approved").count(),
-        "implemented": qs.filter(status="implemented").count(),
-        "rejected": qs.filter(status="rejected").count(),
-        "critical": qs.filter(priority="critical").count(),
-    }
+    stats = {"total": metrics["total"], "critical": by_priority.get("critical", 0)}
+    for status, _ in Decision.STATUS_CHOICES:
+        stats[status] = by_status.get(status, 0)
 
-    status_counts = list(qs.values("status").annotate(count=Count("id")).order_by("status"))
-    priority_counts = list(qs.values("priority").annotate(count=Count("id")).order_by("priority"))
+    status_counts = [{"status": k, "count": v} for k, v in sorted(by_status.items())]
+    priority_counts = [{"priority": k, "count": v} for k, v in sorted(by_priority.items())]
+    status_names = dict(Decision.STATUS_CHOICES)
+    priority_names = dict(Decision.PRIORITY_CHOICES)
 
     return render(request, "decisions/analytics_dashboard.html", {
+        "metrics": metrics,
+        "cycle_stats": analytics_service.get_user_cycle_time_stats(request.user),
+        "topic_stats": analytics_service.get_user_topic_stats(request.user),
         "stats": stats,
         "status_counts": status_counts,
         "priority_counts": priority_counts,
+        "status_labels_json": json.dumps([str(status_names.get(r["status"], r["status"])) for r in status_counts]),
+        "status_counts_json": json.dumps([r["count"] for r in status_counts]),
+        "priority_labels_json": json.dumps([str(priority_names.get(r["priority"], r["priority"])) for r in priority_counts]),
+        "priority_counts_json": json.dumps([r["count"] for r in priority_counts]),
     })
 
 
@@ -87,7 +144,7 @@ def analytics_dashboard(request):
 
 @login_required
 def teams_list(request):
-    teams = Team.objects.filter(teammember__user=request.user).distinct().order_by("name")
+    teams = visible_teams(request.user).order_by("name")
     return render(request, "decisions/teams_list.html", {"teams": teams})
 
 
@@ -98,12 +155,11 @@ def team_detail(request, pk):
         return HttpResponseForbidden()
 
     members = TeamMember.objects.filter(team=team).select_related("user").order_by("role")
-    decisions = Decision.objects.filter(team=team).order_by("-updated_at")
+    decisions = Decision.objects.filter(team=team)
 
-    return render(request, "decisions/team_detail.html", {
+    return _render_decision_page(request, decisions, "decisions/team_detail.html", "decisions/partials/team_decision_rows.html", {
         "team": team,
         "members": members,
-        "decisions": decisions,
     })
 
 
@@ -113,8 +169,118 @@ def team_detail(request, pk):
 
 @login_required
 def decision_list(request):
-    decisions = Decision.objects.filter(team__teammember__user=request.user).distinct().order_by("-updated_at")
-    return render(request, "decisions/decision_list.html", {"decisions": decisions})
+    decisions = visible_decisions(request.user).select_related("team")
+
+    # stored, indexed quality_score: no per-row scoring
+    try:
+        min_quality = int(request.GET.get("min_quality") or 0)
+        max_quality = int(request.GET.get("max_quality") or 100)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid quality filter")
+    if min_quality > 0:
+        decisions = decisions.filter(quality_score__gte=min_quality)
+    if max_quality < 100:
+        decisions = decisions.filter(quality_score__lte=max_quality)
+    selected_tags = request.GET.getlist("tag")
+    decisions = tags.filter_by_tags(decisions, selected_tags)
+
+    sort = request.GET.get("sort") if request.GET.get("sort") in DECISION_ORDERINGS else "recent"
+    return _render_decision_page(
+        request, decisions, "decisions/decision_list.html", "decisions/partials/decision_rows.html",
+        {"sort": sort, "min_quality": min_quality, "max_quality": max_quality, "selected_tags": selected_tags},
+        ordering=DECISION_ORDERINGS[sort],
+    )
+
+
+@login_required
+def decision_search(request):
+    """Ranked full-text search (``?q=``, optional ``?team=``, ``?limit=``), as JSON."""
+    query = (request.GET.get("q") or "").strip()
+    try:
+        limit = int(request.GET.get("limit") or search.DEFAULT_LIMIT)
+        team_id = int(request.GET["team"]) if request.GET.get("team") else None
+    except ValueError:
+        return HttpResponseBadRequest("Invalid search parameters")
+    if not query:
+        return JsonResponse({"query": query, "results": []})
+    return JsonResponse({"query": query, "results": search.search(request.user, query, limit=limit, team_id=team_id)})
+
+
+@login_required
+def decisions_by_tag(request):
+    """Visible decisions carrying every ``?tag=`` (optional ``?team=``), one keyset page as JSON."""
+    names = request.GET.getlist("tag")
+    if not names:
+        return HttpResponseBadRequest("Missing tag")
+    decisions = visible_decisions(request.user).select_related("team").prefetch_related("tag_set")
+    if request.GET.get("team"):
+        try:
+            decisions = decisions.filter(team_id=int(request.GET["team"]))
+        except ValueError:
+            return HttpResponseBadRequest("Invalid team")
+    paginator = KeysetPaginator(tags.filter_by_tags(decisions, names), get_page_size(request), DEFAULT_ORDERING)
+    try:
+        page = paginator.page(request.GET.get("cursor") or None)
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+    return JsonResponse({
+        "results": [
+            {
+                "id": d.pk,
+                "title": d.title,
+                "team": d.team.name,
+                "status": d.status,
+                "priority": d.priority,
+                "tags": d.tag_names,
+                "updated_at": d.updated_at.isoformat(),
+            }
+            for d in page
+        ],
+        "next": page.next_cursor,
+        "previous": page.previous_cursor,
+    })
+
+
+@login_required
+def tag_facets(request):
+    """Tag counts over the visible decisions (narrowed by ``?team=`` and ``?tag=``), as JSON."""
+    decisions = visible_decisions(request.user)
+    try:
+        limit = max(1, min(int(request.GET.get("limit") or tags.DEFAULT_FACET_LIMIT), tags.MAX_FACET_LIMIT))
+        if request.GET.get("team"):
+            decisions = decisions.filter(team_id=int(request.GET["team"]))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid facet parameters")
+    decisions = tags.filter_by_tags(decisions, request.GET.getlist("tag"))
+    return JsonResponse({"facets": tags.facet_counts(decisions, limit)})
+
+
+@login_required
+def decision_related(request, pk):
+    """Most similar decisions the user can see (``?k=``), as JSON."""
+    decision = get_object_or_404(Decision, pk=pk)
+    if not can_view_decision(request.user, decision):
+        return HttpResponseForbidden()
+    try:
+        k = int(request.GET.get("k") or similarity.DEFAULT_K)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid k")
+    return JsonResponse({"results": similarity.related_decisions(request.user, decision, k=k)})
+
+
+@login_required
+def decision_similar(request):
+    """Decisions similar to a draft (``?title=&description=&tags=``), as JSON."""
+    title = request.GET.get("title", "")
+    description = request.GET.get("description", "")
+    if not (title.strip() or description.strip()):
+        return JsonResponse({"results": []})
+    try:
+        k = int(request.GET.get("k") or similarity.DEFAULT_K)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid k")
+    results = similarity.similar_to_text(request.user, title, description, request.GET.get("tags", ""), k=k)
+    return JsonResponse({"results": results})
 
 
 @login_required
@@ -142,9 +308,18 @@ def decision_create(request):
         if not can_create_decision(request.user, team):
             return HttpResponseForbidden()
 
+        title = request.POST.get("title", "").strip()
+        description = request.POST.get("description", "").strip()
+        if not request.POST.get("confirm_duplicate"):
+            candidates = duplicates.find_duplicates(request.user, team, title, description)
+            if candidates:
+                context = _decision_create_context(request.user)
+                context.update({"duplicates": candidates, "form": request.POST})
+                return render(request, "decisions/decision_create.html", context)
+
         decision = Decision.objects.create(
-            title=request.POST.get("title", "").strip(),
-            description=request.POST.get("description", "").strip(),
+            title=title,
+            description=description,
             priority=(request.POST.get("priority") or "medium"),
             status=(request.POST.get("status") or "draft"),
             team=team,
@@ -164,8 +339,17 @@ def decision_create(request):
 
         return redirect("decisions:decision_detail", pk=decision.pk)
 
-    teams = Team.objects.filter(teammember__user=request.user).distinct().order_by("name")
-    return render(request, "decisions/decision_create.html", {"teams": teams})
+    return render(request, "decisions/decision_create.html", _decision_create_context(request.user))
+
+
+def _decision_create_context(user):
+    teams = list(visible_teams(user, roles=CREATE_ROLES).order_by("name"))
+    members = {}
+    for member in TeamMember.objects.filter(team__in=teams).select_related("user").order_by("user__username"):
+        members.setdefault(member.team_id, []).append(
+            {"id": member.user_id, "name": member.user.get_full_name() or member.user.username, "role": member.role}
+        )
+    return {"teams": teams, "user_teams": teams, "team_members_json": json.dumps(members)}
 
 
 @login_required
@@ -194,6 +378,9 @@ def decision_edit(request, pk):
         except Exception:
             pass
 
+        if decision.status != before["status"]:
+            notification_service.notify_status_change(decision, request.user, before["status"], decision.status)
+
         return redirect("decisions:decision_detail", pk=decision.pk)
 
     return render(request, "decisions/decision_edit.html", {"decision": decision})
@@ -245,6 +432,9 @@ def decision_change_status(request, pk):
         except Exception:
             pass
 
+        if decision.status != old:
+            notification_service.notify_status_change(decision, request.user, old, decision.status)
+
     return redirect("decisions:decision_detail", pk=pk)
 
 
@@ -259,7 +449,7 @@ def decision_submit_review(request, pk):
         return HttpResponseForbidden()
 
     if request.method == "POST":
-        DecisionReview.objects.create(
+        review = DecisionReview.objects.create(
             decision=decision,
             reviewer=request.user,
             status=request.POST.get("status") or "comment",
@@ -277,6 +467,8 @@ def decision_submit_review(request, pk):
         except Exception:
             pass
 
+        notification_service.notify_review_submitted(review)
+
     return redirect("decisions:decision_detail", pk=pk)
 
 
@@ -317,6 +509,8 @@ def decision_add_comment(request, pk):
         except Exception:
             pass
 
+        notification_service.notify_mentions(decision, request.user, text)
+
     return redirect("decisions:decision_detail", pk=pk)
 
 
@@ -332,93 +526,45 @@ def notifications_list(request):
 
 @login_required
 def notifications_mark_read(request, pk):
-    try:
-        n = Notification.objects.get(pk=pk, user=request.user)
-        n.is_read = True
-        n.save()
-    except Notification.DoesNotExist:
-        pass
+    # conditional UPDATE keeps the cached unread counter exact
+    notification_service.mark_read(request.user, pk)
     return redirect("decisions:notifications_list")
 
 
 @login_required
 def notifications_mark_all_read(request):
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    notification_service.mark_all_read(request.user)
     return redirect("decisions:notifications_list")
 
 
-# =========================
-# API – AI Quality Check (Fallback)
-# =========================
-
-@require_POST
-@login_required
-def api_ai_quality_check(request, pk):
-    decision = get_object_or_404(Decision, pk=pk)
-    if not can_view_decision(request.user, decision):
-        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-
-    text = (decision.description or "").strip()
-    score = 40
-    missing = []
-    suggestions = []
-
-    if len(text) >= 200:
-        score += 20
-    else:
-        missing.append("Mehr Kontext/Details in der Beschreibung ergänzen.")
-
-    if "alternative" in text.lower() or "alternativen" in text.lower():
-        score += 10
-    else:
-        missing.append("Alternativen nennen (z.B. Option A/B/C).")
-
-    if "risik" in text.lower():
-        score += 10
-    else:
-        missing.append("Risiken/Downsides ergänzen.")
-
-    if "owner" in text.lower() or "verantwort" in text.lower():
-        score += 10
-    else:
-        missing.append("Verantwortliche Person/Owner ergänzen.")
-
-    if score > 100:
-        score = 100
-
-    if missing:
-        suggestions.append("Ergänze: " + " ".join(missing))
-
-    return JsonResponse({
-        "success": True,
-        "score": score,
-        "missing": missing,
-        "suggestions": suggestions,
-        "message": "Heuristic check (AI disabled / no key required)."
-    })
-
-
-# =========================
-# API – AI Summary (Fallback)
-# =========================
-
-@require_POST
-@login_required
-def api_ai_generate_summary(request, pk):
-    decision = get_object_or_404(Decision, pk=pk)
-    if not can_view_decision(request.user, decision):
-        return JsonResponse({"success": False, "message": "Forbidden"}, status=403)
-
-    text = (decision.description or "").strip()
-    if not text:
-        summary = "No description available to summarize."
-    else:
-        summary = text.replace("\n", " ").strip()
-        if len(summary) > 400:
-            summary = summary[:400].rsplit(" ", 1)[0] + "..."
-
-    return JsonResponse({
-        "success": True,
-        "summary": summary,
-        "message": "Heuristic summary (AI disabled / no key required)."
-    })
+async def _notification_events(user_id):
+    # Heartbeats keep proxies from closing idle connections; the stream ends
+    # after STREAM_MAX_AGE so that connections of vanished clients are
+    # released and EventSource reconnects (getting a fresh unread count).
+    heartbeat = getattr(settings, "NOTIFICATIONS_STREAM_HEARTBEAT", 20)
+    max_age = getattr(settings, "NOTIFICATIONS_STREAM_MAX_AGE", 300)
+    deadline = time.monotonic() + max_age
+
+    async with get_broker().subscribe(user_channel(user_id)) as subscription:
+        count = await sync_to_async(notification_service.get_unread_count)(user_id)
+        yield "retry: 3000\n" + sse_event("unread", {"count": count})
+
+        while (remaining := deadline - time.monotonic()) > 0:
+            message = await subscription.get(timeout=min(heartbeat, remaining))
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                yield sse_event(message["event"], message["data"])
+
+
+@async_login_required
+async def notifications_stream(request):
+    """Server-Sent Events: new notifications and unread-count changes.
+
+    Async so that idle connections only cost a coroutine on the event loop
+    (run under ASGI, see config/asgi.py).
+    """
+    response = StreamingHttpResponse(_notification_events(request.user.pk), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
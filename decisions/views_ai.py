@@ -1,71 +1,264 @@
-from django.http import JsonResponse
+"""AI endpoints.
+
+Async so that a slow completion only parks a coroutine on the event loop
+instead of a worker; database access goes through ``sync_to_async``. Each
+call is bounded by AIService's concurrency limit and deadline and falls
+back to the heuristic baseline when the budget is exceeded.
+
+The summary can also be streamed token by token as Server-Sent Events.
+
+The job endpoints at the bottom do not call the LLM at all: they queue an
+``AIJob`` (see ``decisions.jobs``) and report its state.
+"""
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_POST
-from .models import Decision, DecisionOption
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
+from . import jobs
+from . import quality_runs
+from .ai_ledger import team_usage
+from .alternatives import create_alternatives, fill_pros_cons, option_payload
+from .decorators import async_login_required, async_require_GET, async_require_POST
+from .models import AIJob, DecisionOption, QualityScoreRun
 from .ai_service import ai_service
+from .permissions import EDIT_ROLES, editable_decisions, visible_decisions, visible_team_ids, visible_teams
+from .pubsub import sse_event
 
-@login_required
-@require_POST
-def ai_analyze_decision(request, decision_id):
+
+def _get_decision(user, decision_id, with_options=False):
+    decision = get_object_or_404(visible_decisions(user), id=decision_id)
+    options_count = ai_service.count_options(decision) if with_options else 0
+    return decision, options_count
+
+
+def _get_editable_decision(user, decision_id):
+    return get_object_or_404(editable_decisions(user), id=decision_id)
+
+
+def _get_editable_option(user, option_id):
+    return get_object_or_404(
+        DecisionOption.objects.select_related('decision'), id=option_id, decision__in=editable_decisions(user)
+    )
+
+
+def _options_without_pros_cons(decision, overwrite=False):
+    options = DecisionOption.objects.filter(decision=decision).order_by('id')
+    if not overwrite:
+        options = options.filter(pros='', cons='')
+    return list(options)
+
+
+@async_login_required
+@async_require_POST
+async def ai_analyze_decision(request, decision_id):
     """AI analysis of decision"""
-    decision = Decision.objects.get(id=decision_id, team__teammember__user=request.user)
-    
-    analysis = ai_service.analyze_decision(decision)
-    
+    decision, options_count = await sync_to_async(_get_decision)(request.user, decision_id, with_options=True)
+
+    analysis = await ai_service.aanalyze_decision(decision, options_count)
+
     return JsonResponse({
         'success': True,
         'analysis': analysis
     })
 
 
-@login_required
-@require_POST
-def ai_generate_alternatives(request, decision_id):
-    """Generate alternative options with AI"""
-    decision = Decision.objects.get(id=decision_id, team__teammember__user=request.user)
-    
-    alternatives = ai_service.generate_alternatives(decision)
-    
+@async_login_required
+@async_require_POST
+async def ai_generate_alternatives(request, decision_id):
+    """Generate alternative options (with pros/cons, cost, time) in one AI call and save them."""
+    decision = await sync_to_async(_get_editable_decision)(request.user, decision_id)
+    try:
+        count = int(request.POST.get('count') or 3)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid count'}, status=400)
+
+    alternatives = await ai_service.agenerate_alternatives(decision, count)
+    options = await sync_to_async(create_alternatives)(decision, alternatives)
+
     return JsonResponse({
-        'success': True,
-        'alternatives': alternatives
+        'success': bool(options),
+        'alternatives': [option_payload(o) for o in options]
     })
 
 
-@login_required
-@require_POST
-def ai_generate_summary(request, decision_id):
+@async_login_required
+@async_require_POST
+async def ai_generate_summary(request, decision_id):
     """Generate executive summary"""
-    decision = Decision.objects.get(id=decision_id, team__teammember__user=request.user)
-    
-    summary = ai_service.generate_summary(decision)
-    
+    decision, _ = await sync_to_async(_get_decision)(request.user, decision_id)
+
+    summary = await ai_service.agenerate_summary(decision)
+
     return JsonResponse({
         'success': True,
         'summary': summary
     })
 
 
-@login_required
-@require_POST
-def ai_quality_check(request, decision_id):
+async def _summary_events(decision):
+    # start (source) -> delta* -> done; a new start means "discard the text so far"
+    source, text = None, ""
+    async for chunk_source, chunk in ai_service.astream_summary(decision):
+        if chunk_source != source:
+            source, text = chunk_source, ""
+            yield sse_event("start", {"source": source})
+        text += chunk
+        yield sse_event("delta", {"text": chunk})
+    yield sse_event("done", {"summary": text.strip(), "source": source})
+
+
+@async_login_required
+@async_require_GET
+async def ai_stream_summary(request, decision_id):
+    """Executive summary as Server-Sent Events, forwarded as tokens arrive.
+
+    GET so that ``EventSource`` can consume it; the client closes the
+    connection after ``done``.
+    """
+    decision, _ = await sync_to_async(_get_decision)(request.user, decision_id)
+    response = StreamingHttpResponse(_summary_events(decision), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@async_login_required
+@async_require_POST
+async def ai_quality_check(request, decision_id):
     """Decision Quality Check (structured + actionable)."""
-    decision = Decision.objects.get(id=decision_id, team__teammember__user=request.user)
-    quality = ai_service.quality_check(decision)
+    decision, options_count = await sync_to_async(_get_decision)(request.user, decision_id, with_options=True)
+    quality = await ai_service.aquality_check(decision, options_count)
     return JsonResponse({
         'success': True,
         'quality': quality,
     })
 
+
+@async_login_required
+@async_require_POST
+async def ai_generate_pros_cons(request, option_id):
+    """Generate pros/cons for one option (a batch of one, see ai_fill_pros_cons)"""
+    option = await sync_to_async(_get_editable_option)(request.user, option_id)
+
+    results = await ai_service.agenerate_pros_cons(option.decision, [option])
+    await sync_to_async(fill_pros_cons)([option], results)
+
+    result = results.get(option.pk, {})
+    return JsonResponse({
+        'success': bool(result),
+        'pros': result.get('pros', []),
+        'cons': result.get('cons', [])
+    })
+
+
+@async_login_required
+@async_require_POST
+async def ai_fill_pros_cons(request, decision_id):
+    """Pros/cons for all options of a decision in one AI call.
+
+    Only options without pros and cons, unless ``overwrite=1``.
+    """
+    decision = await sync_to_async(_get_editable_decision)(request.user, decision_id)
+    options = await sync_to_async(_options_without_pros_cons)(decision, request.POST.get('overwrite') == '1')
+
+    results = await ai_service.agenerate_pros_cons(decision, options)
+    changed = await sync_to_async(fill_pros_cons)(options, results)
+
+    return JsonResponse({
+        'success': bool(changed) or not options,
+        'options': [option_payload(o) for o in changed]
+    })
+
+
+# =========================
+# Jobs
+# =========================
+
+def _job_response(job, status=200):
+    return JsonResponse({
+        'success': True,
+        'job': jobs.job_payload(job),
+        'status_url': reverse('decisions:api_ai_job_status', args=[job.pk]),
+    }, status=status)
+
+
 @login_required
 @require_POST
-def ai_generate_pros_cons(request, option_id):
-    """Generate pros/cons for an option"""
-    option = DecisionOption.objects.get(id=option_id, decision__team__teammember__user=request.user)
-    
-    # Simple implementation - can be enhanced with AI later
+def ai_job_submit(request, decision_id, kind):
+    """Queue an AI job and return its id right away (202)."""
+    if kind not in jobs.HANDLERS:
+        return JsonResponse({'success': False, 'message': f'Unknown job kind: {kind}'}, status=400)
+    decision = get_object_or_404(jobs.allowed_decisions(kind, request.user), id=decision_id)
+    job = jobs.submit(kind, decision, request.user)
+    return _job_response(job, status=202)
+
+
+@login_required
+@require_GET
+def ai_job_status(request, job_id):
+    job = get_object_or_404(AIJob, pk=job_id, requested_by=request.user)
+    return _job_response(job)
+
+
+# =========================
+# Batch quality runs
+# =========================
+
+@login_required
+@require_POST
+def quality_run_start(request):
+    """Start (or resume) batch quality scoring for a team, or all teams (staff)."""
+    team = None
+    team_id = request.POST.get('team_id')
+    if team_id:
+        team = get_object_or_404(visible_teams(request.user, roles=EDIT_ROLES), pk=team_id)
+    elif not request.user.is_staff:
+        return JsonResponse({'success': False, 'message': 'team_id required'}, status=400)
+
+    running = QualityScoreRun.objects.filter(team=team, status='running').first()
+    if running is not None:
+        # still progressing, or another request took it over first
+        if not quality_runs.is_stale(running) or not quality_runs.claim_stale(running):
+            return JsonResponse({'success': True, 'run': quality_runs.run_payload(running)})
+        run = running
+    else:
+        run = quality_runs.start_run(team, request.user)
+    quality_runs.run_in_background(run)
+    return JsonResponse({'success': True, 'run': quality_runs.run_payload(run)}, status=202)
+
+
+@login_required
+@require_GET
+def quality_run_status(request, run_id):
+    run = get_object_or_404(QualityScoreRun, pk=run_id)
+    if not (request.user.is_staff or (run.team_id and run.team_id in visible_team_ids(request.user))):
+        return JsonResponse({'success': False, 'message': 'Forbidden'}, status=403)
+    return JsonResponse({'success': True, 'run': quality_runs.run_payload(run)})
+
+
+# =========================
+# Usage / budgets
+# =========================
+
+@login_required
+@require_GET
+def ai_usage(request):
+    """Per-team AI usage (tokens per day, error rate, p95 latency, budget) and breaker state."""
+    try:
+        days = max(1, min(int(request.GET.get('days') or 7), 90))
+        team_id = int(request.GET['team_id']) if request.GET.get('team_id') else None
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid days or team_id'}, status=400)
+    teams = visible_teams(request.user, roles=EDIT_ROLES)
+    if team_id is not None:
+        teams = teams.filter(pk=team_id)
+    usage = team_usage(teams.values_list('pk', flat=True), days=days)
     return JsonResponse({
         'success': True,
-        'pros': ['Pro 1', 'Pro 2', 'Pro 3'],
-        'cons': ['Con 1', 'Con 2', 'Con 3']
+        'days': days,
+        'teams': list(usage.values()),
+        # this process only: each worker has its own breaker
+        'breaker': ai_service.breaker.stats(),
     })
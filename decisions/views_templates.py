@@ -2,15 +2,18 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db import models
-from .models import DecisionTemplate, TemplateCategory, Decision, Team, TemplateFieldValue
+from . import duplicates
+from .models import DecisionTemplate, TemplateCategory, Decision, TemplateFieldValue
+from .permissions import CREATE_ROLES, visible_teams
+
+def _visible_templates(user):
+    return DecisionTemplate.objects.filter(models.Q(visibility='public') | models.Q(created_by=user))
+
 
 @login_required
 def template_library(request):
     """Browse available templates"""
-    templates = DecisionTemplate.objects.filter(
-        models.Q(visibility='public') | 
-        models.Q(created_by=request.user)
-    ).select_related('category')
+    templates = _visible_templates(request.user).select_related('category')
     
     category_id = request.GET.get('category')
     if category_id:
@@ -36,7 +39,7 @@ def template_library(request):
 @login_required
 def template_detail(request, template_id):
     """View template details"""
-    template = get_object_or_404(DecisionTemplate, id=template_id)
+    template = get_object_or_404(_visible_templates(request.user), id=template_id)
     fields = template.fields.all()
     
     context = {
@@ -49,15 +52,32 @@ def template_detail(request, template_id):
 @login_required
 def create_from_template(request, template_id):
     """Create a decision from template"""
-    template = get_object_or_404(DecisionTemplate, id=template_id)
+    template = get_object_or_404(_visible_templates(request.user), id=template_id)
     
     if request.method == 'POST':
         team_id = request.POST.get('team')
-        team = get_object_or_404(Team, id=team_id)
-        
+        team = get_object_or_404(visible_teams(request.user, roles=CREATE_ROLES), id=team_id)
+        title = request.POST.get('title', template.default_title_pattern)
+        description = request.POST.get('description', template.default_description)
+
+        if not request.POST.get('confirm_duplicate'):
+            candidates = duplicates.find_duplicates(request.user, team, title, description)
+            if candidates:
+                fields = list(template.fields.all())
+                for field in fields:
+                    field.value = request.POST.get(f'field_{field.id}', '')
+                context = {
+                    'template': template,
+                    'fields': fields,
+                    'teams': visible_teams(request.user, roles=CREATE_ROLES),
+                    'duplicates': candidates,
+                    'form': request.POST,
+                }
+                return render(request, 'decisions/create_from_template.html', context)
+
         decision = Decision.objects.create(
-            title=request.POST.get('title', template.default_title_pattern),
-            description=request.POST.get('description', template.default_description),
+            title=title,
+            description=description,
             team=team,
             template=template,
             created_by=request.user,
@@ -78,11 +98,14 @@ def create_from_template(request, template_id):
         messages.success(request, f'Decision created from template: {template.name}')
         return redirect('decisions:decision_detail', pk=decision.id)
     
-    user_teams = Team.objects.filter(teammember__user=request.user)
+    user_teams = visible_teams(request.user, roles=CREATE_ROLES)
+    fields = list(template.fields.all())
+    for field in fields:
+        field.value = field.default_value
     
     context = {
         'template': template,
-        'fields': template.fields.all(),
+        'fields': fields,
         'teams': user_teams,
     }
     return render(request, 'decisions/create_from_template.html', context)
\ No newline at end of file